@@ -0,0 +1,99 @@
+"""
+注册表写入基准：逐项 SetValueEx 与 .reg 批量导入
+
+用于确定 RegistryExecutor.BULK_IMPORT_THRESHOLD。需在 Windows 上以管理员身份运行，
+所有值写入 HKCU 下的临时键，结束后自动删除。
+
+用法:
+    python benchmarks/bench_registry_import.py [值数量 ...]
+"""
+import os
+import sys
+import time
+import winreg
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from executors.registry_executor import RegistryExecutor  # noqa: E402
+
+BENCH_PATH = r"Software\Win10OptimizeBench"
+DEFAULT_SIZES = [10, 50, 100, 200, 500, 1000, 5000]
+VALUES_PER_TASK = 10
+REPEAT = 3
+
+
+def build_tasks(value_count: int):
+    """构造 value_count 个 REG_DWORD 值，每个任务包含 VALUES_PER_TASK 个值"""
+    tasks = []
+    for start in range(0, value_count, VALUES_PER_TASK):
+        count = min(VALUES_PER_TASK, value_count - start)
+        tasks.append({
+            'id': f'bench_{start}',
+            'type': 'registry',
+            'action': {
+                'root': 'HKCU',
+                'path': f"{BENCH_PATH}\\Key{start // VALUES_PER_TASK}",
+                'values': [
+                    {'name': f'Value{start + i}', 'type': 'REG_DWORD', 'value': start + i}
+                    for i in range(count)
+                ]
+            }
+        })
+    return tasks
+
+
+def delete_tree(root, path: str):
+    """递归删除测试键"""
+    try:
+        with winreg.OpenKey(root, path, 0, winreg.KEY_ALL_ACCESS) as key:
+            while True:
+                try:
+                    child = winreg.EnumKey(key, 0)
+                except OSError:
+                    break
+                delete_tree(root, f"{path}\\{child}")
+        winreg.DeleteKey(root, path)
+    except FileNotFoundError:
+        pass
+
+
+def measure(executor: RegistryExecutor, tasks) -> float:
+    """返回 REPEAT 次执行中的最短耗时（秒）"""
+    best = float('inf')
+    for _ in range(REPEAT):
+        delete_tree(winreg.HKEY_CURRENT_USER, BENCH_PATH)
+        start = time.perf_counter()
+        results = list(executor.execute_batch(tasks))
+        elapsed = time.perf_counter() - start
+        if not all(r.success for r in results):
+            raise RuntimeError("基准写入失败")
+        best = min(best, elapsed)
+    return best
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+    per_value = RegistryExecutor(bulk_import_threshold=sys.maxsize)
+    bulk = RegistryExecutor(bulk_import_threshold=0)
+
+    crossover = None
+    print(f"{'值数量':>8} {'逐项(ms)':>12} {'批量导入(ms)':>14}")
+    try:
+        for size in sizes:
+            tasks = build_tasks(size)
+            t_single = measure(per_value, tasks) * 1000
+            t_bulk = measure(bulk, tasks) * 1000
+            print(f"{size:>8} {t_single:>12.1f} {t_bulk:>14.1f}")
+            if crossover is None and t_bulk < t_single:
+                crossover = size
+    finally:
+        delete_tree(winreg.HKEY_CURRENT_USER, BENCH_PATH)
+
+    if crossover is None:
+        print("批量导入在测试范围内均未更快，建议提高 BULK_IMPORT_THRESHOLD")
+    else:
+        print(f"建议 BULK_IMPORT_THRESHOLD = {crossover} (当前 {RegistryExecutor.BULK_IMPORT_THRESHOLD})")
+
+
+if __name__ == "__main__":
+    main()
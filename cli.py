@@ -0,0 +1,536 @@
+"""
+Win10优化工具 - 命令行入口
+
+用法:
+    python cli.py apply [--category services] [--task disable_sysmain] [--json] [--timeout 600 --state-file run.json]
+    python cli.py apply --preset presets/office.json
+    python cli.py resume --state-file run.json
+    python cli.py rollback --state-file run.json
+    python cli.py watch [--interval 300] [--cpu-budget 0.02] [--memory-mb 64] [--once]
+    python cli.py history slow|failures [--days 30] [--limit 10]
+    python cli.py apply --helper          # 经常驻的提权辅助进程执行
+    python cli.py apply --throttle [--spawn-rate 4] [--max-stops 2] [--cpu-threshold 75]
+    python cli.py helper start|stop|status|serve
+    python cli.py snapshot capture [--output before.snap]
+    python cli.py snapshot diff before.snap after.snap [--section services] [--json]
+    python cli.py apply --snapshot-dir logs/snapshots   # 执行前后各保存一份快照
+    python cli.py aggregate reports/ [--json] [--top 20]   # 汇总各主机的 --json 输出
+"""
+import argparse
+import json
+import os
+import platform
+import signal
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from core.cancellation import CancellationToken
+from core.drift_watch import DriftWatcher
+from core.elevated_helper import (
+    DEFAULT_PROFILE, HelperClient, HelperError, HelperServer, connect_helper, default_address,
+    default_key_path, read_key
+)
+from core.events import (
+    RunFinished, TaskFailed, TaskRetried, TaskSkipped, TaskStarted, TaskSucceeded, TaskVerified
+)
+from core.executor import RunResult, TaskExecutor
+from core.executor_registry import ExecutorRegistry
+from core.fleet import FleetAggregator
+from core.history import RunHistory
+from core.metrics import MetricsCollector
+from core.plan_cache import PlanCache
+from core.planner import TaskPlanner
+from core.throttle import ResourceThrottle, ThrottleSettings
+from core.presets import SelectionPreset
+from core.profile_parser import ProfileParser
+from core.snapshot import Snapshot, collect_state, diff_snapshots, write_snapshot
+from utils.logger import setup_logger
+
+
+def _select_tasks(parser: ProfileParser, categories: List[str], task_ids: List[str],
+                  use_cache: bool = True) -> List[Dict[str, Any]]:
+    """
+    按分类和任务 id 从配置中挑选任务，未指定时选择全部
+
+    经 TaskPlanner 排除不满足 when 条件的任务，并合并重复或冲突的目标。
+    """
+    def load_tasks() -> List[Dict[str, Any]]:
+        tasks = []
+        for category in parser.get_categories():
+            if categories and category not in categories:
+                continue
+            for task in parser.get_category_tasks(category):
+                if task_ids and task.get('id') not in task_ids:
+                    continue
+                tasks.append(task)
+        return tasks
+
+    selection = {'category': sorted(categories), 'task': sorted(task_ids)}
+    return _plan_tasks(parser, selection, load_tasks, use_cache)
+
+
+def _plan_tasks(parser: ProfileParser, selection: Dict[str, Any],
+                load_tasks: Callable[[], List[Dict[str, Any]]], use_cache: bool) -> List[Dict[str, Any]]:
+    """生成执行计划；相同配置、选择与主机事实的计划直接取自缓存"""
+    planner = TaskPlanner()
+    if not use_cache:
+        return planner.plan(load_tasks()).tasks
+    return PlanCache().plan(planner, parser.profile_hash(), selection, load_tasks).tasks
+
+
+def _print_event(event):
+    """以可读文本输出事件"""
+    if isinstance(event, TaskStarted):
+        print(f"[INFO] 正在处理: {event.description}")
+    elif isinstance(event, TaskSucceeded):
+        print(f"[SUCCESS] {event.description} ({event.duration:.2f}s)")
+    elif isinstance(event, TaskRetried):
+        print(f"[INFO] 重试: {event.description} ({event.error or '执行器返回失败'})")
+    elif isinstance(event, TaskFailed):
+        print(f"[ERROR] {event.description}: {event.error or '执行器返回失败'}")
+    elif isinstance(event, TaskSkipped):
+        print(f"[INFO] 跳过: {event.description} ({event.reason})")
+    elif isinstance(event, TaskVerified) and not event.in_sync:
+        print(f"[ERROR] 偏差: {event.description}: {'; '.join(event.drift)}")
+    elif isinstance(event, RunFinished):
+        status = f"已中止 ({event.reason})" if event.cancelled else "完成"
+        print(f"优化{status}！成功: {event.success}, 失败: {event.failed}, 跳过: {event.skipped}, "
+              f"状态偏差: {event.drifted}, 耗时: {event.duration:.1f}s")
+
+
+def _connect_helper(args, parser: Optional[ProfileParser] = None,
+                    preset: Optional[SelectionPreset] = None, **options) -> HelperClient:
+    """
+    连接辅助进程；请求只携带任务 id，辅助进程从 --profile 指定的配置（或预设）构造任务
+
+    Raises:
+        HelperError: 辅助进程不可用
+    """
+    if parser is None:
+        parser = ProfileParser(args.profile)
+        if not parser.load_profile():
+            parser = None
+    return connect_helper(
+        profile_path=args.profile, profile_hash=parser.profile_hash() if parser is not None else None,
+        preset=preset.to_dict() if preset is not None else None, **options
+    )
+
+
+def _run(tasks: List[Dict[str, Any]], args, previous: Optional[RunResult] = None,
+         parser: Optional[ProfileParser] = None, preset: Optional[SelectionPreset] = None) -> int:
+    """
+    执行任务并消费事件流：输出、指标与部分结果共用同一次遍历
+
+    Ctrl+C 与 --timeout 通过取消令牌生效；被中止时可用 --state-file 保存部分结果，
+    之后通过 resume / rollback 子命令续跑或回滚。
+    """
+    throttle = _throttle_settings(args)
+    if args.helper:
+        try:
+            executor = _connect_helper(args, parser, preset, max_retries=args.retries, verify=not args.no_verify,
+                                       throttle=throttle)
+        except HelperError as e:
+            print(f"辅助进程不可用: {e}", file=sys.stderr)
+            return 2
+    else:
+        executor = TaskExecutor(max_retries=args.retries, verify=not args.no_verify,
+                                throttle=ResourceThrottle(throttle) if throttle else None)
+    token = CancellationToken.with_timeout(args.timeout)
+    signal.signal(signal.SIGINT, lambda signum, frame: token.cancel("用户中断"))
+    metrics = MetricsCollector()
+    result = RunResult(tasks)
+    host = platform.node()
+    history = None if args.no_history else RunHistory(args.history_db, host)
+
+    for event in executor.iter_execute(tasks, token):
+        metrics.observe(event)
+        result.observe(event)
+        if history is not None:
+            history.observe(event)
+        if args.json:
+            record = event.to_dict()
+            record['host'] = host
+            print(json.dumps(record, ensure_ascii=False), flush=True)
+        else:
+            _print_event(event)
+
+    if args.metrics_file:
+        metrics.write(args.metrics_file)
+    if previous is not None:
+        result.carry_over(previous)
+    if args.state_file:
+        result.save(args.state_file)
+    if result.cancelled:
+        return 3
+    return 1 if result.failed or result.drifted else 0
+
+
+def cmd_apply(args) -> int:
+    """执行配置中的任务，以事件流形式输出进度"""
+    parser = ProfileParser(args.profile)
+    if not parser.load_profile():
+        return 2
+
+    if args.preset:
+        try:
+            preset = SelectionPreset.load(args.preset)
+        except (OSError, ValueError) as e:
+            print(f"无法读取预设 {args.preset}: {e}", file=sys.stderr)
+            return 2
+        tasks = _plan_tasks(parser, {'preset': preset.to_dict()}, lambda: preset.build_tasks(parser),
+                            not args.no_plan_cache)
+    else:
+        preset = None
+        tasks = _select_tasks(parser, args.category, args.task, not args.no_plan_cache)
+
+    if not args.snapshot_dir:
+        return _run(tasks, args, parser=parser, preset=preset)
+
+    prefix = os.path.join(args.snapshot_dir, f"{platform.node()}_{time.strftime('%Y%m%d_%H%M%S')}")
+    before = _capture_snapshot(parser, f"{prefix}_before.snap", {'stage': 'before'})
+    code = _run(tasks, args, parser=parser, preset=preset)
+    after = _capture_snapshot(parser, f"{prefix}_after.snap", {'stage': 'after'})
+    changes = sum(1 for _ in diff_snapshots(Snapshot(before), Snapshot(after)))
+    print(f"快照: {before} -> {after}，共 {changes} 处变化", file=sys.stderr if args.json else sys.stdout)
+    return code
+
+
+def cmd_resume(args) -> int:
+    """续跑上次被中止或失败的任务"""
+    previous = RunResult.load(args.state_file)
+    return _run(previous.pending_tasks(), args, previous)
+
+
+def cmd_rollback(args) -> int:
+    """回滚上次执行中可能已生效的任务"""
+    previous = RunResult.load(args.state_file)
+    try:
+        throttle = _throttle_settings(args)
+        if args.helper:
+            executor = _connect_helper(args, throttle=throttle)
+        else:
+            executor = TaskExecutor(throttle=ResourceThrottle(throttle) if throttle else None)
+        stats = executor.rollback_tasks(previous.rollback_candidates())
+    except HelperError as e:
+        print(f"辅助进程不可用: {e}", file=sys.stderr)
+        return 2
+    print(f"回滚完成！成功: {stats['success']}, 失败: {stats['failed']}")
+    return 1 if stats['failed'] else 0
+
+
+def cmd_watch(args) -> int:
+    """持续监控配置中的任务，重新应用发生漂移的任务"""
+    parser = ProfileParser(args.profile)
+    if not parser.load_profile():
+        return 2
+
+    throttle = _throttle_settings(args)
+    watcher = DriftWatcher(
+        TaskExecutor(max_retries=args.retries, throttle=ResourceThrottle(throttle) if throttle else None),
+        _select_tasks(parser, args.category, args.task, not args.no_plan_cache),
+        interval=args.interval, cpu_budget=args.cpu_budget, memory_budget_mb=args.memory_mb
+    )
+    token = CancellationToken()
+    signal.signal(signal.SIGINT, lambda signum, frame: token.cancel("用户中断"))
+    host = platform.node()
+    history = None if args.no_history else RunHistory(args.history_db, host)
+    drifted = 0
+
+    def on_event(event):
+        nonlocal drifted
+        if history is not None:
+            history.observe(event)
+        if isinstance(event, TaskVerified) and not event.in_sync:
+            drifted += 1
+        if args.json:
+            record = event.to_dict()
+            record['host'] = host
+            print(json.dumps(record, ensure_ascii=False), flush=True)
+        else:
+            _print_event(event)
+
+    watcher.run(token, on_event, max_cycles=1 if args.once else None)
+    return 1 if args.once and drifted else 0
+
+
+def _profile_tasks(parser: ProfileParser) -> List[Dict[str, Any]]:
+    """配置中的全部任务，快照以整个配置为范围，与本次选择了哪些任务无关"""
+    return [task for category in parser.get_categories() for task in parser.get_category_tasks(category)]
+
+
+def _capture_snapshot(parser: ProfileParser, path: str, meta: Optional[Dict[str, Any]] = None) -> str:
+    """导出配置涉及的系统状态并写入快照，返回快照路径"""
+    sections = collect_state(_profile_tasks(parser), ExecutorRegistry())
+    write_snapshot(path, sections, {'host': platform.node(), 'profile': parser.profile_path, **(meta or {})})
+    return path
+
+
+def cmd_snapshot(args) -> int:
+    """保存、查看与对比系统状态快照"""
+    if args.action == 'capture':
+        parser = ProfileParser(args.profile)
+        if not parser.load_profile():
+            return 2
+        path = args.output or os.path.join(
+            Snapshot.DEFAULT_DIR, f"{platform.node()}_{time.strftime('%Y%m%d_%H%M%S')}.snap"
+        )
+        _capture_snapshot(parser, path)
+        snapshot = Snapshot(path)
+        total = sum(snapshot.count(name) for name in snapshot.sections)
+        print(f"快照已保存: {path} ({len(snapshot.sections)} 个分区，{total} 条记录)")
+        return 0
+
+    try:
+        snapshots = [Snapshot(path) for path in args.files]
+    except (OSError, ValueError) as e:
+        print(f"无法读取快照: {e}", file=sys.stderr)
+        return 2
+
+    if args.action == 'show':
+        for snapshot in snapshots:
+            meta = snapshot.meta
+            created = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(meta.get('created_at', 0)))
+            print(f"{snapshot.path}: 主机 {meta.get('host', '-')}，创建于 {created}")
+            for name in snapshot.sections:
+                print(f"  {name:<60}{snapshot.count(name):>8}")
+        return 0
+
+    if len(snapshots) != 2:
+        print("diff 需要两个快照文件", file=sys.stderr)
+        return 2
+    changes = 0
+    for change in diff_snapshots(snapshots[0], snapshots[1], args.section or None):
+        changes += 1
+        if args.json:
+            print(json.dumps(change._asdict(), ensure_ascii=False))
+        elif change.before is None:
+            print(f"+ [{change.section}] {change.key} = {change.after}")
+        elif change.after is None:
+            print(f"- [{change.section}] {change.key} = {change.before}")
+        else:
+            print(f"~ [{change.section}] {change.key}: {change.before} -> {change.after}")
+    if not args.json:
+        print(f"共 {changes} 处差异")
+    return 1 if changes else 0
+
+
+def cmd_history(args) -> int:
+    """查询执行历史：最慢的任务或失败率最高的任务"""
+    history = RunHistory(args.history_db)
+    since = time.time() - args.days * 86400 if args.days else None
+    if args.report == 'slow':
+        rows = history.slow_tasks(args.limit, since)
+    else:
+        rows = history.failure_rates(args.limit, since, args.min_runs)
+
+    if args.json:
+        for row in rows:
+            print(json.dumps(row, ensure_ascii=False))
+    elif args.report == 'slow':
+        print(f"{'任务':<32}{'次数':>6}{'平均耗时':>10}{'最长耗时':>10}")
+        for row in rows:
+            print(f"{row['task_id']:<32}{row['count']:>6}{row['avg_duration']:>9.2f}s{row['max_duration']:>9.2f}s")
+    else:
+        print(f"{'任务':<32}{'执行':>6}{'失败':>6}{'偏差':>6}{'失败率':>8}")
+        for row in rows:
+            print(f"{row['task_id']:<32}{row['runs']:>6}{row['failures']:>6}{row['drifted']:>6}{row['failure_rate']:>8.1%}")
+    return 0
+
+
+def cmd_helper(args) -> int:
+    """管理常驻的提权辅助进程"""
+    address = args.address or default_address()
+    key_path = args.key_file or default_key_path()
+    try:
+        if args.action == 'serve':
+            HelperServer(read_key(key_path), args.profile, address,
+                         idle_timeout=args.idle_timeout or None).serve_forever()
+            return 0
+        client = connect_helper(address, key_path, launch=args.action == 'start', profile_path=args.profile)
+    except HelperError as e:
+        print(f"辅助进程不可用: {e}", file=sys.stderr)
+        return 1
+    if args.action == 'stop':
+        client.shutdown()
+        print("辅助进程已退出")
+        return 0
+    status = client.ping() or {}
+    print(f"辅助进程运行中: {address} (PID {status.get('pid')}, 管理员: {'是' if status.get('admin') else '否'})")
+    return 0
+
+
+def cmd_aggregate(args) -> int:
+    """流式汇总各主机的执行报告"""
+    aggregator = FleetAggregator(top_hosts=args.top)
+    if not aggregator.add_paths(args.paths):
+        print("没有可读取的报告", file=sys.stderr)
+        return 2
+    if args.json:
+        print(json.dumps(aggregator.to_dict(), ensure_ascii=False))
+        return 0
+
+    hosts = aggregator.host_summary()
+    print(f"报告 {hosts['reports']} 份 (文件 {aggregator.files} 个，事件 {aggregator.records} 条，"
+          f"无效 {aggregator.invalid_records} 条)")
+    print(f"存在漂移的主机: {hosts['hosts_with_drift']}，存在失败的主机: {hosts['hosts_with_failures']}，"
+          f"被中止的执行: {hosts['cancelled_runs']}/{hosts['runs']}")
+    for row in hosts['top_drifted']:
+        print(f"  {row['host']:<40}{row['drifted']:>6} 个任务漂移")
+
+    def seconds(value: Optional[float]) -> str:
+        return f"{value:>9.2f}s" if value is not None else f"{'-':>10}"
+
+    print(f"{'任务':<32}{'成功':>8}{'失败':>8}{'漂移':>8}{'失败率':>8}{'P50':>10}{'P90':>10}{'P99':>10}")
+    for row in aggregator.task_summary()[:args.limit or None]:
+        print(f"{row['task_id']:<32}{row['succeeded']:>8}{row['failed']:>8}{row['drifted']:>8}"
+              f"{row['failure_rate']:>8.1%}{seconds(row['p50'])}{seconds(row['p90'])}{seconds(row['p99'])}")
+    return 0
+
+
+def _throttle_settings(args) -> Optional[ThrottleSettings]:
+    """由命令行参数构造节流参数，未指定 --throttle 时返回 None"""
+    if not args.throttle:
+        return None
+    return ThrottleSettings(
+        spawns_per_second=args.spawn_rate, max_concurrent_stops=args.max_stops,
+        cpu_threshold=args.cpu_threshold / 100, low_priority=not args.normal_priority
+    )
+
+
+def _add_throttle_arguments(sub_parser: argparse.ArgumentParser):
+    """添加节流模式参数"""
+    defaults = ThrottleSettings()
+    sub_parser.add_argument('--throttle', action='store_true', help='节流模式：在繁忙的机器上平缓执行')
+    sub_parser.add_argument('--spawn-rate', type=float, default=defaults.spawns_per_second,
+                            help='节流模式下每秒最多启动的外部命令数')
+    sub_parser.add_argument('--max-stops', type=int, default=defaults.max_concurrent_stops,
+                            help='节流模式下同时停止的服务数上限')
+    sub_parser.add_argument('--cpu-threshold', type=float, default=defaults.cpu_threshold * 100,
+                            help='节流模式下整机 CPU 使用率 (%%) 超过该值时暂缓执行')
+    sub_parser.add_argument('--normal-priority', action='store_true', help='节流模式下不降低进程优先级')
+
+
+def _add_history_argument(sub_parser: argparse.ArgumentParser):
+    """添加执行历史数据库参数"""
+    sub_parser.add_argument('--history-db', default=RunHistory.DEFAULT_PATH, help='执行历史数据库路径')
+
+
+def _add_run_arguments(sub_parser: argparse.ArgumentParser):
+    """添加执行类子命令的公共参数"""
+    sub_parser.add_argument('--json', action='store_true', help='以 JSON Lines 输出执行事件')
+    sub_parser.add_argument('--retries', type=int, default=0, help='任务失败后的重试次数')
+    sub_parser.add_argument('--metrics-file', help='指标输出文件 (.json 或 Prometheus 文本)')
+    sub_parser.add_argument('--timeout', type=float, help='全局截止时间 (秒)，到期后跳过剩余任务并终止正在运行的命令')
+    sub_parser.add_argument('--no-verify', action='store_true', help='执行后不读回状态校验')
+    sub_parser.add_argument('--no-history', action='store_true', help='不写入执行历史')
+    _add_throttle_arguments(sub_parser)
+    _add_helper_argument(sub_parser)
+    _add_history_argument(sub_parser)
+
+
+def _add_helper_argument(sub_parser: argparse.ArgumentParser):
+    """添加经辅助进程执行的参数"""
+    sub_parser.add_argument('--helper', action='store_true',
+                            help='经常驻的提权辅助进程执行 (不存在时启动，仅首次出现 UAC 提示)')
+
+
+def _add_helper_profile_argument(sub_parser: argparse.ArgumentParser):
+    """添加辅助进程构造任务所用的配置参数（apply 已有 --profile）"""
+    sub_parser.add_argument('--profile', default=DEFAULT_PROFILE,
+                            help='配置文件路径 (经 --helper 执行时，辅助进程只执行该配置中的任务)')
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    """构建命令行参数解析器"""
+    arg_parser = argparse.ArgumentParser(prog='win10_optimize', description='Win10 优化工具命令行')
+    subparsers = arg_parser.add_subparsers(dest='command', required=True)
+
+    apply_parser = subparsers.add_parser('apply', help='执行配置中的优化任务')
+    apply_parser.add_argument('--profile', default='config/win10_optimize_profile.json', help='配置文件路径')
+    apply_parser.add_argument('--category', action='append', default=[], help='仅执行指定分类 (可重复)')
+    apply_parser.add_argument('--task', action='append', default=[], help='仅执行指定任务 id (可重复)')
+    apply_parser.add_argument('--state-file', help='保存本次执行结果，用于 resume / rollback')
+    apply_parser.add_argument('--preset', help='按界面导出的选择预设执行 (忽略 --category / --task)')
+    apply_parser.add_argument('--no-plan-cache', action='store_true', help='不使用执行计划缓存，重新规划')
+    apply_parser.add_argument('--snapshot-dir', help='执行前后各保存一份状态快照到该目录，并输出变化数')
+    _add_run_arguments(apply_parser)
+    apply_parser.set_defaults(func=cmd_apply)
+
+    resume_parser = subparsers.add_parser('resume', help='续跑上次未完成的任务')
+    resume_parser.add_argument('--state-file', required=True, help='apply 保存的执行结果 (续跑后会被更新)')
+    _add_helper_profile_argument(resume_parser)
+    _add_run_arguments(resume_parser)
+    resume_parser.set_defaults(func=cmd_resume)
+
+    rollback_parser = subparsers.add_parser('rollback', help='回滚上次执行中可能已生效的任务')
+    rollback_parser.add_argument('--state-file', required=True, help='apply 保存的执行结果')
+    _add_helper_profile_argument(rollback_parser)
+    _add_throttle_arguments(rollback_parser)
+    _add_helper_argument(rollback_parser)
+    rollback_parser.set_defaults(func=cmd_rollback)
+
+    watch_parser = subparsers.add_parser('watch', help='持续监控并重新应用发生漂移的任务')
+    watch_parser.add_argument('--profile', default='config/win10_optimize_profile.json', help='配置文件路径')
+    watch_parser.add_argument('--category', action='append', default=[], help='仅监控指定分类 (可重复)')
+    watch_parser.add_argument('--task', action='append', default=[], help='仅监控指定任务 id (可重复)')
+    watch_parser.add_argument('--interval', type=float, default=300.0, help='检查间隔 (秒)')
+    watch_parser.add_argument('--cpu-budget', type=float, default=0.02, help='允许占用的 CPU 比例，超出时自动延长间隔')
+    watch_parser.add_argument('--memory-mb', type=float, default=64.0, help='内存上限 (MB)，超出时清空增量缓存')
+    watch_parser.add_argument('--once', action='store_true', help='只检查一轮，存在漂移时返回 1')
+    watch_parser.add_argument('--retries', type=int, default=0, help='重新应用失败后的重试次数')
+    watch_parser.add_argument('--json', action='store_true', help='以 JSON Lines 输出事件')
+    watch_parser.add_argument('--no-history', action='store_true', help='不写入执行历史')
+    watch_parser.add_argument('--no-plan-cache', action='store_true', help='不使用执行计划缓存，重新规划')
+    _add_throttle_arguments(watch_parser)
+    _add_history_argument(watch_parser)
+    watch_parser.set_defaults(func=cmd_watch)
+
+    history_parser = subparsers.add_parser('history', help='查询执行历史')
+    history_parser.add_argument('report', choices=['slow', 'failures'], help='slow: 最慢的任务; failures: 失败率最高的任务')
+    history_parser.add_argument('--days', type=float, help='仅统计最近若干天')
+    history_parser.add_argument('--limit', type=int, default=10, help='返回条数')
+    history_parser.add_argument('--min-runs', type=int, default=1, help='failures 报告中至少执行过的次数')
+    history_parser.add_argument('--json', action='store_true', help='以 JSON Lines 输出')
+    _add_history_argument(history_parser)
+    history_parser.set_defaults(func=cmd_history)
+
+    helper_parser = subparsers.add_parser('helper', help='管理常驻的提权辅助进程')
+    helper_parser.add_argument('action', choices=['start', 'stop', 'status', 'serve'],
+                               help='start: 启动 (需确认 UAC); stop: 退出; status: 查看状态; serve: 在当前进程中运行服务端')
+    helper_parser.add_argument('--address', help='通道地址，默认为本机命名管道 / Unix 套接字')
+    helper_parser.add_argument('--key-file', help='认证密钥文件，默认位于临时目录')
+    helper_parser.add_argument('--profile', default=DEFAULT_PROFILE, help='辅助进程加载的配置，只接受其中的任务')
+    helper_parser.add_argument('--idle-timeout', type=float, default=600.0, help='空闲多久 (秒) 后自动退出，0 表示不退出')
+    helper_parser.set_defaults(func=cmd_helper)
+
+    aggregate_parser = subparsers.add_parser('aggregate', help='汇总多台主机的执行报告')
+    aggregate_parser.add_argument('paths', nargs='+',
+                                  help='报告文件或目录 (--json 事件流或 --state-file 结果，可为 .gz)')
+    aggregate_parser.add_argument('--top', type=int, default=20, help='列出漂移任务最多的主机数')
+    aggregate_parser.add_argument('--limit', type=int, default=0, help='列出的任务数，0 表示全部')
+    aggregate_parser.add_argument('--json', action='store_true', help='以 JSON 输出完整汇总')
+    aggregate_parser.set_defaults(func=cmd_aggregate)
+
+    snapshot_parser = subparsers.add_parser('snapshot', help='保存、查看与对比系统状态快照')
+    snapshot_parser.add_argument('action', choices=['capture', 'show', 'diff'],
+                                 help='capture: 保存当前状态; show: 查看分区; diff: 对比两个快照')
+    snapshot_parser.add_argument('files', nargs='*', help='show / diff 的快照文件')
+    snapshot_parser.add_argument('--profile', default='config/win10_optimize_profile.json', help='配置文件路径')
+    snapshot_parser.add_argument('--output', help='capture 的输出路径，默认保存到 logs/snapshots')
+    snapshot_parser.add_argument('--section', action='append', default=[], help='diff 时仅对比指定分区 (可重复)')
+    snapshot_parser.add_argument('--json', action='store_true', help='diff 以 JSON Lines 输出')
+    snapshot_parser.set_defaults(func=cmd_snapshot)
+
+    return arg_parser
+
+
+def main(argv=None) -> int:
+    """命令行主函数"""
+    args = build_arg_parser().parse_args(argv)
+    setup_logger()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
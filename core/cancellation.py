@@ -0,0 +1,77 @@
+"""
+协作式取消与全局截止时间
+"""
+import threading
+import time
+from typing import Optional
+
+
+class OperationCancelled(Exception):
+    """操作因取消或超过截止时间而中止"""
+
+
+class CancellationToken:
+    """
+    取消令牌
+
+    调度器、命令执行器和各执行器在关键点检查此令牌：显式调用 cancel() 或到达
+    截止时间后，尚未开始的任务被跳过，正在运行的子进程被终止。
+    """
+
+    def __init__(self, deadline: Optional[float] = None):
+        """
+        初始化令牌
+
+        Args:
+            deadline: 截止时间 (time.monotonic() 时间戳)，None 表示不限时
+        """
+        self.deadline = deadline
+        self._event = threading.Event()
+        self._reason = ""
+
+    @classmethod
+    def with_timeout(cls, seconds: Optional[float]) -> 'CancellationToken':
+        """创建在 seconds 秒后到期的令牌"""
+        return cls(time.monotonic() + seconds if seconds is not None else None)
+
+    def cancel(self, reason: str = "用户取消"):
+        """请求取消"""
+        if not self._event.is_set():
+            self._reason = reason
+            self._event.set()
+
+    @property
+    def is_cancelled(self) -> bool:
+        """是否已取消（包括已超过截止时间）"""
+        if not self._event.is_set() and self.deadline is not None and time.monotonic() >= self.deadline:
+            self.cancel("已超过执行截止时间")
+        return self._event.is_set()
+
+    @property
+    def reason(self) -> str:
+        """取消原因"""
+        return self._reason
+
+    def remaining(self) -> Optional[float]:
+        """距截止时间的剩余秒数，无截止时间时返回 None"""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def raise_if_cancelled(self):
+        """已取消时抛出 OperationCancelled"""
+        if self.is_cancelled:
+            raise OperationCancelled(self._reason)
+
+    def sleep(self, seconds: float):
+        """
+        可被取消打断的等待
+
+        Raises:
+            OperationCancelled: 等待期间被取消或到达截止时间
+        """
+        remaining = self.remaining()
+        if remaining is not None:
+            seconds = min(seconds, remaining)
+        self._event.wait(seconds)
+        self.raise_if_cancelled()
@@ -0,0 +1,194 @@
+"""
+任务条件：声明式条件编译为谓词函数
+"""
+import json
+import logging
+import operator
+from typing import Any, Callable, Dict, List, Set, Tuple
+
+from core.host_facts import HostFacts
+
+Predicate = Callable[[HostFacts], bool]
+
+_COMPARATORS = {
+    '==': operator.eq,
+    '!=': operator.ne,
+    '>': operator.gt,
+    '>=': operator.ge,
+    '<': operator.lt,
+    '<=': operator.le,
+}
+
+
+class ConditionEngine:
+    """
+    任务条件引擎
+
+    任务可带 ``when`` 字段，所有键同时满足时任务才适用于本机::
+
+        "when": {
+            "ram_gb": {">=": 8},
+            "os_build": {">=": 19041, "<": 22000},
+            "disk": "ssd",
+            "os_release": ["10", "11"],
+            "service_present": "WSearch",
+            "service_absent": ["SysMain"],
+            "any": [{...}, {...}],
+            "not": {...}
+        }
+
+    事实值可写成比较运算符字典、单个值（相等）或列表（属于其一）。事实缺失时
+    比较结果为不满足。相同的条件只编译一次，每次过滤中每个不同条件只求值一次。
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger('ConditionEngine')
+        self._compiled: Dict[str, Predicate] = {}
+
+    @staticmethod
+    def _key(spec: Any) -> str:
+        return json.dumps(spec, sort_keys=True, ensure_ascii=False)
+
+    def compile(self, spec: Dict[str, Any]) -> Predicate:
+        """
+        编译条件
+
+        Args:
+            spec: 条件字典
+
+        Returns:
+            Predicate: 以 HostFacts 为参数的谓词函数
+
+        Raises:
+            ValueError: 条件格式无效
+        """
+        key = self._key(spec)
+        predicate = self._compiled.get(key)
+        if predicate is None:
+            predicate = self._compile(spec)
+            self._compiled[key] = predicate
+        return predicate
+
+    def _compile(self, spec: Any) -> Predicate:
+        if not isinstance(spec, dict):
+            raise ValueError(f"条件必须为对象: {spec!r}")
+        clauses = [self._compile_clause(name, value) for name, value in spec.items()]
+        if len(clauses) == 1:
+            return clauses[0]
+        return lambda facts: all(clause(facts) for clause in clauses)
+
+    def _compile_clause(self, name: str, value: Any) -> Predicate:
+        if name == 'all':
+            parts = [self._compile(item) for item in self._as_list(value)]
+            return lambda facts: all(part(facts) for part in parts)
+        if name == 'any':
+            parts = [self._compile(item) for item in self._as_list(value)]
+            return lambda facts: any(part(facts) for part in parts)
+        if name == 'not':
+            inner = self._compile(value)
+            return lambda facts: not inner(facts)
+        if name in ('service_present', 'service_absent'):
+            wanted = frozenset(str(item).lower() for item in self._as_list(value))
+            present = name == 'service_present'
+
+            def check_services(facts: HostFacts) -> bool:
+                services = facts.get('services')
+                if services is None:
+                    return False
+                return wanted <= services if present else not (wanted & services)
+            return check_services
+        if name not in HostFacts.FACT_NAMES:
+            raise ValueError(f"未知的条件: {name}")
+        return self._compile_comparison(name, value)
+
+    def _compile_comparison(self, name: str, value: Any) -> Predicate:
+        if isinstance(value, dict):
+            checks = []
+            for op, expected in value.items():
+                comparator = _COMPARATORS.get(op)
+                if comparator is None:
+                    raise ValueError(f"未知的比较运算符: {op}")
+                checks.append((comparator, self._normalize(expected)))
+
+            def compare(facts: HostFacts) -> bool:
+                actual = self._normalize(facts.get(name))
+                if actual is None:
+                    return False
+                try:
+                    return all(comparator(actual, expected) for comparator, expected in checks)
+                except TypeError:
+                    return False
+            return compare
+
+        allowed = frozenset(self._normalize(item) for item in self._as_list(value))
+        return lambda facts: self._normalize(facts.get(name)) in allowed
+
+    def referenced_facts(self, spec: Any) -> Set[str]:
+        """
+        条件引用的主机事实名（service_present / service_absent 对应 services）
+
+        Args:
+            spec: 条件字典，格式无效的部分被忽略
+
+        Returns:
+            Set[str]: 事实名
+        """
+        names: Set[str] = set()
+        if not isinstance(spec, dict):
+            return names
+        for name, value in spec.items():
+            if name in ('all', 'any'):
+                for item in self._as_list(value):
+                    names |= self.referenced_facts(item)
+            elif name == 'not':
+                names |= self.referenced_facts(value)
+            elif name in ('service_present', 'service_absent'):
+                names.add('services')
+            elif name in HostFacts.FACT_NAMES:
+                names.add(name)
+        return names
+
+    @staticmethod
+    def _as_list(value: Any) -> List[Any]:
+        return list(value) if isinstance(value, (list, tuple)) else [value]
+
+    @staticmethod
+    def _normalize(value: Any) -> Any:
+        """字符串比较不区分大小写"""
+        return value.lower() if isinstance(value, str) else value
+
+    def filter(self, tasks: List[Dict[str, Any]],
+               facts: HostFacts) -> Tuple[List[Dict[str, Any]], List[Tuple[Dict[str, Any], str]]]:
+        """
+        按条件筛选适用于本机的任务
+
+        Args:
+            tasks: 任务列表
+            facts: 主机事实
+
+        Returns:
+            Tuple[applicable, excluded]: 适用的任务，以及被排除的 (任务, 原因)
+        """
+        applicable = []
+        excluded = []
+        # 条件 -> 求值结果，相同条件只求值一次
+        results: Dict[str, Any] = {}
+        for task in tasks:
+            spec = task.get('when')
+            if not spec:
+                applicable.append(task)
+                continue
+            key = self._key(spec)
+            if key not in results:
+                try:
+                    results[key] = self.compile(spec)(facts)
+                except ValueError as e:
+                    self.logger.error(f"任务 {task.get('id', 'unknown')} 的条件无效: {e}")
+                    results[key] = e
+            outcome = results[key]
+            if outcome is True:
+                applicable.append(task)
+            else:
+                reason = f"条件无效: {outcome}" if isinstance(outcome, ValueError) else f"不满足条件 {key}"
+                excluded.append((task, reason))
+        return applicable, excluded
@@ -0,0 +1,172 @@
+"""
+状态漂移监控（守护模式）
+"""
+import gc
+import logging
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from core.cancellation import CancellationToken
+from core.events import ExecutionEvent, TaskVerified, task_event
+from core.executor import TaskExecutor
+from utils.process_stats import current_rss_mb
+
+# 尚未记录标记
+_UNSET = object()
+
+
+class DriftWatcher:
+    """
+    周期性检查配置中的任务是否仍处于目标状态，只重新应用发生漂移的任务
+
+    每轮先通过执行器的 change_markers 廉价地读取变化标记（服务快照条目、
+    注册表键最后写入时间），标记与上一轮相同且上一轮一致的任务直接跳过；
+    其余任务批量读取状态并用 check_state 对比。不支持标记的任务类型每轮完整校验。
+
+    CPU 预算按每轮消耗的 CPU 时间拉长下一轮的间隔；内存超出预算时丢弃标记缓存，
+    下一轮退化为完整校验。
+    """
+
+    def __init__(self, executor: TaskExecutor, tasks: List[Dict[str, Any]],
+                 interval: float = 300.0, cpu_budget: float = 0.02,
+                 memory_budget_mb: float = 64.0):
+        """
+        初始化监控器
+
+        Args:
+            executor: 任务执行管理器，用于读取状态和重新应用
+            tasks: 需要保持的任务列表
+            interval: 检查间隔 (秒)
+            cpu_budget: 允许占用的 CPU 比例 (0.02 即 2% 单核)
+            memory_budget_mb: 常驻内存上限 (MB)
+        """
+        self.logger = logging.getLogger('DriftWatcher')
+        self.executor = executor
+        self.tasks = tasks
+        self.interval = interval
+        self.cpu_budget = cpu_budget
+        self.memory_budget_mb = memory_budget_mb
+        # 任务 id -> 上一轮确认一致时的变化标记
+        self._markers: Dict[str, Any] = {}
+        self.cycles = 0
+
+    def find_drift(self) -> List[Tuple[Dict[str, Any], List[str]]]:
+        """
+        执行一轮增量检查
+
+        Returns:
+            List[Tuple[task, drift]]: 发生漂移的任务及偏差描述
+        """
+        # 同类型任务合并为一次状态读取，检查不涉及执行顺序，无需保持相邻
+        groups: Dict[str, List[Dict[str, Any]]] = {}
+        for task in self.tasks:
+            groups.setdefault(str(task.get('type', '')), []).append(task)
+
+        drifted = []
+        for task_type, group in groups.items():
+            executor = self.executor.executors.get(task_type)
+            if executor is None:
+                continue
+            try:
+                markers, state = executor.change_markers(group)
+            except Exception as e:
+                self.logger.warning(f"读取 {task_type} 变化标记失败: {e}")
+                markers, state = None, None
+
+            if markers is None:
+                changed = group
+            else:
+                changed = [task for task in group
+                           if self._markers.get(str(task.get('id')), _UNSET) != markers.get(str(task.get('id')))]
+            if not changed:
+                continue
+
+            if state is None:
+                try:
+                    state = executor.read_state(changed)
+                except Exception as e:
+                    self.logger.warning(f"读取 {task_type} 状态失败: {e}")
+                    continue
+                if state is None:
+                    continue
+
+            for task in changed:
+                task_id = str(task.get('id'))
+                try:
+                    drift = executor.check_state(task, state)
+                except Exception as e:
+                    drift = [f"校验出错: {e}"]
+                if drift:
+                    # 漂移任务不记录标记，重新应用后下一轮必然复查
+                    self._markers.pop(task_id, None)
+                    drifted.append((task, drift))
+                elif markers is not None:
+                    self._markers[task_id] = markers.get(task_id)
+        return drifted
+
+    def check_once(self, token: Optional[CancellationToken] = None) -> Iterator[ExecutionEvent]:
+        """
+        检查一轮并重新应用漂移的任务
+
+        Args:
+            token: 取消令牌
+
+        Returns:
+            Iterator[ExecutionEvent]: 每个漂移任务一条 TaskVerified，随后为重新应用的事件流
+        """
+        self.cycles += 1
+        drifted = self.find_drift()
+        for task, drift in drifted:
+            self.logger.warning(f"任务 {task.get('id', 'unknown')} 状态漂移: {'; '.join(drift)}")
+            yield task_event(TaskVerified, task, drift=drift)
+        if drifted:
+            yield from self.executor.iter_execute([task for task, _ in drifted], token)
+
+    def run(self, token: CancellationToken,
+            on_event: Optional[Callable[[ExecutionEvent], None]] = None,
+            max_cycles: Optional[int] = None):
+        """
+        持续监控直到令牌被取消
+
+        Args:
+            token: 取消令牌
+            on_event: 事件回调
+            max_cycles: 最多检查轮数，None 表示不限
+        """
+        while not token.is_cancelled:
+            cpu_start = time.process_time()
+            for event in self.check_once(token):
+                if on_event is not None:
+                    on_event(event)
+            cpu_used = time.process_time() - cpu_start
+
+            self._enforce_memory_budget()
+            if max_cycles is not None and self.cycles >= max_cycles:
+                break
+            token.sleep(self.next_interval(cpu_used))
+
+    def next_interval(self, cpu_used: float) -> float:
+        """
+        根据本轮 CPU 消耗计算下一轮等待时间，保证平均占用不超过预算
+
+        Args:
+            cpu_used: 本轮消耗的 CPU 时间 (秒)
+
+        Returns:
+            float: 等待时间 (秒)
+        """
+        if self.cpu_budget <= 0:
+            return self.interval
+        required = cpu_used / self.cpu_budget
+        if required > self.interval:
+            self.logger.info(f"本轮 CPU 耗时 {cpu_used:.2f}s，检查间隔延长至 {required:.0f}s")
+            return required
+        return self.interval
+
+    def _enforce_memory_budget(self):
+        """内存超出预算时释放标记缓存"""
+        rss = current_rss_mb()
+        if rss > self.memory_budget_mb:
+            self.logger.warning(f"内存占用 {rss:.1f}MB 超出预算 {self.memory_budget_mb:.0f}MB，清空标记缓存")
+            self._markers.clear()
+            gc.collect()
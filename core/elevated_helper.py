@@ -0,0 +1,743 @@
+"""
+常驻的提权辅助进程
+
+以管理员身份启动一次后，通过本地进程间通道（Windows 命名管道 / 其他平台 Unix
+套接字）接受批量任务请求，后续每次执行只需一次连接，而不必再经过 UAC 提示和
+解释器启动。
+
+辅助进程是提权边界：请求只能引用启动时加载的配置中的任务（任务 id 或选择预设），
+实际执行的任务由辅助进程自己从配置构造，客户端无法提交任意注册表、服务或 netsh 操作。
+"""
+import ctypes
+import json
+import logging
+import os
+import queue
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from multiprocessing.connection import AuthenticationError, Client, Connection, Listener
+from typing import Any, Dict, Iterator, List, Optional
+
+from core.cancellation import CancellationToken
+from core.events import ExecutionEvent, event_from_dict
+from core.executor import TaskExecutor
+from core.executor_registry import ExecutorRegistry
+from core.host_facts import HostFacts
+from core.planner import TaskPlanner
+from core.presets import SelectionPreset
+from core.profile_layers import ProfileComposer
+from core.profile_parser import ProfileParser
+from core.throttle import ResourceThrottle, ThrottleSettings
+from utils.admin_check import PrivilegeProvider, default_provider
+
+HELPER_NAME = 'win10_optimize_helper'
+DEFAULT_PROFILE = 'config/win10_optimize_profile.json'
+# 无请求超过该时长 (秒) 后辅助进程自动退出，避免长期保留提权进程
+IDLE_TIMEOUT = 600
+# 执行期间检查取消请求与取消令牌的间隔 (秒)
+POLL_INTERVAL = 0.1
+# 请求中允许的最大重试次数
+MAX_RETRIES = 10
+# 启动辅助进程后等待其可连接的最长时间 (秒)
+LAUNCH_TIMEOUT = 30
+
+# 工作线程结束的标记
+_FINISHED = object()
+
+
+class HelperError(RuntimeError):
+    """辅助进程不可用或请求失败"""
+
+
+def default_address() -> str:
+    """本机默认的通道地址"""
+    if sys.platform == 'win32':
+        return rf'\\.\pipe\{HELPER_NAME}'
+    return os.path.join(tempfile.gettempdir(), f'{HELPER_NAME}.sock')
+
+
+def default_key_path() -> str:
+    """共享认证密钥的文件（位于当前用户的临时目录）"""
+    return os.path.join(tempfile.gettempdir(), f'{HELPER_NAME}.key')
+
+
+def _family(address: str) -> str:
+    return 'AF_PIPE' if address.startswith('\\\\') else 'AF_UNIX'
+
+
+def encode_frame(message: Dict[str, Any]) -> bytes:
+    """
+    编码一帧消息
+
+    帧边界由 Connection.send_bytes 的长度前缀负责，帧内容为紧凑的 UTF-8 JSON。
+    """
+    return json.dumps(message, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def decode_frame(data: bytes) -> Dict[str, Any]:
+    """解码一帧消息"""
+    return json.loads(data.decode('utf-8'))
+
+
+def read_key(key_path: str) -> bytes:
+    """读取认证密钥"""
+    with open(key_path, 'r', encoding='ascii') as f:
+        return bytes.fromhex(f.read().strip())
+
+
+def write_key(key_path: str, authkey: bytes):
+    """
+    写入认证密钥
+
+    POSIX 上文件权限为 0600；Windows 上权限继承自用户临时目录（该用户与管理员可访问）。
+    密钥由未提权的一方写入，同一用户的任何进程都能读到，因此它只用于建立连接，
+    不是权限边界：服务端另外校验客户端进程的身份，并且只执行已加载配置中的任务。
+    """
+    fd = os.open(key_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w', encoding='ascii') as f:
+        f.write(authkey.hex())
+
+
+def _process_user_sid(pid: int) -> Optional[bytes]:
+    """Windows 上进程令牌中用户 SID 的二进制形式，无法获取时为 None"""
+    from ctypes import wintypes
+    kernel32 = ctypes.windll.kernel32
+    advapi32 = ctypes.windll.advapi32
+    kernel32.OpenProcess.restype = wintypes.HANDLE
+    process = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+    if not process:
+        return None
+    try:
+        token = wintypes.HANDLE()
+        if not advapi32.OpenProcessToken(wintypes.HANDLE(process), 0x0008, ctypes.byref(token)):  # TOKEN_QUERY
+            return None
+        try:
+            size = wintypes.DWORD()
+            advapi32.GetTokenInformation(token, 1, None, 0, ctypes.byref(size))  # TokenUser
+            buffer = ctypes.create_string_buffer(size.value)
+            if not advapi32.GetTokenInformation(token, 1, buffer, size, ctypes.byref(size)):
+                return None
+            sid = ctypes.c_void_p.from_buffer(buffer).value
+            return ctypes.string_at(sid, advapi32.GetLengthSid(ctypes.c_void_p(sid)))
+        finally:
+            kernel32.CloseHandle(token)
+    finally:
+        kernel32.CloseHandle(wintypes.HANDLE(process))
+
+
+def _process_session(pid: int) -> Optional[int]:
+    from ctypes import wintypes
+    session = wintypes.DWORD()
+    if not ctypes.windll.kernel32.ProcessIdToSessionId(wintypes.DWORD(pid), ctypes.byref(session)):
+        return None
+    return session.value
+
+
+def _sid_to_string(sid: bytes) -> str:
+    """二进制 SID 转为 S-1-5-... 形式"""
+    from ctypes import wintypes
+    advapi32 = ctypes.windll.advapi32
+    buffer = ctypes.create_string_buffer(sid)
+    text = wintypes.LPWSTR()
+    if not advapi32.ConvertSidToStringSidW(buffer, ctypes.byref(text)):
+        raise ctypes.WinError()
+    try:
+        return text.value
+    finally:
+        ctypes.windll.kernel32.LocalFree(text)
+
+
+def pipe_sddl() -> str:
+    """
+    辅助进程命名管道的安全描述符 (SDDL)
+
+    默认安全描述符只给 Everyone 读权限，完全控制只授予 SYSTEM、Administrators 与
+    创建者所有者；提权进程的所有者是 Administrators 组，未提权的客户端以读写方式
+    打开会被拒绝。因此显式授予当前用户 SID 读写，SYSTEM 与 Administrators 完全控制
+    （服务端创建后续管道实例需要），并且不继承其他访问项。
+
+    Raises:
+        OSError: 无法获取当前用户 SID
+    """
+    sid = _process_user_sid(os.getpid())
+    if sid is None:
+        raise OSError("无法获取当前用户 SID")
+    return f"D:P(A;;GA;;;SY)(A;;GA;;;BA)(A;;GRGW;;;{_sid_to_string(sid)})"
+
+
+if sys.platform == 'win32':
+    import _winapi
+    from multiprocessing.connection import BUFSIZE, PipeListener
+
+    # 拒绝经网络 (SMB) 连接的客户端
+    _PIPE_REJECT_REMOTE_CLIENTS = 0x00000008
+
+    class _SecurityAttributes(ctypes.Structure):
+        _fields_ = [('nLength', ctypes.c_ulong), ('lpSecurityDescriptor', ctypes.c_void_p),
+                    ('bInheritHandle', ctypes.c_int)]
+
+    class _SecurePipeListener(PipeListener):
+        """以显式安全描述符创建每个管道实例的 PipeListener"""
+
+        def __init__(self, address: str, sddl: str):
+            from ctypes import wintypes
+            descriptor = ctypes.c_void_p()
+            if not ctypes.windll.advapi32.ConvertStringSecurityDescriptorToSecurityDescriptorW(
+                    sddl, 1, ctypes.byref(descriptor), None):  # SDDL_REVISION_1
+                raise ctypes.WinError()
+            self._descriptor = descriptor
+            self._attributes = _SecurityAttributes(ctypes.sizeof(_SecurityAttributes), descriptor.value, 0)
+            self._create = ctypes.windll.kernel32.CreateNamedPipeW
+            self._create.restype = wintypes.HANDLE
+            super().__init__(address)
+
+        def _new_handle(self, first=False):
+            flags = _winapi.PIPE_ACCESS_DUPLEX | _winapi.FILE_FLAG_OVERLAPPED
+            if first:
+                flags |= _winapi.FILE_FLAG_FIRST_PIPE_INSTANCE
+            handle = self._create(
+                self._address, flags,
+                _winapi.PIPE_TYPE_MESSAGE | _winapi.PIPE_READMODE_MESSAGE | _winapi.PIPE_WAIT
+                | _PIPE_REJECT_REMOTE_CLIENTS,
+                _winapi.PIPE_UNLIMITED_INSTANCES, BUFSIZE, BUFSIZE, _winapi.NMPWAIT_WAIT_FOREVER,
+                ctypes.byref(self._attributes)
+            )
+            if handle is None or handle == _winapi.INVALID_HANDLE_VALUE:
+                raise ctypes.WinError()
+            return handle
+
+    class _SecurePipeServer(Listener):
+        """与 Listener 相同的接口（accept 时认证），管道实例使用显式安全描述符"""
+
+        def __init__(self, address: str, authkey: bytes, sddl: str):
+            self._listener = _SecurePipeListener(address, sddl)
+            self._authkey = authkey
+
+
+def listen(address: str, authkey: bytes) -> Listener:
+    """
+    创建服务端监听
+
+    Windows 命名管道使用 pipe_sddl() 的安全描述符，使未提权的同一用户可以连接；
+    其他平台为 Unix 套接字（位于用户临时目录）。
+    """
+    family = _family(address)
+    if family == 'AF_PIPE':
+        return _SecurePipeServer(address, authkey, pipe_sddl())
+    return Listener(address, family=family, authkey=authkey)
+
+
+def client_is_same_user(conn: Connection) -> bool:
+    """
+    检查连接的对端是否为与本进程同一用户、同一会话的进程
+
+    Windows 上通过 GetNamedPipeClientProcessId 取得客户端进程，比较令牌中的用户 SID
+    与登录会话；其他平台通过 SO_PEERCRED 比较 uid。无法确认时视为不通过。
+    """
+    try:
+        if sys.platform == 'win32':
+            from ctypes import wintypes
+            pid = wintypes.ULONG()
+            if not ctypes.windll.kernel32.GetNamedPipeClientProcessId(wintypes.HANDLE(conn.fileno()),
+                                                                      ctypes.byref(pid)):
+                return False
+            own_pid = os.getpid()
+            own_sid = _process_user_sid(own_pid)
+            return (own_sid is not None and _process_user_sid(pid.value) == own_sid
+                    and _process_session(pid.value) == _process_session(own_pid))
+        peer = socket.fromfd(conn.fileno(), socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            _, uid, _ = struct.unpack('3i', peer.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED,
+                                                            struct.calcsize('3i')))
+        finally:
+            peer.close()
+        return uid == os.geteuid()
+    except (OSError, AttributeError, ValueError):
+        return False
+
+
+class HelperServer:
+    """
+    辅助进程的服务端
+
+    协议（每帧一个 JSON 对象）::
+
+        -> {"op": "execute", "task_ids": [...], "preset": {...} | null, "profile_hash": "...",
+            "max_retries": 0, "verify": true, "throttle": {...}}
+        <- {"event": {...}}  (逐个执行事件)  ...  <- {"done": true}
+        -> {"op": "cancel", "reason": "..."}     (执行期间可随时发送)
+        -> {"op": "rollback", "task_ids": [...], "preset": ...}  <- {"stats": {"success": n, "failed": n}}
+        -> {"op": "ping"}                        <- {"ok": true, "pid": n, "admin": true, "profile_hash": "..."}
+        -> {"op": "shutdown"}                    <- {"ok": true}
+        失败时 <- {"error": "..."}
+
+    请求中不包含任务内容：配置在启动时加载一次（不读取用户可写的合成缓存，之后也不
+    重新加载），任务由 task_ids 从配置中选出，或由预设（经 SelectionPreset.from_dict
+    校验）构造，再经 TaskPlanner 规划；任一 id 不在配置中时整个请求被拒绝。连接建立后
+    还会校验客户端进程与辅助进程属于同一用户、同一会话。请求在分派前由 check_request
+    校验结构与字段类型，单个请求的任何失败都只回复 error，不会使辅助进程退出。
+
+    连接逐个处理，同一时刻只有一轮执行，与直接运行时的行为一致。执行器注册表
+    在各请求间共享，已加载的执行器无需重复导入。
+    """
+
+    def __init__(self, authkey: bytes, profile_path: str = DEFAULT_PROFILE, address: Optional[str] = None,
+                 idle_timeout: float = IDLE_TIMEOUT, executors: Optional[ExecutorRegistry] = None,
+                 privileges: Optional[PrivilegeProvider] = None):
+        """
+        初始化服务端并加载配置
+
+        Args:
+            authkey: 连接认证密钥
+            profile_path: 允许执行的任务所在的配置文件
+            address: 通道地址，默认 default_address()
+            idle_timeout: 空闲多久 (秒) 后退出，None 表示不自动退出
+            executors: 执行器注册表
+            privileges: 权限来源（测试用）
+
+        Raises:
+            HelperError: 配置无法加载
+        """
+        self.logger = logging.getLogger('HelperServer')
+        self.authkey = authkey
+        self.address = address or default_address()
+        self.idle_timeout = idle_timeout
+        self.executors = executors if executors is not None else ExecutorRegistry()
+        self.privileges = privileges
+        self.parser = ProfileParser(os.path.abspath(profile_path))
+        # 合成缓存位于用户可写的目录，提权进程只信任配置文件本身
+        self.parser.composer = ProfileComposer(cache_dir=None)
+        if not self.parser.load_profile():
+            raise HelperError(f"辅助进程无法加载配置 {profile_path}")
+        self.profile_hash = self.parser.profile_hash()
+        self.facts = HostFacts()
+        self._stopping = False
+        self._last_active = time.monotonic()
+
+    def serve_forever(self):
+        """监听并处理请求，直到收到 shutdown 或空闲超时"""
+        family = _family(self.address)
+        if family == 'AF_UNIX' and os.path.exists(self.address):
+            # 上次异常退出遗留的套接字文件
+            os.unlink(self.address)
+        with listen(self.address, self.authkey) as listener:
+            self.logger.info(f"辅助进程已启动: {self.address} (PID {os.getpid()})")
+            if self.idle_timeout is not None:
+                threading.Thread(target=self._idle_watchdog, name='helper-idle', daemon=True).start()
+            while not self._stopping:
+                try:
+                    conn = listener.accept()
+                except (AuthenticationError, OSError, EOFError) as e:
+                    if not self._stopping:
+                        self.logger.warning(f"拒绝连接: {e}")
+                    continue
+                with conn:
+                    if not client_is_same_user(conn):
+                        self.logger.warning("拒绝连接: 客户端不是同一用户或同一会话的进程")
+                        continue
+                    self._serve_connection(conn)
+                self._last_active = time.monotonic()
+        self.logger.info("辅助进程已退出")
+
+    def _idle_watchdog(self):
+        """空闲超时后唤醒阻塞在 accept 上的主循环"""
+        while not self._stopping:
+            time.sleep(min(self.idle_timeout, 5.0))
+            if time.monotonic() - self._last_active >= self.idle_timeout:
+                self.logger.info(f"空闲超过 {self.idle_timeout:.0f} 秒，辅助进程退出")
+                self._stopping = True
+                try:
+                    Client(self.address, family=_family(self.address), authkey=self.authkey).close()
+                except (OSError, AuthenticationError, EOFError):
+                    pass
+
+    def _serve_connection(self, conn: Connection):
+        while not self._stopping:
+            try:
+                request = decode_frame(conn.recv_bytes())
+            except (EOFError, OSError):
+                return
+            except ValueError as e:
+                self._send(conn, {'error': f"无效的请求: {e}"})
+                continue
+            self._last_active = time.monotonic()
+            try:
+                self.check_request(request)
+                op = request['op']
+                if op == 'execute':
+                    self._execute(conn, request)
+                elif op == 'rollback':
+                    stats = self._executor(request).rollback_tasks(self.build_tasks(request))
+                    self._send(conn, {'stats': stats})
+                elif op == 'ping':
+                    self._send(conn, {'ok': True, 'pid': os.getpid(), 'profile_hash': self.profile_hash,
+                                      'admin': (self.privileges or default_provider()).is_admin()})
+                elif op == 'shutdown':
+                    self._stopping = True
+                    self._send(conn, {'ok': True})
+                elif op != 'cancel':
+                    self._send(conn, {'error': f"未知的请求: {op}"})
+            except (EOFError, OSError):
+                return
+            except Exception as e:
+                # 辅助进程是提权边界，任何单个请求的失败都只回复错误，不能让进程退出
+                if isinstance(e, ValueError):
+                    self.logger.warning(f"拒绝请求: {e}")
+                else:
+                    self.logger.exception("处理请求失败")
+                try:
+                    self._send(conn, {'error': str(e) or type(e).__name__})
+                except (EOFError, OSError):
+                    return
+            self._last_active = time.monotonic()
+
+    @staticmethod
+    def check_request(request: Any):
+        """
+        在分派前校验请求的结构与字段类型
+
+        Args:
+            request: 解码后的请求
+
+        Raises:
+            ValueError: 请求不是对象，或字段缺失、类型不符
+        """
+        if not isinstance(request, dict):
+            raise ValueError("无效的请求: 应为 JSON 对象")
+        op = request.get('op')
+        if op not in ('execute', 'rollback', 'ping', 'shutdown', 'cancel'):
+            raise ValueError(f"未知的请求: {op}")
+        if op not in ('execute', 'rollback'):
+            return
+        task_ids = request.get('task_ids')
+        if not isinstance(task_ids, list) or not all(isinstance(task_id, str) for task_id in task_ids):
+            raise ValueError("task_ids 应为字符串列表")
+        if not isinstance(request.get('profile_hash'), (str, type(None))):
+            raise ValueError("profile_hash 应为字符串")
+        if not isinstance(request.get('preset'), (dict, type(None))):
+            raise ValueError("preset 应为对象")
+        max_retries = request.get('max_retries', 0)
+        if isinstance(max_retries, bool) or not isinstance(max_retries, int) or not 0 <= max_retries <= MAX_RETRIES:
+            raise ValueError(f"max_retries 应为 0-{MAX_RETRIES} 的整数")
+        if not isinstance(request.get('verify', True), bool):
+            raise ValueError("verify 应为布尔值")
+        throttle = request.get('throttle')
+        if throttle is None:
+            return
+        if not isinstance(throttle, dict):
+            raise ValueError("throttle 应为对象")
+        defaults = ThrottleSettings()
+        for key, value in throttle.items():
+            if key not in ThrottleSettings._fields:
+                continue
+            expected = type(getattr(defaults, key))
+            if expected is bool:
+                valid = isinstance(value, bool)
+            else:
+                valid = isinstance(value, (int, float)) and not isinstance(value, bool) and value >= 0
+            if not valid:
+                raise ValueError(f"throttle.{key} 的取值无效: {value!r}")
+
+    def build_tasks(self, request: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        由请求中的任务 id（及可选的预设）从已加载的配置构造任务
+
+        Args:
+            request: execute / rollback 请求
+
+        Returns:
+            List[Dict]: 规划后的任务
+
+        Raises:
+            ValueError: 配置哈希不一致、预设无效，或有任务 id 不在配置中
+        """
+        expected = request.get('profile_hash')
+        if expected and expected != self.profile_hash:
+            raise ValueError("辅助进程加载的配置与本地配置不一致，请先执行 helper stop")
+        task_ids = request.get('task_ids')
+        if not isinstance(task_ids, list):
+            raise ValueError("请求缺少 task_ids")
+        if request.get('preset') is not None:
+            candidates = SelectionPreset.from_dict(request['preset']).build_tasks(self.parser)
+        else:
+            candidates = [task for category in self.parser.get_categories()
+                          for task in self.parser.get_category_tasks(category)]
+        by_id: Dict[str, Dict[str, Any]] = {}
+        for task in candidates:
+            by_id.setdefault(str(task.get('id', '')), task)
+        requested = list(dict.fromkeys(str(task_id) for task_id in task_ids))
+        unknown = [task_id for task_id in requested if task_id not in by_id]
+        if unknown:
+            raise ValueError(f"任务不在辅助进程加载的配置中，已拒绝: {', '.join(unknown[:10])}")
+        return TaskPlanner(self.facts).plan([by_id[task_id] for task_id in requested]).tasks
+
+    def _executor(self, request: Dict[str, Any]) -> TaskExecutor:
+        settings = request.get('throttle')
+        return TaskExecutor(
+            max_retries=request.get('max_retries', 0), verify=request.get('verify', True),
+            executors=self.executors, privileges=self.privileges,
+            throttle=ResourceThrottle(ThrottleSettings.from_dict(settings)) if settings else None
+        )
+
+    @staticmethod
+    def _send(conn: Connection, message: Dict[str, Any]):
+        conn.send_bytes(encode_frame(message))
+
+    def _execute(self, conn: Connection, request: Dict[str, Any]):
+        """在工作线程中执行，本线程转发事件并接收取消请求（连接只由本线程读写）"""
+        executor = self._executor(request)
+        tasks = self.build_tasks(request)
+        token = CancellationToken()
+        events: 'queue.Queue' = queue.Queue()
+
+        def worker():
+            try:
+                for event in executor.iter_execute(tasks, token):
+                    events.put(event)
+            except Exception as e:
+                events.put(e)
+            events.put(_FINISHED)
+
+        thread = threading.Thread(target=worker, name='helper-run', daemon=True)
+        thread.start()
+        connected = True
+        while True:
+            try:
+                item = events.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                item = None
+            if item is _FINISHED:
+                break
+            if not connected:
+                continue
+            try:
+                if isinstance(item, Exception):
+                    self._send(conn, {'error': str(item)})
+                elif item is not None:
+                    self._send(conn, {'event': item.to_dict()})
+                while conn.poll(0):
+                    try:
+                        message = decode_frame(conn.recv_bytes())
+                    except ValueError:
+                        continue
+                    # 执行期间只接受取消请求，其余消息忽略
+                    if isinstance(message, dict) and message.get('op') == 'cancel':
+                        reason = message.get('reason')
+                        token.cancel(reason if isinstance(reason, str) and reason else "用户取消")
+            except (EOFError, OSError):
+                # 客户端已断开：中止剩余任务，等待当前任务结束
+                connected = False
+                token.cancel("客户端已断开")
+        thread.join()
+        if not connected:
+            raise EOFError("客户端已断开")
+        self._send(conn, {'done': True})
+
+
+class HelperClient:
+    """
+    辅助进程的客户端
+
+    提供与 TaskExecutor 相同的 iter_execute / rollback_tasks 接口，调用方可直接替换。
+    只有任务 id 会发送给辅助进程，任务内容由辅助进程从其加载的配置（或 preset）构造。
+    """
+
+    def __init__(self, authkey: bytes, address: Optional[str] = None, max_retries: int = 0, verify: bool = True,
+                 throttle: Optional[ThrottleSettings] = None, profile_hash: Optional[str] = None,
+                 preset: Optional[Dict[str, Any]] = None):
+        """
+        初始化客户端
+
+        Args:
+            authkey: 连接认证密钥
+            address: 通道地址，默认 default_address()
+            max_retries: 任务失败后的最大重试次数
+            verify: 执行后是否批量校验状态
+            throttle: 节流参数，在辅助进程中按此限流
+            profile_hash: 本地配置的内容哈希，与辅助进程加载的配置不一致时请求被拒绝
+            preset: 选择预设 (SelectionPreset.to_dict())，任务由辅助进程按预设构造
+        """
+        self.logger = logging.getLogger('HelperClient')
+        self.authkey = authkey
+        self.address = address or default_address()
+        self.max_retries = max_retries
+        self.verify = verify
+        self.throttle = throttle
+        self.profile_hash = profile_hash
+        self.preset = preset
+
+    def _selection(self, tasks: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """请求中引用任务的字段"""
+        return {
+            'task_ids': [str(task.get('id', 'unknown')) for task in tasks],
+            'preset': self.preset, 'profile_hash': self.profile_hash,
+            'throttle': self.throttle._asdict() if self.throttle is not None else None,
+        }
+
+    def _connect(self) -> Connection:
+        try:
+            return Client(self.address, family=_family(self.address), authkey=self.authkey)
+        except (OSError, AuthenticationError, EOFError) as e:
+            raise HelperError(f"无法连接辅助进程 {self.address}: {e}")
+
+    def _request(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        with self._connect() as conn:
+            conn.send_bytes(encode_frame(message))
+            try:
+                reply = decode_frame(conn.recv_bytes())
+            except (EOFError, OSError) as e:
+                raise HelperError(f"辅助进程连接中断: {e}")
+        if 'error' in reply:
+            raise HelperError(reply['error'])
+        return reply
+
+    def ping(self) -> Optional[Dict[str, Any]]:
+        """
+        检查辅助进程是否可用
+
+        Returns:
+            Optional[Dict]: 可用时为 {'pid': ..., 'admin': ...}，否则为 None
+        """
+        try:
+            return self._request({'op': 'ping'})
+        except HelperError:
+            return None
+
+    def shutdown(self):
+        """请求辅助进程退出"""
+        self._request({'op': 'shutdown'})
+
+    def iter_execute(self, tasks: List[Dict[str, Any]],
+                     token: Optional[CancellationToken] = None) -> Iterator[ExecutionEvent]:
+        """
+        在辅助进程中执行任务，逐个产出执行事件
+
+        取消令牌被触发（或到达截止时间）时向辅助进程发送取消请求，语义与
+        TaskExecutor.iter_execute 相同。
+
+        Raises:
+            HelperError: 连接失败或辅助进程报告错误
+        """
+        with self._connect() as conn:
+            conn.send_bytes(encode_frame({
+                'op': 'execute', 'max_retries': self.max_retries, 'verify': self.verify, **self._selection(tasks)
+            }))
+            cancel_sent = False
+            while True:
+                if token is not None and token.is_cancelled and not cancel_sent:
+                    conn.send_bytes(encode_frame({'op': 'cancel', 'reason': token.reason}))
+                    cancel_sent = True
+                try:
+                    if not conn.poll(POLL_INTERVAL):
+                        continue
+                    message = decode_frame(conn.recv_bytes())
+                except (EOFError, OSError) as e:
+                    raise HelperError(f"辅助进程连接中断: {e}")
+                if 'event' in message:
+                    yield event_from_dict(message['event'])
+                elif 'error' in message:
+                    raise HelperError(message['error'])
+                elif message.get('done'):
+                    return
+
+    def execute_tasks(self, tasks: List[Dict[str, Any]]) -> Dict[str, int]:
+        """执行一系列任务，返回执行统计信息 (success, failed)"""
+        stats = {'success': 0, 'failed': 0}
+        for event in self.iter_execute(tasks):
+            if event.kind == 'run_finished':
+                stats = {'success': event.success, 'failed': event.failed}
+        return stats
+
+    def rollback_tasks(self, tasks: List[Dict[str, Any]]) -> Dict[str, int]:
+        """在辅助进程中回滚一系列任务，返回执行统计信息 (success, failed)"""
+        return self._request({'op': 'rollback', **self._selection(tasks)})['stats']
+
+
+def _serve_arguments(address: str, key_path: str, profile_path: str) -> List[str]:
+    """启动服务端的命令行参数（打包后的程序由 main.py 转交 cli）"""
+    args = ['helper', 'serve', '--address', address, '--key-file', key_path,
+            '--profile', os.path.abspath(profile_path)]
+    if getattr(sys, 'frozen', False):
+        return args
+    cli_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'cli.py')
+    return [cli_path] + args
+
+
+def launch_helper(address: Optional[str] = None, key_path: Optional[str] = None,
+                  profile_path: str = DEFAULT_PROFILE, timeout: float = LAUNCH_TIMEOUT,
+                  **client_options) -> HelperClient:
+    """
+    以管理员身份启动辅助进程（Windows 上只出现一次 UAC 提示）并等待其可连接
+
+    Args:
+        address: 通道地址
+        key_path: 认证密钥文件
+        profile_path: 辅助进程加载的配置文件
+        timeout: 等待启动的最长时间 (秒)
+        **client_options: 传给 HelperClient 的选项
+
+    Returns:
+        HelperClient: 已连通的客户端
+
+    Raises:
+        HelperError: 启动被拒绝或超时
+    """
+    address = address or default_address()
+    key_path = key_path or default_key_path()
+    authkey = os.urandom(32)
+    write_key(key_path, authkey)
+
+    args = _serve_arguments(address, key_path, profile_path)
+    if sys.platform == 'win32':
+        import ctypes
+        params = subprocess.list2cmdline(args)
+        # 返回值不大于 32 表示失败（包括用户在 UAC 提示中拒绝）
+        code = ctypes.windll.shell32.ShellExecuteW(None, "runas", sys.executable, params, os.getcwd(), 0)
+        if code <= 32:
+            raise HelperError(f"无法以管理员身份启动辅助进程 (错误码 {code})")
+    else:
+        subprocess.Popen([sys.executable] + args, start_new_session=True,
+                         stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    client = HelperClient(authkey, address, **client_options)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if client.ping() is not None:
+            return client
+        time.sleep(0.2)
+    raise HelperError(f"辅助进程未能在 {timeout:.0f} 秒内启动")
+
+
+def connect_helper(address: Optional[str] = None, key_path: Optional[str] = None,
+                   launch: bool = True, profile_path: str = DEFAULT_PROFILE, **client_options) -> HelperClient:
+    """
+    连接已在运行的辅助进程，不存在时按需启动
+
+    Args:
+        address: 通道地址
+        key_path: 认证密钥文件
+        launch: 辅助进程不可用时是否启动新的辅助进程
+        profile_path: 需要启动时辅助进程加载的配置文件
+        **client_options: 传给 HelperClient 的选项
+
+    Returns:
+        HelperClient: 已连通的客户端
+
+    Raises:
+        HelperError: 辅助进程不可用且未能启动
+    """
+    key_path = key_path or default_key_path()
+    try:
+        client = HelperClient(read_key(key_path), address, **client_options)
+        if client.ping() is not None:
+            return client
+    except (OSError, ValueError):
+        pass
+    if not launch:
+        raise HelperError("辅助进程未运行")
+    return launch_helper(address, key_path, profile_path, **client_options)
@@ -0,0 +1,157 @@
+"""
+任务执行事件
+"""
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional
+
+
+@dataclass
+class ExecutionEvent:
+    """执行事件基类"""
+    timestamp: float = field(default_factory=time.time, init=False)
+
+    @property
+    def kind(self) -> str:
+        """事件类型名，如 'task_succeeded'"""
+        return _EVENT_KINDS[type(self)]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为可序列化为 JSON 的字典"""
+        data = asdict(self)
+        data['event'] = self.kind
+        return data
+
+
+@dataclass
+class RunStarted(ExecutionEvent):
+    """整轮执行开始"""
+    total: int = 0
+
+
+@dataclass
+class PhaseStarted(ExecutionEvent):
+    """某一类型的任务组开始执行"""
+    phase: str = ''
+    count: int = 0
+
+
+@dataclass
+class TaskEvent(ExecutionEvent):
+    """单个任务相关事件的公共字段"""
+    task_id: str = ''
+    task_type: str = ''
+    description: str = ''
+
+
+@dataclass
+class TaskStarted(TaskEvent):
+    """任务开始执行"""
+
+
+@dataclass
+class TaskSucceeded(TaskEvent):
+    """任务执行成功"""
+    duration: float = 0.0
+    attempts: int = 1
+
+
+@dataclass
+class TaskFailed(TaskEvent):
+    """任务执行失败（已用尽重试次数）"""
+    error: Optional[str] = None
+    duration: float = 0.0
+    attempts: int = 1
+
+
+@dataclass
+class TaskRetried(TaskEvent):
+    """任务失败后即将重试"""
+    attempt: int = 1
+    error: Optional[str] = None
+    duration: float = 0.0
+
+
+@dataclass
+class TaskSkipped(TaskEvent):
+    """任务因取消或到达截止时间而未执行"""
+    reason: str = ''
+
+
+@dataclass
+class TaskVerified(TaskEvent):
+    """执行后校验结果；drift 为空表示已处于目标状态"""
+    drift: List[str] = field(default_factory=list)
+
+    @property
+    def in_sync(self) -> bool:
+        return not self.drift
+
+
+@dataclass
+class RunFinished(ExecutionEvent):
+    """整轮执行结束"""
+    success: int = 0
+    failed: int = 0
+    duration: float = 0.0
+    skipped: int = 0
+    cancelled: bool = False
+    reason: str = ''
+    drifted: int = 0
+
+
+_EVENT_KINDS = {
+    RunStarted: 'run_started',
+    PhaseStarted: 'phase_started',
+    TaskStarted: 'task_started',
+    TaskSucceeded: 'task_succeeded',
+    TaskFailed: 'task_failed',
+    TaskRetried: 'task_retried',
+    TaskSkipped: 'task_skipped',
+    TaskVerified: 'task_verified',
+    RunFinished: 'run_finished',
+}
+
+_EVENT_CLASSES = {kind: event_class for event_class, kind in _EVENT_KINDS.items()}
+
+
+def event_from_dict(data: Dict[str, Any]) -> ExecutionEvent:
+    """
+    由 to_dict() 的结果还原事件（如经进程间通道传回的事件）
+
+    Args:
+        data: 事件字典
+
+    Returns:
+        ExecutionEvent: 事件，时间戳保持原值
+
+    Raises:
+        ValueError: 未知的事件类型
+    """
+    fields = dict(data)
+    kind = fields.pop('event', None)
+    timestamp = fields.pop('timestamp', None)
+    event_class = _EVENT_CLASSES.get(kind)
+    if event_class is None:
+        raise ValueError(f"未知的事件类型: {kind}")
+    event = event_class(**fields)
+    if timestamp is not None:
+        event.timestamp = timestamp
+    return event
+
+
+def task_event(event_class, task: Dict[str, Any], **kwargs) -> TaskEvent:
+    """
+    根据任务配置构造任务事件
+
+    Args:
+        event_class: TaskEvent 子类
+        task: 任务配置
+        **kwargs: 事件特有字段
+    """
+    return event_class(
+        task_id=str(task.get('id', 'unknown')),
+        task_type=str(task.get('type', '')),
+        description=str(task.get('description', task.get('id', ''))),
+        **kwargs
+    )
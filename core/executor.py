@@ -1,21 +1,133 @@
 """
 任务执行器核心
 """
+import json
 import logging
-from typing import List, Dict, Any
-from executors.service_executor import ServiceExecutor
-from executors.registry_executor import RegistryExecutor
+import time
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+from core.cancellation import CancellationToken
+from core.events import (
+    ExecutionEvent, RunStarted, PhaseStarted, TaskStarted, TaskSucceeded,
+    TaskFailed, TaskRetried, TaskSkipped, TaskVerified, RunFinished, task_event
+)
+from core.verifier import TaskVerifier
+from core.executor_registry import ExecutorRegistry
+from core.preflight import PrivilegePreflight
+from core.throttle import ResourceThrottle
+from executors.base_executor import BatchResult
+from utils.admin_check import PrivilegeProvider
+
+
+class RunResult:
+    """
+    一轮执行的结果
+
+    作为事件流的消费者，按任务 id 记录成功、失败与跳过的任务。被取消的执行
+    可以据此续跑 (pending_tasks) 或回滚已改动的任务 (rollback_candidates)，
+    也可保存为 JSON 供下次启动时继续。
+    """
+
+    def __init__(self, tasks: Optional[List[Dict[str, Any]]] = None):
+        """
+        初始化结果
+
+        Args:
+            tasks: 本轮计划执行的任务
+        """
+        self._tasks = {str(task.get('id', 'unknown')): task for task in tasks or []}
+        self.succeeded: List[str] = []
+        self.failed: List[str] = []
+        self.skipped: List[str] = []
+        self.drifted: List[str] = []
+        self.cancelled = False
+        self.reason = ""
+
+    def observe(self, event: ExecutionEvent):
+        """消费一个执行事件"""
+        if isinstance(event, TaskSucceeded):
+            self.succeeded.append(event.task_id)
+        elif isinstance(event, TaskFailed):
+            self.failed.append(event.task_id)
+        elif isinstance(event, TaskSkipped):
+            self.skipped.append(event.task_id)
+        elif isinstance(event, TaskVerified) and not event.in_sync:
+            self.drifted.append(event.task_id)
+        elif isinstance(event, RunFinished):
+            self.cancelled = event.cancelled
+            self.reason = event.reason
+
+    def _lookup(self, task_ids: List[str]) -> List[Dict[str, Any]]:
+        return [self._tasks[task_id] for task_id in task_ids if task_id in self._tasks]
+
+    def pending_tasks(self) -> List[Dict[str, Any]]:
+        """需要续跑的任务：失败（含执行中被中断）与被跳过的任务"""
+        return self._lookup(self.failed + self.skipped)
+
+    def rollback_candidates(self) -> List[Dict[str, Any]]:
+        """可能已产生改动、需要回滚的任务：成功与失败（可能部分生效）的任务"""
+        return self._lookup(self.succeeded + self.failed)
+
+    def carry_over(self, previous: 'RunResult'):
+        """续跑时并入上一轮已成功的任务，使保存的结果仍可完整回滚"""
+        for task in previous._lookup(previous.succeeded):
+            task_id = str(task.get('id', 'unknown'))
+            if task_id not in self._tasks:
+                self._tasks[task_id] = task
+                self.succeeded.append(task_id)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为可序列化的字典"""
+        return {
+            'cancelled': self.cancelled,
+            'reason': self.reason,
+            'succeeded': self._lookup(self.succeeded),
+            'failed': self._lookup(self.failed),
+            'skipped': self._lookup(self.skipped),
+            'drifted': self.drifted,
+        }
+
+    def save(self, path: str):
+        """保存到 JSON 文件"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+    @classmethod
+    def load(cls, path: str) -> 'RunResult':
+        """从 save() 生成的 JSON 文件加载"""
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        result = cls(data.get('succeeded', []) + data.get('failed', []) + data.get('skipped', []))
+        for key in ('succeeded', 'failed', 'skipped'):
+            getattr(result, key).extend(str(task.get('id', 'unknown')) for task in data.get(key, []))
+        result.drifted = list(data.get('drifted', []))
+        result.cancelled = data.get('cancelled', False)
+        result.reason = data.get('reason', '')
+        return result
 
 
 class TaskExecutor:
     """任务执行管理器"""
     
-    def __init__(self):
+    def __init__(self, max_retries: int = 0, verify: bool = True,
+                 executors: Optional[ExecutorRegistry] = None,
+                 privileges: Optional[PrivilegeProvider] = None,
+                 throttle: Optional[ResourceThrottle] = None):
+        """
+        初始化执行管理器
+
+        Args:
+            max_retries: 任务失败后的最大重试次数
+            verify: 执行结束后是否批量读回状态校验成功的任务
+            executors: 执行器注册表，默认按任务类型延迟加载内置及入口点注册的执行器
+            privileges: 权限来源，默认查询当前进程（每个进程只查询一次）
+            throttle: 资源节流器，None 表示不限流
+        """
         self.logger = logging.getLogger('TaskExecutor')
-        self.executors = {
-            'service': ServiceExecutor(),
-            'registry': RegistryExecutor()
-        }
+        self.max_retries = max_retries
+        self.verify = verify
+        self.executors = executors if executors is not None else ExecutorRegistry()
+        self.preflight = PrivilegePreflight(self.executors, privileges)
+        self.throttle = throttle
     
     def execute_tasks(self, tasks: List[Dict[str, Any]]) -> Dict[str, int]:
         """
@@ -28,31 +140,153 @@ class TaskExecutor:
             Dict[str, int]: 执行统计信息 (success, failed)
         """
         stats = {'success': 0, 'failed': 0}
+        for event in self.iter_execute(tasks):
+            if isinstance(event, RunFinished):
+                stats = {'success': event.success, 'failed': event.failed}
+        return stats
+
+    def iter_execute(self, tasks: List[Dict[str, Any]],
+                     token: Optional[CancellationToken] = None) -> Iterator[ExecutionEvent]:
+        """
+        执行一系列任务，并在任务完成时逐个产出事件
         
-        for task in tasks:
-            task_id = task.get('id', 'unknown')
-            task_type = str(task.get('type', ''))
-            
-            self.logger.info(f"正在执行任务: {task_id} ({task_type})")
-            
-            executor = self.executors.get(task_type)
+        相邻的同类型任务归为一组，整组交给执行器的 execute_batch，
+        以便 netsh 等执行器把多个任务合并为一次进程调用；不同类型之间保持
+        配置中的先后顺序，不跨类型重排。UI 日志、CLI 输出和
+        指标导出均应消费此事件流，而不是自行遍历执行器。
+        
+        取消令牌被触发（或到达截止时间）后，尚未开始的任务以 TaskSkipped 结束，
+        正在运行的外部命令由执行器终止。全部完成后对成功的任务做一次批量状态
+        校验，逐个产出 TaskVerified。
 
-            if not executor:
-                self.logger.error(f"未找到类型为 {task_type} 的执行器")
-                stats['failed'] += 1
-                continue
-            
-            try:
-                success = executor.execute(task)
-                if success:
-                    stats['success'] += 1
-                else:
-                    stats['failed'] += 1
-            except Exception as e:
-                self.logger.error(f"任务 {task_id} 执行出错: {e}")
-                stats['failed'] += 1
+        开始前先做权限预检：缺少所需权限时不执行任何任务，全部以 TaskSkipped
+        结束，RunFinished 标记为已中止，提升权限后可按 pending_tasks 续跑。
+        设置了节流器时，执行器启动外部命令与停止服务均受其限制，降低的进程优先级
+        在本轮结束（或事件流被提前关闭）时恢复。
         
-        return stats
+        Args:
+            tasks: 任务列表
+            token: 取消令牌
+            
+        Returns:
+            Iterator[ExecutionEvent]: 执行事件流
+        """
+        run_start = time.perf_counter()
+        success, failed = 0, 0
+        finished = set()
+        succeeded: List[Dict[str, Any]] = []
+        yield RunStarted(total=len(tasks))
+
+        report = self.preflight.check(tasks)
+        if not report.ok:
+            reason = report.describe()
+            for task in tasks:
+                yield task_event(TaskSkipped, task, reason=reason)
+            yield RunFinished(duration=time.perf_counter() - run_start, skipped=len(tasks),
+                              cancelled=True, reason=reason)
+            return
+        if self.throttle is not None:
+            self.throttle.enter()
+        try:
+            for task_type, group in self._group_by_type(tasks):
+                if token is not None and token.is_cancelled:
+                    break
+                yield PhaseStarted(phase=task_type, count=len(group))
+                for task in group:
+                    self.logger.info(f"正在执行任务: {task.get('id', 'unknown')} ({task_type})")
+                    yield task_event(TaskStarted, task)
+
+                executor = self.executors.get(task_type)
+                if not executor:
+                    self.logger.error(f"未找到类型为 {task_type} 的执行器")
+                    for task in group:
+                        failed += 1
+                        finished.add(id(task))
+                        yield task_event(TaskFailed, task, error=f"未找到类型为 {task_type} 的执行器")
+                    continue
+
+                executor.cancel_token = token
+                executor.throttle = self.throttle
+                pending = group
+                attempt = 1
+                while pending:
+                    retry = []
+                    for task, ok, error, duration in self._run_batch(executor, task_type, pending):
+                        if ok:
+                            success += 1
+                            finished.add(id(task))
+                            succeeded.append(task)
+                            yield task_event(TaskSucceeded, task, duration=duration, attempts=attempt)
+                        elif attempt <= self.max_retries and not (token is not None and token.is_cancelled):
+                            retry.append(task)
+                            yield task_event(TaskRetried, task, attempt=attempt, error=error, duration=duration)
+                        else:
+                            failed += 1
+                            finished.add(id(task))
+                            if error:
+                                self.logger.error(f"任务 {task.get('id', 'unknown')} 执行出错: {error}")
+                            yield task_event(TaskFailed, task, error=error, duration=duration, attempts=attempt)
+                    pending = retry
+                    attempt += 1
+
+            cancelled = token is not None and token.is_cancelled
+            reason = token.reason if cancelled else ""
+            skipped = 0
+            for task in tasks:
+                if id(task) not in finished:
+                    skipped += 1
+                    yield task_event(TaskSkipped, task, reason=reason)
+            if cancelled:
+                self.logger.warning(f"执行已中止 ({reason})，跳过 {skipped} 个任务")
+
+            # 执行器返回成功不代表状态已生效（如 sc stop 仅发出请求），统一读回校验
+            drifted = 0
+            if self.verify and succeeded and not cancelled:
+                yield PhaseStarted(phase='verify', count=len(succeeded))
+                for task, drift in TaskVerifier(self.executors).verify(succeeded):
+                    if drift is None:
+                        continue
+                    if drift:
+                        drifted += 1
+                        self.logger.warning(f"任务 {task.get('id', 'unknown')} 状态偏差: {'; '.join(drift)}")
+                    yield task_event(TaskVerified, task, drift=drift)
+
+            if self.throttle is not None:
+                self.logger.info(f"节流统计: {self.throttle.summary()}")
+            yield RunFinished(
+                success=success, failed=failed, duration=time.perf_counter() - run_start,
+                skipped=skipped, cancelled=cancelled, reason=reason, drifted=drifted
+            )
+        finally:
+            if self.throttle is not None:
+                self.throttle.exit()
+
+    def _run_batch(self, executor, task_type: str, group: List[Dict[str, Any]]):
+        """
+        调用执行器的 execute_batch；批量执行中断时，尚未产出结果的任务均计为失败
+        """
+        done = set()
+        try:
+            for result in executor.execute_batch(group):
+                done.add(id(result.task))
+                yield result
+        except Exception as e:
+            self.logger.error(f"{task_type} 类型任务批量执行出错: {e}")
+            for task in group:
+                if id(task) not in done:
+                    yield BatchResult(task, False, str(e), 0.0)
+
+    @staticmethod
+    def _group_by_type(tasks: List[Dict[str, Any]]) -> List[Tuple[str, List[Dict[str, Any]]]]:
+        """把连续的同类型任务归为一组，组的顺序与任务原顺序一致"""
+        groups: List[Tuple[str, List[Dict[str, Any]]]] = []
+        for task in tasks:
+            task_type = str(task.get('type', ''))
+            if groups and groups[-1][0] == task_type:
+                groups[-1][1].append(task)
+            else:
+                groups.append((task_type, [task]))
+        return groups
 
     def rollback_tasks(self, tasks: List[Dict[str, Any]]) -> Dict[str, int]:
         """
@@ -60,33 +294,43 @@ class TaskExecutor:
         
         Args:
             tasks: 任务列表
-            
+                
         Returns:
             Dict[str, int]: 执行统计信息 (success, failed)
         """
         stats = {'success': 0, 'failed': 0}
-        
-        for task in tasks:
-            task_id = task.get('id', 'unknown')
-            task_type = str(task.get('type', ''))
-            
-            self.logger.info(f"正在回滚任务: {task_id} ({task_type})")
-            
-            executor = self.executors.get(task_type)
+        report = self.preflight.check(tasks)
+        if not report.ok:
+            self.logger.error(f"回滚已中止 ({report.describe()})，{len(tasks)} 个任务未回滚")
+            stats['failed'] = len(tasks)
+            return stats
+        if self.throttle is not None:
+            self.throttle.enter()
+        try:
+            for task in tasks:
+                task_id = task.get('id', 'unknown')
+                task_type = str(task.get('type', ''))
+                
+                self.logger.info(f"正在回滚任务: {task_id} ({task_type})")
+                
+                executor = self.executors.get(task_type)
 
-            if not executor:
-                self.logger.error(f"未找到类型为 {task_type} 的执行器")
-                stats['failed'] += 1
-                continue
-            
-            try:
-                success = executor.rollback(task)
-                if success:
-                    stats['success'] += 1
-                else:
+                if not executor:
+                    self.logger.error(f"未找到类型为 {task_type} 的执行器")
                     stats['failed'] += 1
-            except Exception as e:
-                self.logger.error(f"任务 {task_id} 回滚出错: {e}")
-                stats['failed'] += 1
-        
+                    continue
+                
+                executor.throttle = self.throttle
+                try:
+                    success = executor.rollback(task)
+                    if success:
+                        stats['success'] += 1
+                    else:
+                        stats['failed'] += 1
+                except Exception as e:
+                    self.logger.error(f"任务 {task_id} 回滚出错: {e}")
+                    stats['failed'] += 1
+        finally:
+            if self.throttle is not None:
+                self.throttle.exit()
         return stats
@@ -0,0 +1,138 @@
+"""
+执行器注册表
+"""
+import importlib
+import logging
+import time
+from typing import Any, Callable, Dict, Iterator, Mapping, Optional, Union
+
+from executors.base_executor import BaseExecutor
+
+# 第三方执行器通过此入口点组注册，名称为任务类型，值为 "模块:类"
+ENTRY_POINT_GROUP = 'win10_optimize.executors'
+
+# 内置执行器：任务类型 -> "模块:类"，首次用到该类型时才导入
+BUILTIN_EXECUTORS = {
+    'service': 'executors.service_executor:ServiceExecutor',
+    'registry': 'executors.registry_executor:RegistryExecutor',
+    'network': 'executors.network_executor:NetworkExecutor',
+}
+
+
+class ExecutorRegistry(Mapping[str, BaseExecutor]):
+    """
+    按任务类型延迟加载执行器
+
+    实现只读 Mapping 接口，可直接替代原先的 {类型: 执行器} 字典：取值时才导入
+    模块并实例化，实例被缓存；遍历和 `in` 只查看已知类型，不会触发导入。
+    导入与实例化耗时记录在 load_stats 中。
+    """
+
+    def __init__(self, targets: Optional[Dict[str, Union[str, Callable[[], BaseExecutor]]]] = None,
+                 discover: bool = True):
+        """
+        初始化注册表
+
+        Args:
+            targets: 任务类型 -> "模块:类" 或可调用对象，默认使用内置执行器
+            discover: 是否从入口点发现第三方执行器
+        """
+        self.logger = logging.getLogger('ExecutorRegistry')
+        self._targets: Dict[str, Union[str, Callable[[], BaseExecutor]]] = dict(
+            BUILTIN_EXECUTORS if targets is None else targets
+        )
+        self._instances: Dict[str, BaseExecutor] = {}
+        # 加载失败的类型不再重复尝试，直到重新注册
+        self._failed: Dict[str, str] = {}
+        self._discover = discover
+        self._discovered = False
+        # 任务类型 -> {'import': 秒, 'init': 秒}
+        self.load_stats: Dict[str, Dict[str, float]] = {}
+
+    def register(self, task_type: str, target: Union[str, Callable[[], BaseExecutor]]):
+        """
+        注册执行器，覆盖同类型的已有注册
+
+        Args:
+            task_type: 任务类型
+            target: "模块:类" 或返回执行器实例的可调用对象（类本身即可）
+        """
+        self._targets[task_type] = target
+        self._instances.pop(task_type, None)
+        self._failed.pop(task_type, None)
+
+    def _discover_entry_points(self):
+        """读取入口点，内置与显式注册的类型优先"""
+        if self._discovered or not self._discover:
+            return
+        self._discovered = True
+        try:
+            from importlib.metadata import entry_points
+            found = entry_points()
+            if hasattr(found, 'select'):
+                found = found.select(group=ENTRY_POINT_GROUP)
+            else:
+                found = found.get(ENTRY_POINT_GROUP, [])
+        except Exception as e:
+            self.logger.warning(f"读取执行器入口点失败: {e}")
+            return
+        for entry_point in found:
+            self._targets.setdefault(entry_point.name, entry_point.value)
+
+    def _resolve(self, task_type: str) -> Optional[BaseExecutor]:
+        """导入并实例化执行器，失败时返回 None"""
+        if task_type in self._failed:
+            return None
+        target = self._targets.get(task_type)
+        if target is None:
+            self._discover_entry_points()
+            target = self._targets.get(task_type)
+            if target is None:
+                return None
+
+        start = time.perf_counter()
+        try:
+            if isinstance(target, str):
+                module_name, _, attr = target.partition(':')
+                factory = importlib.import_module(module_name)
+                for part in attr.split('.'):
+                    factory = getattr(factory, part)
+            else:
+                factory = target
+            imported = time.perf_counter()
+            instance = factory()
+        except Exception as e:
+            self.logger.error(f"加载 {task_type} 执行器失败: {e}")
+            self._failed[task_type] = str(e)
+            return None
+        finished = time.perf_counter()
+
+        self.load_stats[task_type] = {'import': imported - start, 'init': finished - imported}
+        self.logger.debug(f"已加载 {task_type} 执行器 (导入 {imported - start:.3f}s, 初始化 {finished - imported:.3f}s)")
+        return instance
+
+    def __getitem__(self, task_type: str) -> BaseExecutor:
+        instance = self._instances.get(task_type)
+        if instance is None:
+            instance = self._resolve(task_type)
+            if instance is None:
+                raise KeyError(task_type)
+            self._instances[task_type] = instance
+        return instance
+
+    def __contains__(self, task_type: object) -> bool:
+        if task_type not in self._targets:
+            self._discover_entry_points()
+        return task_type in self._targets
+
+    def __iter__(self) -> Iterator[str]:
+        self._discover_entry_points()
+        return iter(list(self._targets))
+
+    def __len__(self) -> int:
+        self._discover_entry_points()
+        return len(self._targets)
+
+    def loaded(self) -> Dict[str, Any]:
+        """已实例化的执行器"""
+        return dict(self._instances)
@@ -0,0 +1,435 @@
+"""
+机群结果汇总：流式合并多台主机的执行报告
+"""
+import gzip
+import heapq
+import json
+import logging
+import math
+import os
+from typing import Any, Dict, IO, Iterable, Iterator, List, Optional, Set, Tuple
+
+from core.events import (
+    ExecutionEvent, RunFinished, TaskFailed, TaskRetried, TaskSkipped, TaskSucceeded, TaskVerified,
+    event_from_dict
+)
+
+# 目录中按扩展名识别的报告文件
+REPORT_SUFFIXES = ('.jsonl', '.jsonl.gz', '.json', '.json.gz')
+
+
+class TDigest:
+    """
+    t-digest 分位数草图（合并式）
+
+    以有限个质心近似数值分布，质心数不超过约 2 × compression，与样本数无关；
+    两端的质心更小，p99 等尾部分位数比中位数更精确。多个草图可直接合并。
+    """
+
+    # 缓冲区达到 compression 的该倍数时合并一次
+    BUFFER_FACTOR = 5
+
+    def __init__(self, compression: float = 100.0):
+        """
+        初始化草图
+
+        Args:
+            compression: 压缩参数，越大越精确、占用越多
+        """
+        self.compression = compression
+        self._centroids: List[Tuple[float, float]] = []
+        self._buffer: List[Tuple[float, float]] = []
+        self.count = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float, weight: float = 1.0):
+        """加入一个样本"""
+        self._buffer.append((value, weight))
+        self.count += weight
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if len(self._buffer) >= self.BUFFER_FACTOR * self.compression:
+            self._compress()
+
+    def merge(self, other: 'TDigest'):
+        """并入另一个草图"""
+        other._compress()
+        for mean, weight in other._centroids:
+            self._buffer.append((mean, weight))
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+
+    def _q_limit(self, q: float) -> float:
+        """从累计比例 q 开始的质心最多能覆盖到的累计比例 (k1 尺度函数)"""
+        k = self.compression / (2 * math.pi) * math.asin(2 * q - 1) + 1
+        if k >= self.compression / 4:
+            return 1.0
+        return (1 + math.sin(2 * math.pi * k / self.compression)) / 2
+
+    def _compress(self):
+        if not self._buffer:
+            return
+        points = sorted(self._centroids + self._buffer)
+        self._buffer = []
+        total = sum(weight for _, weight in points)
+        merged = []
+        before = 0.0
+        limit = total * self._q_limit(0.0)
+        mean, weight = points[0]
+        for point_mean, point_weight in points[1:]:
+            if before + weight + point_weight <= limit:
+                weight += point_weight
+                mean += (point_mean - mean) * point_weight / weight
+            else:
+                merged.append((mean, weight))
+                before += weight
+                limit = total * self._q_limit(before / total)
+                mean, weight = point_mean, point_weight
+        merged.append((mean, weight))
+        self._centroids = merged
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        估计分位数
+
+        Args:
+            q: 0-1 之间的比例
+
+        Returns:
+            Optional[float]: 估计值，无样本时为 None
+        """
+        self._compress()
+        centroids = self._centroids
+        if not centroids:
+            return None
+        if len(centroids) == 1:
+            return centroids[0][0]
+        index = min(max(q, 0.0), 1.0) * self.count
+        first_mean, first_weight = centroids[0]
+        if index < first_weight / 2:
+            return self.min + (first_mean - self.min) * index / (first_weight / 2)
+        cumulative = first_weight / 2
+        for (left_mean, left_weight), (right_mean, right_weight) in zip(centroids, centroids[1:]):
+            step = (left_weight + right_weight) / 2
+            if index < cumulative + step:
+                return left_mean + (right_mean - left_mean) * (index - cumulative) / step
+            cumulative += step
+        last_mean, last_weight = centroids[-1]
+        tail = last_weight / 2
+        position = min(index - cumulative, tail)
+        return last_mean + (self.max - last_mean) * position / tail if tail else last_mean
+
+
+class _TaskStats:
+    """单个任务在整个机群上的统计"""
+
+    __slots__ = ('task_type', 'succeeded', 'failed', 'skipped', 'retried', 'drifted', 'durations')
+
+    def __init__(self, compression: float):
+        self.task_type = ''
+        self.succeeded = 0
+        self.failed = 0
+        self.skipped = 0
+        self.retried = 0
+        self.drifted = 0
+        self.durations = TDigest(compression)
+
+
+class _HostReport:
+    """一份报告中单台主机的状态，报告读完后并入汇总并丢弃"""
+
+    __slots__ = ('drifted', 'failed', 'runs', 'cancelled')
+
+    def __init__(self):
+        self.drifted: Set[str] = set()
+        self.failed: Set[str] = set()
+        self.runs = 0
+        self.cancelled = 0
+
+
+class FleetAggregator:
+    """
+    机群结果汇总
+
+    逐行流式读取各主机的报告，增量归约为：
+
+    - 每个任务的成功 / 失败 / 跳过 / 重试 / 漂移次数与失败率
+    - 每个任务的耗时分位数（t-digest，占用与样本数无关）
+    - 主机漂移概况：报告数、存在漂移 / 失败的主机数、漂移任务数分布、漂移最多的若干台主机
+
+    报告格式与 TaskExecutor 的输出一致：``apply --json`` / ``watch --json`` 输出的事件流
+    (JSON Lines，每行为 ExecutionEvent.to_dict() 加 host 字段)，或 ``--state-file``
+    保存的 RunResult；文件可用 gzip 压缩。内存占用只与任务数和 top_hosts 有关，
+    与主机数和文件数无关。同一文件中每一段连续的同一主机事件计为一份报告：
+    拼接文件应按主机依次写入，同一主机的事件若被其他主机隔开会计为多份报告。
+    """
+
+    def __init__(self, top_hosts: int = 20, compression: float = 100.0):
+        """
+        初始化汇总器
+
+        Args:
+            top_hosts: 保留漂移任务数最多的主机数
+            compression: 耗时草图的压缩参数
+        """
+        self.logger = logging.getLogger('FleetAggregator')
+        self.top_hosts = top_hosts
+        self.compression = compression
+        self.tasks: Dict[str, _TaskStats] = {}
+        self.files = 0
+        self.records = 0
+        self.invalid_records = 0
+        self.reports = 0
+        self.runs = 0
+        self.cancelled_runs = 0
+        self.hosts_with_drift = 0
+        self.hosts_with_failures = 0
+        # 漂移任务数 -> 主机数
+        self.drift_histogram: Dict[int, int] = {}
+        # (漂移任务数, 主机) 的小顶堆，只保留最多的 top_hosts 个
+        self._top: List[Tuple[int, str]] = []
+
+    def _task(self, task_id: str, task_type: str = '') -> _TaskStats:
+        stats = self.tasks.get(task_id)
+        if stats is None:
+            stats = self.tasks[task_id] = _TaskStats(self.compression)
+        if task_type:
+            stats.task_type = task_type
+        return stats
+
+    @staticmethod
+    def iter_paths(paths: Iterable[str]) -> Iterator[str]:
+        """展开目录（递归查找报告文件），文件按原样产出"""
+        for path in paths:
+            if not os.path.isdir(path):
+                yield path
+                continue
+            for directory, _, names in os.walk(path):
+                for name in sorted(names):
+                    if name.lower().endswith(REPORT_SUFFIXES):
+                        yield os.path.join(directory, name)
+
+    @staticmethod
+    def _open(path: str) -> IO[str]:
+        """打开报告文件，按文件头识别 gzip"""
+        with open(path, 'rb') as f:
+            compressed = f.read(2) == b'\x1f\x8b'
+        if compressed:
+            return gzip.open(path, 'rt', encoding='utf-8')
+        return open(path, 'r', encoding='utf-8')
+
+    def add_paths(self, paths: Iterable[str]) -> int:
+        """
+        汇总多个报告文件或目录
+
+        Args:
+            paths: 文件或目录路径
+
+        Returns:
+            int: 成功读取的文件数
+        """
+        count = 0
+        for path in self.iter_paths(paths):
+            try:
+                self.add_file(path)
+                count += 1
+            except (OSError, ValueError, EOFError) as e:
+                self.logger.warning(f"跳过报告 {path}: {e}")
+        return count
+
+    def add_file(self, path: str):
+        """
+        汇总一个报告文件
+
+        首个非空行是执行事件时按事件流逐行读取，否则按 RunResult 文件整体读取
+        （此时以文件名作为主机名）。
+
+        Args:
+            path: 报告路径
+
+        Raises:
+            OSError: 无法读取
+            ValueError: 不是可识别的报告
+        """
+        with self._open(path) as f:
+            first = ''
+            for line in f:
+                if line.strip():
+                    first = line
+                    break
+            try:
+                record = json.loads(first) if first else None
+            except ValueError:
+                record = None
+            if isinstance(record, dict) and 'event' in record:
+                self._add_events(record, f, self._default_host(path))
+                self.files += 1
+                return
+        with self._open(path) as f:
+            data = json.load(f)
+        if not isinstance(data, dict) or not {'succeeded', 'failed'} <= set(data):
+            raise ValueError("不是执行事件流或执行结果文件")
+        self._add_result(data, self._default_host(path))
+        self.files += 1
+
+    @staticmethod
+    def _default_host(path: str) -> str:
+        name = os.path.basename(path)
+        for suffix in sorted(REPORT_SUFFIXES, key=len, reverse=True):
+            if name.lower().endswith(suffix):
+                return name[:-len(suffix)]
+        return name
+
+    def _add_events(self, first: Dict[str, Any], lines: Iterable[str], default_host: str):
+        """
+        逐行读取事件流
+
+        同一主机的事件在流中是连续的：host 字段变化时上一台主机的报告即已完整，
+        立即并入汇总，内存中始终只保留一台主机的状态。
+        """
+        host: Optional[str] = None
+        report: Optional[_HostReport] = None
+        for record in self._iter_records(first, lines):
+            fields = dict(record)
+            record_host = str(fields.pop('host', '') or default_host)
+            try:
+                event = event_from_dict(fields)
+            except (TypeError, ValueError):
+                self.invalid_records += 1
+                continue
+            if record_host != host:
+                if report is not None:
+                    self._finish_report(host, report)
+                host, report = record_host, _HostReport()
+            self.observe(event, report)
+        if report is not None:
+            self._finish_report(host, report)
+
+    def _iter_records(self, first: Dict[str, Any], lines: Iterable[str]) -> Iterator[Dict[str, Any]]:
+        """产出首条记录及其后各行解析出的记录，无法解析的行计入 invalid_records"""
+        yield first
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                self.invalid_records += 1
+                continue
+            if isinstance(record, dict):
+                yield record
+            else:
+                self.invalid_records += 1
+
+    def observe(self, event: ExecutionEvent, report: _HostReport):
+        """
+        消费一个执行事件
+
+        Args:
+            event: 执行事件
+            report: 事件所属主机当前报告的状态
+        """
+        self.records += 1
+
+        if isinstance(event, TaskSucceeded):
+            stats = self._task(event.task_id, event.task_type)
+            stats.succeeded += 1
+            stats.durations.add(event.duration)
+        elif isinstance(event, TaskFailed):
+            stats = self._task(event.task_id, event.task_type)
+            stats.failed += 1
+            stats.durations.add(event.duration)
+            report.failed.add(event.task_id)
+        elif isinstance(event, TaskRetried):
+            self._task(event.task_id, event.task_type).retried += 1
+        elif isinstance(event, TaskSkipped):
+            self._task(event.task_id, event.task_type).skipped += 1
+        elif isinstance(event, TaskVerified) and not event.in_sync:
+            self._task(event.task_id, event.task_type).drifted += 1
+            report.drifted.add(event.task_id)
+        elif isinstance(event, RunFinished):
+            report.runs += 1
+            report.cancelled += int(event.cancelled)
+
+    def _add_result(self, data: Dict[str, Any], host: str):
+        """汇总 RunResult.to_dict() 格式的结果（不含耗时）"""
+        report = _HostReport()
+        for key in ('succeeded', 'failed', 'skipped'):
+            for task in data.get(key, []):
+                task_id = str(task.get('id', 'unknown'))
+                stats = self._task(task_id, str(task.get('type', '')))
+                setattr(stats, key, getattr(stats, key) + 1)
+                if key == 'failed':
+                    report.failed.add(task_id)
+        for task_id in data.get('drifted', []):
+            self._task(str(task_id)).drifted += 1
+            report.drifted.add(str(task_id))
+        report.runs = 1
+        report.cancelled = int(bool(data.get('cancelled')))
+        self.records += 1
+        self._finish_report(host, report)
+
+    def _finish_report(self, host: str, report: _HostReport):
+        """一份主机报告读完后并入主机概况"""
+        self.reports += 1
+        self.runs += report.runs
+        self.cancelled_runs += report.cancelled
+        drifted = len(report.drifted)
+        self.drift_histogram[drifted] = self.drift_histogram.get(drifted, 0) + 1
+        if report.failed:
+            self.hosts_with_failures += 1
+        if not drifted:
+            return
+        self.hosts_with_drift += 1
+        if len(self._top) < self.top_hosts:
+            heapq.heappush(self._top, (drifted, host))
+        elif self._top and (drifted, host) > self._top[0]:
+            heapq.heapreplace(self._top, (drifted, host))
+
+    def task_summary(self) -> List[Dict[str, Any]]:
+        """各任务的统计，按失败率、失败次数降序"""
+        rows = []
+        for task_id, stats in self.tasks.items():
+            finished = stats.succeeded + stats.failed
+            rows.append({
+                'task_id': task_id,
+                'task_type': stats.task_type,
+                'succeeded': stats.succeeded,
+                'failed': stats.failed,
+                'skipped': stats.skipped,
+                'retried': stats.retried,
+                'drifted': stats.drifted,
+                'failure_rate': stats.failed / finished if finished else 0.0,
+                'p50': stats.durations.quantile(0.5),
+                'p90': stats.durations.quantile(0.9),
+                'p99': stats.durations.quantile(0.99),
+                'max': stats.durations.max if stats.durations.count else None,
+            })
+        rows.sort(key=lambda row: (-row['failure_rate'], -row['failed'], row['task_id']))
+        return rows
+
+    def host_summary(self) -> Dict[str, Any]:
+        """主机漂移概况"""
+        return {
+            'reports': self.reports,
+            'runs': self.runs,
+            'cancelled_runs': self.cancelled_runs,
+            'hosts_with_drift': self.hosts_with_drift,
+            'hosts_with_failures': self.hosts_with_failures,
+            'drift_histogram': dict(sorted(self.drift_histogram.items())),
+            'top_drifted': [{'host': host, 'drifted': drifted}
+                            for drifted, host in sorted(self._top, reverse=True)],
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """完整汇总结果"""
+        return {
+            'files': self.files,
+            'records': self.records,
+            'invalid_records': self.invalid_records,
+            'hosts': self.host_summary(),
+            'tasks': self.task_summary(),
+        }
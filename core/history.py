@@ -0,0 +1,213 @@
+"""
+执行历史存储 (SQLite)
+"""
+import logging
+import os
+import platform
+import sqlite3
+import time
+from typing import Any, Dict, List, Optional, Set
+
+from core.events import (
+    ExecutionEvent, RunFinished, RunStarted, TaskFailed, TaskRetried, TaskSkipped, TaskSucceeded, TaskVerified
+)
+
+
+class RunHistory:
+    """
+    执行历史
+
+    作为事件流的消费者之一，在内存中缓存一轮执行的任务结果，收到 RunFinished
+    后在单个事务中批量写入。runs 记录每轮汇总，tasks 记录每个任务的最终结果，
+    durations 记录每次尝试（含重试）的耗时。
+
+    两轮执行之间收到的漂移校验（如 DriftWatcher 在重新应用前的检测结果）
+    暂存下来，计入下一轮执行中对应任务的 drifted。
+    """
+
+    DEFAULT_PATH = os.path.join('logs', 'history.db')
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS runs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            host TEXT NOT NULL,
+            started_at REAL NOT NULL,
+            finished_at REAL NOT NULL,
+            duration REAL NOT NULL,
+            success INTEGER NOT NULL,
+            failed INTEGER NOT NULL,
+            skipped INTEGER NOT NULL,
+            drifted INTEGER NOT NULL,
+            cancelled INTEGER NOT NULL,
+            reason TEXT
+        );
+        CREATE TABLE IF NOT EXISTS tasks (
+            run_id INTEGER NOT NULL REFERENCES runs(id),
+            task_id TEXT NOT NULL,
+            task_type TEXT NOT NULL,
+            description TEXT,
+            status TEXT NOT NULL,
+            attempts INTEGER NOT NULL,
+            drifted INTEGER NOT NULL DEFAULT 0,
+            error TEXT,
+            timestamp REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS durations (
+            run_id INTEGER NOT NULL REFERENCES runs(id),
+            task_id TEXT NOT NULL,
+            attempt INTEGER NOT NULL,
+            duration REAL NOT NULL,
+            ok INTEGER NOT NULL,
+            timestamp REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_runs_started_at ON runs(started_at);
+        CREATE INDEX IF NOT EXISTS idx_tasks_task_id ON tasks(task_id, timestamp);
+        CREATE INDEX IF NOT EXISTS idx_tasks_timestamp ON tasks(timestamp);
+        CREATE INDEX IF NOT EXISTS idx_durations_task_id ON durations(task_id, timestamp);
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH, host: Optional[str] = None):
+        """
+        初始化执行历史
+
+        Args:
+            path: 数据库文件路径
+            host: 主机名，默认取本机名
+        """
+        self.logger = logging.getLogger('RunHistory')
+        self.path = path
+        self.host = host or platform.node()
+        self._in_run = False
+        # 不在执行中时收到的漂移任务 id，计入下一轮
+        self._pending_drift: Set[str] = set()
+        self._reset()
+
+    def _reset(self, drifted: Optional[Set[str]] = None):
+        self._started_at = time.time()
+        self._tasks: Dict[str, Dict[str, Any]] = {}
+        self._durations: List[tuple] = []
+        self._drifted_before: Set[str] = drifted or set()
+
+    def _connect(self) -> sqlite3.Connection:
+        """打开数据库并确保表结构存在"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path)
+        conn.executescript(self.SCHEMA)
+        return conn
+
+    def observe(self, event: ExecutionEvent):
+        """
+        消费一个执行事件
+
+        Args:
+            event: 执行事件
+        """
+        if isinstance(event, RunStarted):
+            self._reset(self._pending_drift)
+            self._pending_drift = set()
+            self._in_run = True
+            self._started_at = event.timestamp
+        elif isinstance(event, (TaskSucceeded, TaskFailed, TaskSkipped)):
+            status = {TaskSucceeded: 'succeeded', TaskFailed: 'failed', TaskSkipped: 'skipped'}[type(event)]
+            attempts = getattr(event, 'attempts', 0)
+            self._tasks[event.task_id] = {
+                'task_type': event.task_type, 'description': event.description, 'status': status,
+                'attempts': attempts, 'drifted': int(event.task_id in self._drifted_before),
+                'error': getattr(event, 'error', None),
+                'timestamp': event.timestamp,
+            }
+            if status != 'skipped':
+                self._durations.append((event.task_id, attempts, event.duration, int(status == 'succeeded'), event.timestamp))
+        elif isinstance(event, TaskRetried):
+            self._durations.append((event.task_id, event.attempt, event.duration, 0, event.timestamp))
+        elif isinstance(event, TaskVerified) and not event.in_sync:
+            if not self._in_run:
+                self._pending_drift.add(event.task_id)
+            elif event.task_id in self._tasks:
+                self._tasks[event.task_id]['drifted'] = 1
+        elif isinstance(event, RunFinished):
+            try:
+                self._write(event)
+            except sqlite3.Error as e:
+                self.logger.error(f"写入执行历史失败: {e}")
+            self._in_run = False
+            self._reset()
+
+    def _write(self, finished: RunFinished):
+        """在单个事务中写入一轮执行"""
+        conn = self._connect()
+        try:
+            with conn:
+                cursor = conn.execute(
+                    "INSERT INTO runs (host, started_at, finished_at, duration, success, failed, skipped, "
+                    "drifted, cancelled, reason) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (self.host, self._started_at, finished.timestamp, finished.duration, finished.success,
+                     finished.failed, finished.skipped, finished.drifted, int(finished.cancelled), finished.reason)
+                )
+                run_id = cursor.lastrowid
+                conn.executemany(
+                    "INSERT INTO tasks (run_id, task_id, task_type, description, status, attempts, drifted, "
+                    "error, timestamp) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(run_id, task_id, t['task_type'], t['description'], t['status'], t['attempts'],
+                      t['drifted'], t['error'], t['timestamp']) for task_id, t in self._tasks.items()]
+                )
+                conn.executemany(
+                    "INSERT INTO durations (run_id, task_id, attempt, duration, ok, timestamp) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    [(run_id,) + row for row in self._durations]
+                )
+        finally:
+            conn.close()
+
+    def _query(self, sql: str, params: tuple) -> List[Dict[str, Any]]:
+        if not os.path.exists(self.path):
+            return []
+        conn = self._connect()
+        try:
+            conn.row_factory = sqlite3.Row
+            return [dict(row) for row in conn.execute(sql, params)]
+        finally:
+            conn.close()
+
+    def slow_tasks(self, limit: int = 10, since: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        按平均耗时统计最慢的任务（仅成功的尝试）
+
+        Args:
+            limit: 返回条数
+            since: 起始时间戳，None 表示全部历史
+
+        Returns:
+            List[Dict]: task_id, count, avg_duration, max_duration
+        """
+        return self._query(
+            "SELECT task_id, COUNT(*) AS count, AVG(duration) AS avg_duration, MAX(duration) AS max_duration "
+            "FROM durations WHERE ok = 1 AND timestamp >= ? "
+            "GROUP BY task_id ORDER BY avg_duration DESC LIMIT ?",
+            (since or 0, limit)
+        )
+
+    def failure_rates(self, limit: int = 10, since: Optional[float] = None,
+                      min_runs: int = 1) -> List[Dict[str, Any]]:
+        """
+        统计失败率最高的任务（不计被跳过的执行）
+
+        Args:
+            limit: 返回条数
+            since: 起始时间戳，None 表示全部历史
+            min_runs: 至少执行过的次数
+
+        Returns:
+            List[Dict]: task_id, description, runs, failures, drifted, failure_rate
+        """
+        return self._query(
+            "SELECT task_id, MAX(description) AS description, COUNT(*) AS runs, "
+            "SUM(status = 'failed') AS failures, SUM(drifted) AS drifted, "
+            "CAST(SUM(status = 'failed') AS REAL) / COUNT(*) AS failure_rate "
+            "FROM tasks WHERE status != 'skipped' AND timestamp >= ? "
+            "GROUP BY task_id HAVING runs >= ? "
+            "ORDER BY failure_rate DESC, failures DESC LIMIT ?",
+            (since or 0, min_runs, limit)
+        )
@@ -0,0 +1,153 @@
+"""
+主机事实采集
+"""
+import ctypes
+import hashlib
+import json
+import logging
+import os
+import platform
+import sys
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from utils.command_runner import decode_output, run_command
+
+
+class _MemoryStatusEx(ctypes.Structure):
+    """MEMORYSTATUSEX 结构体"""
+    _fields_ = [
+        ('dwLength', ctypes.c_ulong),
+        ('dwMemoryLoad', ctypes.c_ulong),
+        ('ullTotalPhys', ctypes.c_ulonglong),
+        ('ullAvailPhys', ctypes.c_ulonglong),
+        ('ullTotalPageFile', ctypes.c_ulonglong),
+        ('ullAvailPageFile', ctypes.c_ulonglong),
+        ('ullTotalVirtual', ctypes.c_ulonglong),
+        ('ullAvailVirtual', ctypes.c_ulonglong),
+        ('ullAvailExtendedVirtual', ctypes.c_ulonglong),
+    ]
+
+
+class HostFacts:
+    """
+    主机事实快照
+
+    每项事实在首次访问时采集一次并缓存，条件判断只读取缓存值。除系统盘介质类型
+    需要一次 PowerShell 调用外，其余事实均通过 API/注册表读取，不启动子进程。
+
+    事实名:
+        ram_gb: 物理内存 (GB)
+        os_build: 系统内部版本号，如 19045
+        os_release: 系统版本，如 '10'
+        services: 已安装服务名集合（小写）
+        disk: 系统盘介质类型 'ssd' / 'hdd' / 'unknown'
+    """
+
+    FACT_NAMES = ('ram_gb', 'os_build', 'os_release', 'services', 'disk')
+
+    DISK_COMMAND = ('powershell -NoProfile -Command '
+                    '"(Get-Partition -DriveLetter $env:SystemDrive[0] | Get-Disk | Get-PhysicalDisk).MediaType"')
+
+    def __init__(self, values: Optional[Dict[str, Any]] = None):
+        """
+        初始化事实快照
+
+        Args:
+            values: 预置的事实值（用于测试或从缓存恢复），其余事实按需采集
+        """
+        self.logger = logging.getLogger('HostFacts')
+        self._values: Dict[str, Any] = dict(values or {})
+        if isinstance(self._values.get('services'), list):
+            self._values['services'] = frozenset(self._values['services'])
+        self._providers: Dict[str, Callable[[], Any]] = {
+            'ram_gb': self._read_ram_gb,
+            'os_build': self._read_os_build,
+            'os_release': platform.release,
+            'services': self._read_services,
+            'disk': self._read_disk_type,
+        }
+
+    def get(self, name: str) -> Any:
+        """
+        获取事实值，首次访问时采集
+
+        Args:
+            name: 事实名
+
+        Returns:
+            Any: 事实值，采集失败时为 None
+        """
+        if name not in self._values:
+            provider = self._providers.get(name)
+            if provider is None:
+                raise KeyError(f"未知的主机事实: {name}")
+            try:
+                self._values[name] = provider()
+            except Exception as e:
+                self.logger.warning(f"采集主机事实 {name} 失败: {e}")
+                self._values[name] = None
+        return self._values[name]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """已采集的事实（services 转为排序列表，便于序列化）"""
+        return {name: sorted(value) if isinstance(value, frozenset) else value
+                for name, value in self._values.items()}
+
+    def fingerprint(self, names: Iterable[str]) -> str:
+        """
+        指定事实的指纹，事实相同的主机指纹相同
+
+        只采集 names 中的事实；services 来自一次注册表枚举，其余多为系统 API 调用。
+
+        Args:
+            names: 事实名
+
+        Returns:
+            str: 十六进制 SHA-256
+        """
+        values = []
+        for name in sorted(set(names)):
+            value = self.get(name)
+            values.append([name, sorted(value) if isinstance(value, frozenset) else value])
+        return hashlib.sha256(json.dumps(values, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _read_ram_gb() -> Optional[float]:
+        if sys.platform != 'win32':
+            return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') / (1024 ** 3)
+        status = _MemoryStatusEx()
+        status.dwLength = ctypes.sizeof(status)
+        if not ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+            return None
+        return status.ullTotalPhys / (1024 ** 3)
+
+    @staticmethod
+    def _read_os_build() -> Optional[int]:
+        if sys.platform == 'win32':
+            return sys.getwindowsversion().build
+        return None
+
+    @staticmethod
+    def _read_services() -> frozenset:
+        """枚举注册表中的服务键，无需调用 sc / wmic"""
+        import winreg
+        names = set()
+        with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, r"SYSTEM\CurrentControlSet\Services") as key:
+            index = 0
+            while True:
+                try:
+                    name = winreg.EnumKey(key, index)
+                except OSError:
+                    break
+                names.add(name.lower())
+                index += 1
+        return frozenset(names)
+
+    def _read_disk_type(self) -> str:
+        result = run_command(self.DISK_COMMAND, timeout=15)
+        media = decode_output(result.stdout).strip().lower()
+        if 'ssd' in media:
+            return 'ssd'
+        if 'hdd' in media:
+            return 'hdd'
+        return 'unknown'
@@ -0,0 +1,97 @@
+"""
+执行指标收集与导出
+"""
+import json
+import os
+from typing import Any, Dict
+
+from core.events import (
+    ExecutionEvent, RunFinished, TaskFailed, TaskRetried, TaskSkipped, TaskSucceeded, TaskVerified
+)
+
+
+class MetricsCollector:
+    """
+    执行指标收集器
+
+    作为事件流的消费者之一，按任务类型累计成功/失败/重试次数和耗时，
+    可导出为 JSON 或 Prometheus 文本格式 (node_exporter textfile collector)。
+    """
+
+    PREFIX = 'win10_optimize'
+
+    def __init__(self):
+        self.by_type: Dict[str, Dict[str, float]] = {}
+        self.run_duration = 0.0
+        self.runs = 0
+
+    def _bucket(self, task_type: str) -> Dict[str, float]:
+        return self.by_type.setdefault(task_type or 'unknown', {
+            'succeeded': 0, 'failed': 0, 'retried': 0, 'skipped': 0, 'drifted': 0, 'duration_sum': 0.0, 'duration_count': 0,
+        })
+
+    def observe(self, event: ExecutionEvent):
+        """
+        消费一个执行事件
+
+        Args:
+            event: 执行事件
+        """
+        if isinstance(event, TaskSucceeded):
+            bucket = self._bucket(event.task_type)
+            bucket['succeeded'] += 1
+            bucket['duration_sum'] += event.duration
+            bucket['duration_count'] += 1
+        elif isinstance(event, TaskFailed):
+            bucket = self._bucket(event.task_type)
+            bucket['failed'] += 1
+            bucket['duration_sum'] += event.duration
+            bucket['duration_count'] += 1
+        elif isinstance(event, TaskRetried):
+            self._bucket(event.task_type)['retried'] += 1
+        elif isinstance(event, TaskSkipped):
+            self._bucket(event.task_type)['skipped'] += 1
+        elif isinstance(event, TaskVerified) and not event.in_sync:
+            self._bucket(event.task_type)['drifted'] += 1
+        elif isinstance(event, RunFinished):
+            self.runs += 1
+            self.run_duration += event.duration
+
+    def to_dict(self) -> Dict[str, Any]:
+        """导出为字典"""
+        return {
+            'runs': self.runs,
+            'run_duration_seconds': self.run_duration,
+            'tasks': self.by_type,
+        }
+
+    def to_prometheus(self) -> str:
+        """导出为 Prometheus 文本格式"""
+        p = self.PREFIX
+        lines = [
+            f"# TYPE {p}_runs_total counter",
+            f"{p}_runs_total {self.runs}",
+            f"# TYPE {p}_run_duration_seconds_total counter",
+            f"{p}_run_duration_seconds_total {self.run_duration:.6f}",
+            f"# TYPE {p}_tasks_total counter",
+        ]
+        for task_type, bucket in sorted(self.by_type.items()):
+            for status in ('succeeded', 'failed', 'retried', 'skipped', 'drifted'):
+                lines.append(f'{p}_tasks_total{{type="{task_type}",status="{status}"}} {int(bucket[status])}')
+        lines.append(f"# TYPE {p}_task_duration_seconds summary")
+        for task_type, bucket in sorted(self.by_type.items()):
+            lines.append(f'{p}_task_duration_seconds_sum{{type="{task_type}"}} {bucket["duration_sum"]:.6f}')
+            lines.append(f'{p}_task_duration_seconds_count{{type="{task_type}"}} {int(bucket["duration_count"])}')
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str):
+        """
+        写入指标文件，扩展名为 .json 时输出 JSON，否则输出 Prometheus 文本
+
+        采用先写临时文件再替换的方式，避免采集端读到半个文件。
+        """
+        content = json.dumps(self.to_dict(), ensure_ascii=False, indent=2) if path.endswith('.json') else self.to_prometheus()
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
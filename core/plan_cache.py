@@ -0,0 +1,176 @@
+"""
+执行计划缓存：按有效配置哈希与主机事实指纹复用规划结果
+"""
+import hashlib
+import json
+import logging
+import os
+from typing import Any, Callable, Dict, List, Optional
+
+from core.planner import CoalesceRecord, Plan, TaskPlanner
+
+
+class PlanCache:
+    """
+    执行计划缓存
+
+    同一配置在相同镜像的机器上总是得到相同的执行计划。缓存按内容寻址，分两级：
+
+    - 文件名由有效配置的内容哈希与任务选择（分类、任务 id 或预设）决定，文件中
+      记录这份配置的 when 条件引用了哪些主机事实
+    - 文件内按这些事实的指纹保存各自的计划
+
+    命中时只需读取一个缓存文件并采集被引用的事实（服务列表为一次注册表枚举），
+    不再展开分类、求值条件或合并重复目标；配置不含条件时不采集任何事实。
+
+    命中校验就是这次事实采集：规划结果只取决于有效配置、任务选择与 when 条件引用
+    的事实，与目标对象的当前状态无关，因此不调用执行器的 read_state。目标是否已处于
+    期望状态由执行后的 TaskVerifier 批量校验负责；引用的事实（如某服务是否存在）
+    变化时指纹不同，自然不会命中。
+    """
+
+    VERSION = 1
+    # 每个配置 + 选择最多保留的指纹数（不同硬件 / 系统版本的机器）
+    MAX_VARIANTS = 16
+
+    def __init__(self, cache_dir: Optional[str] = "cache", max_entries: int = 256):
+        """
+        初始化缓存
+
+        Args:
+            cache_dir: 缓存目录，None 表示不缓存
+            max_entries: 最多保留的缓存文件数，超出时删除最久未使用的
+        """
+        self.logger = logging.getLogger('PlanCache')
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def entry_key(cls, profile_hash: str, selection: Any) -> str:
+        """
+        缓存文件的键
+
+        Args:
+            profile_hash: 有效配置的内容哈希
+            selection: 任务选择，可 JSON 序列化
+
+        Returns:
+            str: 十六进制 SHA-256
+        """
+        payload = json.dumps([cls.VERSION, profile_hash, selection], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"plan_{key}.json")
+
+    def plan(self, planner: TaskPlanner, profile_hash: str, selection: Any,
+             load_tasks: Callable[[], List[Dict[str, Any]]]) -> Plan:
+        """
+        返回缓存的执行计划，未命中时规划并写入缓存
+
+        Args:
+            planner: 规划器，其主机事实用于计算指纹
+            profile_hash: 有效配置的内容哈希
+            selection: 任务选择（分类、任务 id、预设内容等）
+            load_tasks: 未命中时调用，返回按执行顺序排列的待规划任务
+
+        Returns:
+            Plan: 执行计划
+        """
+        if not self.cache_dir:
+            return planner.plan(load_tasks())
+
+        key = self.entry_key(profile_hash, selection)
+        path = self._entry_path(key)
+        entry = self._load_entry(path)
+        if entry is not None:
+            fingerprint = planner.facts.fingerprint(entry['facts'])
+            cached = entry['plans'].get(fingerprint)
+            if cached is not None:
+                try:
+                    plan = self._decode(cached)
+                except (KeyError, TypeError, ValueError):
+                    plan = None
+                if plan is not None:
+                    self.hits += 1
+                    self._touch(path)
+                    self.logger.info(f"复用缓存的执行计划 ({len(plan.tasks)} 个任务)")
+                    return plan
+
+        self.misses += 1
+        tasks = load_tasks()
+        names = set()
+        for task in tasks:
+            names |= planner.conditions.referenced_facts(task.get('when'))
+        plan = planner.plan(tasks)
+        fingerprint = planner.facts.fingerprint(names)
+
+        if entry is None or set(entry['facts']) != names:
+            entry = {'version': self.VERSION, 'facts': sorted(names), 'plans': {}}
+        plans = entry['plans']
+        plans.pop(fingerprint, None)
+        while len(plans) >= self.MAX_VARIANTS:
+            plans.pop(next(iter(plans)))
+        plans[fingerprint] = self._encode(plan)
+        self._save_entry(path, entry)
+        return plan
+
+    @staticmethod
+    def _encode(plan: Plan) -> Dict[str, Any]:
+        return {
+            'tasks': plan.tasks,
+            'coalesced': [list(record) for record in plan.coalesced],
+            'excluded': [[task, reason] for task, reason in plan.excluded],
+        }
+
+    @staticmethod
+    def _decode(data: Dict[str, Any]) -> Plan:
+        return Plan(
+            tasks=list(data['tasks']),
+            coalesced=[CoalesceRecord(*record) for record in data['coalesced']],
+            excluded=[(task, reason) for task, reason in data['excluded']],
+        )
+
+    def _load_entry(self, path: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if (not isinstance(entry, dict) or entry.get('version') != self.VERSION
+                or not isinstance(entry.get('facts'), list) or not isinstance(entry.get('plans'), dict)):
+            return None
+        return entry
+
+    @staticmethod
+    def _touch(path: str):
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def _save_entry(self, path: str, entry: Dict[str, Any]):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+            self._prune()
+        except OSError as e:
+            self.logger.warning(f"写入执行计划缓存失败: {e}")
+
+    def _prune(self):
+        """缓存文件超出上限时删除最久未使用的"""
+        entries = [os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir)
+                   if name.startswith('plan_') and name.endswith('.json')]
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort(key=os.path.getmtime)
+        for path in entries[:len(entries) - self.max_entries]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -0,0 +1,183 @@
+"""
+执行计划：执行前的任务规范化
+"""
+import copy
+import logging
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from core.conditions import ConditionEngine
+from core.host_facts import HostFacts
+
+# 执行目标：(类型, 对象标识...)，同一目标只应由一个任务负责
+TargetKey = Tuple[str, ...]
+
+
+class CoalesceRecord(NamedTuple):
+    """一次去重/冲突合并的记录"""
+    target: str
+    kept: str
+    dropped: List[str]
+    conflict: bool
+
+
+class Plan(NamedTuple):
+    """规范化后的执行计划"""
+    tasks: List[Dict[str, Any]]
+    coalesced: List[CoalesceRecord]
+    excluded: List[Tuple[Dict[str, Any], str]]
+
+
+class TaskPlanner:
+    """
+    执行前的任务规范化
+
+    不同分类（或合并自不同来源的配置）可能重复操作同一服务或同一注册表值。
+    coalesce 按真实的执行目标去重：
+
+    - 服务：服务名（不区分大小写）
+    - 注册表：根键 + 路径 + 值名（路径与值名不区分大小写），按值粒度处理
+    - 网络：netsh 命令 + 参数名
+
+    优先级规则：同一目标以执行顺序中**最后出现**的任务为准，与后面的分类/配置层
+    覆盖前面的语义一致。注册表与网络任务只移除被覆盖的值，其余值保留；任务的
+    全部目标都被覆盖时整个任务被移除。无法识别目标的任务类型原样保留。
+    """
+
+    def __init__(self, facts: Optional[HostFacts] = None, conditions: Optional[ConditionEngine] = None):
+        """
+        初始化规划器
+
+        Args:
+            facts: 主机事实，默认在首次用到时采集本机
+            conditions: 条件引擎，可在多次规划间共享以复用已编译的条件
+        """
+        self.logger = logging.getLogger('TaskPlanner')
+        self.facts = facts or HostFacts()
+        self.conditions = conditions or ConditionEngine()
+
+    def plan(self, tasks: List[Dict[str, Any]]) -> Plan:
+        """
+        生成执行计划：先按 when 条件排除不适用于本机的任务，再合并重复目标
+
+        Args:
+            tasks: 按执行顺序排列的任务
+
+        Returns:
+            Plan: 执行计划
+        """
+        applicable, excluded = self.conditions.filter(tasks, self.facts)
+        for task, reason in excluded:
+            self.logger.info(f"任务 {task.get('id', 'unknown')} 不适用于本机: {reason}")
+        tasks, records = self.coalesce(applicable)
+        return Plan(tasks, records, excluded)
+
+    @staticmethod
+    def task_targets(task: Dict[str, Any]) -> Optional[List[Tuple[TargetKey, Any]]]:
+        """
+        获取任务的执行目标
+
+        Args:
+            task: 任务配置
+
+        Returns:
+            Optional[List[Tuple[key, desired]]]: 目标标识及期望状态，无法识别时为 None
+        """
+        task_type = str(task.get('type', ''))
+        action = task.get('action', {})
+        if task_type == 'service':
+            name = action.get('service_name')
+            if not name:
+                return None
+            return [(('service', str(name).lower()),
+                     (str(action.get('startup_type', '')).lower(), bool(action.get('stop_service', False))))]
+        if task_type == 'registry':
+            root, path = action.get('root'), action.get('path')
+            if not root or not path:
+                return None
+            key_path = str(path).strip('\\').lower()
+            return [(('registry', str(root).upper(), key_path, str(value.get('name') or '').lower()),
+                     (value.get('type', 'REG_DWORD'), value.get('value')))
+                    for value in action.get('values', [])]
+        if task_type == 'network':
+            command = ' '.join(str(action.get('command', '')).lower().split())
+            return [(('network', command, str(name).lower()), str(value).lower())
+                    for name, value in action.get('settings', {}).items()]
+        return None
+
+    @staticmethod
+    def format_target(key: TargetKey) -> str:
+        """目标标识的可读形式"""
+        if key[0] == 'registry':
+            return f"registry:{key[1]}\\{key[2]}\\{key[3] or '(默认)'}"
+        return f"{key[0]}:{key[-1]}"
+
+    def coalesce(self, tasks: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[CoalesceRecord]]:
+        """
+        去除重复目标并解决冲突
+
+        Args:
+            tasks: 按执行顺序排列的任务
+
+        Returns:
+            Tuple[tasks, records]: 规范化后的任务（被部分覆盖的任务为副本，不修改原配置）
+            及合并记录
+        """
+        targets = [self.task_targets(task) for task in tasks]
+        # 目标 -> [(任务下标, 期望状态)]，按执行顺序
+        claims: Dict[TargetKey, List[Tuple[int, Any]]] = {}
+        for index, task_targets in enumerate(targets):
+            for key, desired in task_targets or ():
+                claims.setdefault(key, []).append((index, desired))
+
+        owner = {key: entries[-1][0] for key, entries in claims.items()}
+        records = []
+        for key, entries in claims.items():
+            if len(entries) < 2:
+                continue
+            winner = entries[-1]
+            records.append(CoalesceRecord(
+                target=self.format_target(key),
+                kept=str(tasks[winner[0]].get('id', 'unknown')),
+                dropped=[str(tasks[index].get('id', 'unknown')) for index, _ in entries[:-1]],
+                conflict=any(desired != winner[1] for _, desired in entries[:-1]),
+            ))
+
+        result = []
+        for index, task in enumerate(tasks):
+            task_targets = targets[index]
+            if task_targets is None:
+                result.append(task)
+                continue
+            lost = {key for key, _ in task_targets if owner[key] != index}
+            if not lost:
+                result.append(task)
+            elif len(lost) < len(task_targets):
+                result.append(self._without_targets(task, lost))
+
+        for record in records:
+            level = logging.WARNING if record.conflict else logging.INFO
+            self.logger.log(level, f"{'冲突' if record.conflict else '重复'}目标 {record.target}: "
+                                   f"采用 {record.kept}，忽略 {', '.join(record.dropped)}")
+        return result, records
+
+    def _without_targets(self, task: Dict[str, Any], lost: set) -> Dict[str, Any]:
+        """返回移除了被覆盖目标的任务副本"""
+        task_copy = copy.deepcopy(task)
+        action = task_copy.get('action', {})
+        rollback = task_copy.get('rollback', {})
+        # 注册表为值名，网络为参数名
+        removed = {key[-1] for key in lost}
+        if task_copy.get('type') == 'registry':
+            action['values'] = [value for value in action.get('values', [])
+                                if str(value.get('name') or '').lower() not in removed]
+            # 被覆盖的值由胜出的任务负责回滚
+            if 'delete_values' in rollback:
+                rollback['delete_values'] = [name for name in rollback['delete_values']
+                                             if str(name).lower() not in removed]
+        elif task_copy.get('type') == 'network':
+            action['settings'] = {name: value for name, value in action.get('settings', {}).items()
+                                  if str(name).lower() not in removed}
+            if 'settings' in rollback:
+                rollback['settings'] = {name: value for name, value in rollback['settings'].items()
+                                        if str(name).lower() not in removed}
+        return task_copy
@@ -0,0 +1,86 @@
+"""
+执行前权限预检
+"""
+import logging
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from utils.admin_check import ADMIN, PrivilegeProvider, default_provider
+
+
+class PreflightReport(NamedTuple):
+    """一次预检的结果：权限 -> 需要该权限的任务 id"""
+    required: Dict[str, List[str]]
+    missing: Dict[str, List[str]]
+
+    @property
+    def ok(self) -> bool:
+        """所需权限是否全部具备"""
+        return not self.missing
+
+    def describe(self) -> str:
+        """缺少的权限说明，供日志与事件使用"""
+        parts = []
+        for name, task_ids in self.missing.items():
+            label = "管理员权限" if name == ADMIN else name
+            parts.append(f"{label} ({len(task_ids)} 个任务)")
+        return f"缺少 {', '.join(parts)}" if parts else ""
+
+
+class PrivilegePreflight:
+    """
+    权限预检
+
+    在任何任务开始前汇总整个计划需要的权限（执行器的 required_privileges 与任务
+    自身的 ``requires`` 字段），一次性与当前进程的权限对比。缺少权限时整轮执行
+    在开始前中止，而不是执行到一半才逐个失败。权限来源可注入，便于在非 Windows
+    平台上测试。
+    """
+
+    def __init__(self, executors, provider: Optional[PrivilegeProvider] = None):
+        """
+        初始化预检
+
+        Args:
+            executors: 执行器注册表（任务类型 -> 执行器）
+            provider: 权限来源，默认使用进程共享的 PrivilegeProvider
+        """
+        self.logger = logging.getLogger('PrivilegePreflight')
+        self.executors = executors
+        self.provider = provider or default_provider()
+
+    def requirements(self, tasks: List[Dict[str, Any]]) -> Dict[str, List[str]]:
+        """
+        汇总任务所需的权限
+
+        Args:
+            tasks: 任务列表
+
+        Returns:
+            Dict[str, List[str]]: 权限名 -> 需要该权限的任务 id
+        """
+        required: Dict[str, List[str]] = {}
+        for task in tasks:
+            names = set(task.get('requires', []))
+            executor = self.executors.get(str(task.get('type', '')))
+            if executor is not None:
+                names |= executor.required_privileges(task)
+            for name in sorted(names):
+                required.setdefault(name, []).append(str(task.get('id', 'unknown')))
+        return required
+
+    def check(self, tasks: List[Dict[str, Any]]) -> PreflightReport:
+        """
+        检查当前进程是否具备任务所需的全部权限
+
+        Args:
+            tasks: 任务列表
+
+        Returns:
+            PreflightReport: 预检结果
+        """
+        required = self.requirements(tasks)
+        missing = {name: task_ids for name, task_ids in required.items() if not self.provider.has(name)}
+        report = PreflightReport(required, missing)
+        if not report.ok:
+            self.logger.error(f"权限预检未通过: {report.describe()}")
+        return report
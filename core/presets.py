@@ -0,0 +1,294 @@
+"""
+选择预设：保存与回放向导中的选择
+"""
+import json
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+# 向导中非配置文件任务的分类名（由主窗口在各设置步骤中写入）
+UPDATE_CATEGORY = "更新策略"
+NETWORK_CATEGORY = "网络配置"
+SPECIAL_CATEGORIES = (UPDATE_CATEGORY, NETWORK_CATEGORY)
+
+# 更新暂停与带宽限制对应的注册表位置，与对应设置界面一致
+UPDATE_PAUSE_PATH = r"SOFTWARE\Microsoft\WindowsUpdate\UX\Settings"
+UPDATE_PAUSE_VALUE = "FlightSettingsMaxPauseDays"
+BANDWIDTH_PATH = r"SOFTWARE\Policies\Microsoft\Windows\Psched"
+BANDWIDTH_VALUE = "NonBestEffortLimit"
+# 界面中的 TCP 级别 -> netsh autotuninglevel 参数
+TCP_LEVELS = {"0": "disabled", "1": "normal", "2": "experimental"}
+# 预设中服务任务允许的目标启动类型
+SERVICE_TARGETS = frozenset({'disabled', 'manual', 'demand', 'automatic', 'auto', 'delayed-auto'})
+
+
+def build_update_pause_task(days: int) -> Dict[str, Any]:
+    """构造设置 Windows 更新最大暂停天数的注册表任务"""
+    return {
+        'id': 'update_max_pause_days',
+        'type': 'registry',
+        'description': f"Windows 更新最大暂停天数 -> {days}",
+        'action': {
+            'root': 'HKLM',
+            'path': UPDATE_PAUSE_PATH,
+            'values': [{'name': UPDATE_PAUSE_VALUE, 'value': int(days), 'type': 'REG_DWORD'}]
+        },
+        'rollback': {'delete_values': [UPDATE_PAUSE_VALUE]}
+    }
+
+
+def build_bandwidth_task(limit: int) -> Dict[str, Any]:
+    """构造设置系统保留带宽的注册表任务"""
+    return {
+        'id': 'qos_bandwidth_limit',
+        'type': 'registry',
+        'description': f"系统保留带宽限制 -> {limit}%",
+        'action': {
+            'root': 'HKLM',
+            'path': BANDWIDTH_PATH,
+            'values': [{'name': BANDWIDTH_VALUE, 'value': int(limit), 'type': 'REG_DWORD'}]
+        },
+        'rollback': {'delete_values': [BANDWIDTH_VALUE]}
+    }
+
+
+def build_tcp_task(autotuning_level: str) -> Dict[str, Any]:
+    """构造 TCP 自动调优级别的网络任务"""
+    return {
+        'id': 'tcp_autotuninglevel',
+        'type': 'network',
+        'description': '入站 TCP 吞吐量级别',
+        'action': {
+            'command': 'interface tcp set global',
+            'settings': {'autotuninglevel': autotuning_level}
+        },
+        'rollback': {
+            'settings': {'autotuninglevel': 'normal'}
+        }
+    }
+
+
+class SelectionPreset:
+    """
+    选择预设
+
+    以任务 id 引用配置中的任务，因此配置中任务顺序变化或增删其他任务不影响回放。
+    文件格式::
+
+        {
+            "version": 1,
+            "profile": "Windows 10 优化配置",
+            "selections": {"services": [{"id": "disable_sysmain", "target": "disabled"}]},
+            "update_pause_days": 36542,
+            "bandwidth_limit": 0,
+            "tcp_level": "1"
+        }
+
+    回放时直接由预设构造任务，无需查询各服务的当前状态。
+    """
+
+    VERSION = 1
+
+    def __init__(self, selections: Optional[Dict[str, List[Dict[str, str]]]] = None,
+                 update_pause_days: Optional[int] = None, bandwidth_limit: Optional[int] = None,
+                 tcp_level: Optional[str] = None, profile: str = ""):
+        """
+        初始化预设
+
+        Args:
+            selections: 分类 -> [{'id': 任务 id, 'target': 目标启动类型}]
+            update_pause_days: 更新最大暂停天数，None 表示不设置
+            bandwidth_limit: 系统保留带宽百分比，None 表示不设置
+            tcp_level: TCP 吞吐量级别 ("0"/"1"/"2")，None 表示不设置
+            profile: 创建预设时的配置名称，仅供参考
+        """
+        self.logger = logging.getLogger('SelectionPreset')
+        self.selections = selections or {}
+        self.update_pause_days = update_pause_days
+        self.bandwidth_limit = bandwidth_limit
+        self.tcp_level = tcp_level
+        self.profile = profile
+
+    @classmethod
+    def from_wizard(cls, selected_tasks: Dict[str, List[Dict[str, Any]]], parser) -> 'SelectionPreset':
+        """
+        从向导的选择缓存创建预设
+
+        Args:
+            selected_tasks: 分类 -> 已选择项（TaskSelector / MainWindow 使用的格式）
+            parser: 配置解析器
+
+        Returns:
+            SelectionPreset: 预设
+        """
+        preset = cls(profile=parser.get_profile_info().get('name', ''))
+        for category, items in selected_tasks.items():
+            if category == UPDATE_CATEGORY:
+                for item in items:
+                    preset.update_pause_days = item.get('value', preset.update_pause_days)
+            elif category == NETWORK_CATEGORY:
+                for item in items:
+                    if item.get('setting') == 'bandwidth_limit':
+                        preset.bandwidth_limit = item.get('value')
+                    elif item.get('setting') == 'tcp_level':
+                        preset.tcp_level = item.get('value')
+            else:
+                tasks = parser.get_category_tasks(category)
+                entries = []
+                for item in items:
+                    task_id = item.get('id')
+                    if task_id is None and item['index'] < len(tasks):
+                        task_id = tasks[item['index']].get('id')
+                    if task_id:
+                        entries.append({'id': task_id, 'target': item.get('target', 'disabled')})
+                preset.selections[category] = entries
+        return preset
+
+    def to_wizard(self, parser) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        转换为向导的选择缓存格式，引用不存在的任务被忽略
+
+        特殊分类的选择项带有 'task'，表示尚未应用、需要在执行时一并执行。
+        """
+        selected: Dict[str, List[Dict[str, Any]]] = {}
+        for category, entries in self.selections.items():
+            positions = {task.get('id'): i for i, task in enumerate(parser.get_category_tasks(category))}
+            items = []
+            for entry in entries:
+                index = positions.get(entry.get('id'))
+                if index is None:
+                    self.logger.warning(f"预设中的任务 {entry.get('id')} 不在分类 {category} 中，已忽略")
+                    continue
+                items.append({'index': index, 'id': entry['id'], 'target': entry.get('target', 'disabled')})
+            selected[category] = items
+
+        if self.update_pause_days is not None:
+            task = build_update_pause_task(self.update_pause_days)
+            selected[UPDATE_CATEGORY] = [{
+                'index': 0, 'target': f"{self.update_pause_days} 天", 'is_registry': True,
+                'description': task['description'], 'value': self.update_pause_days, 'task': task,
+            }]
+        network_items = []
+        if self.bandwidth_limit is not None:
+            task = build_bandwidth_task(self.bandwidth_limit)
+            network_items.append({
+                'index': 0, 'target': f"{self.bandwidth_limit}%", 'is_registry': True,
+                'description': task['description'], 'setting': 'bandwidth_limit',
+                'value': self.bandwidth_limit, 'task': task,
+            })
+        if self.tcp_level is not None:
+            task = build_tcp_task(TCP_LEVELS[self.tcp_level])
+            network_items.append({
+                'index': 1, 'target': TCP_LEVELS[self.tcp_level], 'is_registry': True,
+                'description': f"{task['description']} -> {TCP_LEVELS[self.tcp_level]}",
+                'setting': 'tcp_level', 'value': self.tcp_level, 'task': task,
+            })
+        if network_items:
+            selected[NETWORK_CATEGORY] = network_items
+        return selected
+
+    def build_tasks(self, parser) -> List[Dict[str, Any]]:
+        """
+        构造可直接交给规划与执行流程的任务列表
+
+        Args:
+            parser: 已加载的配置解析器
+
+        Returns:
+            List[Dict]: 任务列表（配置中的任务为副本，服务任务的目标启动类型取自预设）
+        """
+        tasks = []
+        for category, items in self.to_wizard(parser).items():
+            if category in SPECIAL_CATEGORIES:
+                tasks.extend(item['task'] for item in items)
+                continue
+            category_tasks = parser.get_category_tasks(category)
+            for item in items:
+                task = category_tasks[item['index']].copy()
+                if task.get('type') == 'service':
+                    task['action'] = {**task.get('action', {}), 'startup_type': item['target']}
+                tasks.append(task)
+        return tasks
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为可序列化的字典"""
+        return {
+            'version': self.VERSION,
+            'profile': self.profile,
+            'selections': self.selections,
+            'update_pause_days': self.update_pause_days,
+            'bandwidth_limit': self.bandwidth_limit,
+            'tcp_level': self.tcp_level,
+        }
+
+    def save(self, path: str):
+        """保存预设文件"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+    @classmethod
+    def load(cls, path: str) -> 'SelectionPreset':
+        """
+        读取预设文件
+
+        Raises:
+            ValueError: 文件内容无效，见 from_dict
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'SelectionPreset':
+        """
+        由 to_dict() 的结果构造预设，并校验各项取值
+
+        预设可能来自不受信任的来源（如经辅助进程通道传入），因此目标启动类型、
+        天数与百分比都在此处校验，不合法时整个预设被拒绝。
+
+        Raises:
+            ValueError: 结构或字段类型不符，版本不受支持，或目标启动类型、暂停天数、
+                带宽限制、TCP 级别无效
+        """
+        if not isinstance(data, dict):
+            raise ValueError("预设必须为对象")
+        version = data.get('version', cls.VERSION)
+        if isinstance(version, bool) or not isinstance(version, int):
+            raise ValueError(f"无效的预设版本: {version!r}")
+        if version > cls.VERSION:
+            raise ValueError(f"不支持的预设版本: {version}")
+        tcp_level = data.get('tcp_level')
+        if tcp_level is not None and str(tcp_level) not in TCP_LEVELS:
+            raise ValueError(f"无效的 TCP 级别: {tcp_level}")
+        update_pause_days = cls._optional_int(data.get('update_pause_days'), 0, 0xFFFFFFFF, "暂停天数")
+        bandwidth_limit = cls._optional_int(data.get('bandwidth_limit'), 0, 100, "带宽限制")
+
+        selections = data.get('selections', {})
+        if not isinstance(selections, dict):
+            raise ValueError("selections 必须为对象")
+        for category, entries in selections.items():
+            if not isinstance(entries, list):
+                raise ValueError(f"分类 {category} 的选择必须为列表")
+            for entry in entries:
+                if not isinstance(entry, dict) or not isinstance(entry.get('id'), str):
+                    raise ValueError(f"分类 {category} 中的选择项必须为带字符串 id 的对象")
+                target = entry.get('target', 'disabled')
+                if not isinstance(target, str) or target.lower() not in SERVICE_TARGETS:
+                    raise ValueError(f"分类 {category} 中任务 {entry.get('id')} 的目标启动类型无效: {target!r}")
+        return cls(
+            selections=selections,
+            update_pause_days=update_pause_days,
+            bandwidth_limit=bandwidth_limit,
+            tcp_level=str(tcp_level) if tcp_level is not None else None,
+            profile=str(data.get('profile', '')),
+        )
+
+    @staticmethod
+    def _optional_int(value: Any, low: int, high: int, label: str) -> Optional[int]:
+        if value is None:
+            return None
+        if isinstance(value, bool) or not isinstance(value, int) or not low <= value <= high:
+            raise ValueError(f"无效的{label}: {value!r}")
+        return value
@@ -0,0 +1,225 @@
+"""
+分层配置合成与缓存
+"""
+import copy
+import hashlib
+import json
+import logging
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def merge_profile(base: Dict[str, Any], overlay: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    将 overlay 层合并到 base 之上，返回新的配置（不修改参数）
+
+    - profile 元信息按键覆盖
+    - 分类按名称合并：description 覆盖；任务按 id 深度合并（字典递归合并，
+      列表与标量整体替换），新任务追加在末尾
+    - 分类或任务带 ``"remove": true`` 时从结果中删除
+    - 其他顶层键整体替换
+
+    Args:
+        base: 下层配置
+        overlay: 上层配置
+
+    Returns:
+        Dict[str, Any]: 合并后的配置
+    """
+    result = copy.deepcopy(base)
+    for key, value in overlay.items():
+        if key in ('extends', 'include'):
+            continue
+        if key == 'profile':
+            result.setdefault('profile', {}).update(copy.deepcopy(value))
+        elif key == 'categories':
+            categories = result.setdefault('categories', {})
+            for name, category in value.items():
+                if category.get('remove'):
+                    categories.pop(name, None)
+                elif name in categories:
+                    categories[name] = _merge_category(categories[name], category)
+                else:
+                    categories[name] = copy.deepcopy(category)
+        else:
+            result[key] = copy.deepcopy(value)
+    return result
+
+
+def _merge_category(base: Dict[str, Any], overlay: Dict[str, Any]) -> Dict[str, Any]:
+    merged = {key: copy.deepcopy(value) for key, value in overlay.items() if key != 'tasks'}
+    result = {**base, **merged}
+    tasks = list(base.get('tasks', []))
+    positions = {task.get('id'): index for index, task in enumerate(tasks) if task.get('id')}
+    removed = set()
+    for task in overlay.get('tasks', []):
+        task_id = task.get('id')
+        if task_id in positions:
+            if task.get('remove'):
+                removed.add(positions[task_id])
+            else:
+                tasks[positions[task_id]] = _deep_merge(tasks[positions[task_id]], task)
+        elif not task.get('remove'):
+            if task_id:
+                positions[task_id] = len(tasks)
+            tasks.append(copy.deepcopy(task))
+    result['tasks'] = [task for index, task in enumerate(tasks) if index not in removed]
+    return result
+
+
+def _deep_merge(base: Dict[str, Any], overlay: Dict[str, Any]) -> Dict[str, Any]:
+    result = copy.deepcopy(base)
+    for key, value in overlay.items():
+        if isinstance(value, dict) and isinstance(result.get(key), dict):
+            result[key] = _deep_merge(result[key], value)
+        else:
+            result[key] = copy.deepcopy(value)
+    return result
+
+
+class ProfileComposer:
+    """
+    分层配置合成器
+
+    配置文件可通过顶层的 ``extends`` / ``include`` 引用其他层（路径相对于当前文件）。
+    优先级从低到高：extends 中的各层（按顺序）< 当前文件 < include 中的各层（按顺序）。
+
+    合成结果以所有层的内容哈希为键缓存在磁盘上。再次启动时只需计算各层文件的
+    哈希并读取一个缓存文件，不必逐层解析和合并。已解析的层在内存中按哈希保留，
+    某一层修改后只需重新解析该层。
+    """
+
+    def __init__(self, cache_dir: Optional[str] = "cache"):
+        """
+        初始化合成器
+
+        Args:
+            cache_dir: 缓存目录，None 表示不使用磁盘缓存
+        """
+        self.logger = logging.getLogger('ProfileComposer')
+        self.cache_dir = cache_dir
+        # 层路径 -> (内容哈希, 解析结果)
+        self._parsed: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+        # 最近一次合成的层：[(路径, 内容哈希)]，按合并顺序
+        self.layers: List[Tuple[str, str]] = []
+
+    @staticmethod
+    def _hash_file(path: str) -> Tuple[str, bytes]:
+        with open(path, 'rb') as f:
+            data = f.read()
+        return hashlib.sha256(data).hexdigest(), data
+
+    def _cache_path(self, root: str) -> str:
+        name = hashlib.sha1(os.path.abspath(root).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"profile_{name}.json")
+
+    @staticmethod
+    def _layers_key(layers: List[Tuple[str, str]]) -> str:
+        digest = hashlib.sha256()
+        for path, content_hash in layers:
+            digest.update(f"{path}\0{content_hash}\n".encode('utf-8'))
+        return digest.hexdigest()
+
+    def profile_hash(self) -> str:
+        """
+        最近一次合成的有效配置的内容哈希
+
+        只由各层内容按合并顺序决定，与文件所在路径无关，相同镜像上的相同配置哈希相同。
+        """
+        digest = hashlib.sha256()
+        for _, content_hash in self.layers:
+            digest.update(f"{content_hash}\n".encode('utf-8'))
+        return digest.hexdigest()
+
+    def compose(self, root: str) -> Dict[str, Any]:
+        """
+        合成有效配置
+
+        Args:
+            root: 最上层配置文件路径
+
+        Returns:
+            Dict[str, Any]: 有效配置
+
+        Raises:
+            FileNotFoundError: 某一层不存在
+            ValueError: 层之间存在循环引用或 JSON 无效
+        """
+        cached = self._load_cached(root)
+        if cached is not None:
+            return cached
+
+        layers: List[Tuple[str, str]] = []
+        profile = self._compose(os.path.abspath(root), {}, [], layers)
+        self.layers = layers
+        self._save_cached(root, layers, profile)
+        return profile
+
+    def _compose(self, path: str, base: Dict[str, Any], stack: List[str],
+                 layers: List[Tuple[str, str]]) -> Dict[str, Any]:
+        """按优先级顺序把 path 及其引用的各层依次合并到 base 之上"""
+        path = os.path.normpath(path)
+        if path in stack:
+            raise ValueError(f"配置层循环引用: {' -> '.join(stack + [path])}")
+        data, content_hash = self._parse(path)
+        base_dir = os.path.dirname(path)
+
+        result = base
+        for parent in self._references(data.get('extends')):
+            result = self._compose(os.path.join(base_dir, parent), result, stack + [path], layers)
+        layers.append((path, content_hash))
+        result = merge_profile(result, data)
+        for fragment in self._references(data.get('include')):
+            result = self._compose(os.path.join(base_dir, fragment), result, stack + [path], layers)
+        return result
+
+    @staticmethod
+    def _references(value: Any) -> List[str]:
+        if not value:
+            return []
+        return [value] if isinstance(value, str) else list(value)
+
+    def _parse(self, path: str) -> Tuple[Dict[str, Any], str]:
+        """解析单层，内容未变时复用上次的解析结果"""
+        content_hash, raw = self._hash_file(path)
+        parsed = self._parsed.get(path)
+        if parsed is not None and parsed[0] == content_hash:
+            return parsed[1], content_hash
+        try:
+            data = json.loads(raw.decode('utf-8-sig'))
+        except ValueError as e:
+            raise ValueError(f"配置层 {path} 不是有效的 JSON: {e}")
+        self._parsed[path] = (content_hash, data)
+        return data, content_hash
+
+    def _load_cached(self, root: str) -> Optional[Dict[str, Any]]:
+        """各层哈希与缓存记录一致时直接返回缓存的有效配置"""
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._cache_path(root), 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            layers = [(path, content_hash) for path, content_hash in cached['layers']]
+            for path, content_hash in layers:
+                if self._hash_file(path)[0] != content_hash:
+                    return None
+            if cached.get('key') != self._layers_key(layers):
+                return None
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        self.layers = layers
+        return cached['profile']
+
+    def _save_cached(self, root: str, layers: List[Tuple[str, str]], profile: Dict[str, Any]):
+        if not self.cache_dir:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._cache_path(root)
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'key': self._layers_key(layers), 'layers': layers, 'profile': profile},
+                          f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            self.logger.warning(f"写入配置缓存失败: {e}")
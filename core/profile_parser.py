@@ -1,9 +1,9 @@
 """
 配置文件解析器
 """
-import json
 import os
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Set
+from core.profile_layers import ProfileComposer
 
 
 class ProfileParser:
@@ -30,6 +30,8 @@ class ProfileParser:
 
         self.profile_meta: Optional[Dict[str, Any]] = None
         self.categories: Dict[str, Any] = {}
+        # 分层配置 (extends / include) 的合成器，有效配置按各层内容哈希缓存
+        self.composer = ProfileComposer()
     
     def load_profile(self) -> bool:
         """
@@ -42,8 +44,7 @@ class ProfileParser:
             if not os.path.exists(self.profile_path):
                 raise FileNotFoundError(f"配置文件不存在: {self.profile_path}")
             
-            with open(self.profile_path, 'r', encoding='utf-8') as f:
-                self.profile_data = json.load(f)
+            self.profile_data = self.composer.compose(self.profile_path)
             
             if self.profile_data:
                 # 解析元信息
@@ -57,6 +58,29 @@ class ProfileParser:
             print(f"加载配置文件失败: {e}")
             return False
     
+    def reload(self) -> Optional[Set[str]]:
+        """
+        重新加载配置，只有内容变化的层会被重新解析
+
+        Returns:
+            Optional[Set[str]]: 内容有变化（含新增、删除）的分类名，加载失败时为 None
+            （此时保留原有配置）
+        """
+        old_meta, old_categories = self.profile_meta, self.categories
+        if not self.load_profile():
+            self.profile_meta, self.categories = old_meta, old_categories
+            return None
+        names = set(old_categories) | set(self.categories)
+        return {name for name in names if old_categories.get(name) != self.categories.get(name)}
+
+    def layer_paths(self) -> List[str]:
+        """有效配置由哪些文件合成（按合并顺序）"""
+        return [path for path, _ in self.composer.layers]
+
+    def profile_hash(self) -> str:
+        """有效配置的内容哈希（各层内容按合并顺序）"""
+        return self.composer.profile_hash()
+
     def get_profile_info(self) -> Dict[str, Any]:
         """获取配置文件元信息"""
         return self.profile_meta or {}
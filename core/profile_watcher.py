@@ -0,0 +1,59 @@
+"""
+配置文件变更监视
+"""
+import logging
+import os
+from typing import Dict, Optional, Set, Tuple
+
+from core.profile_parser import ProfileParser
+
+
+class ProfileWatcher:
+    """
+    轮询配置各层文件的修改时间与大小，发现变化时重新加载
+
+    只依赖 os.stat，不使用平台相关的文件通知接口。调用方（如 Tk 的 after 循环）
+    定期调用 poll 即可；未变化时每次轮询只有若干次 stat。
+    """
+
+    def __init__(self, parser: ProfileParser):
+        """
+        初始化监视器
+
+        Args:
+            parser: 已加载的配置解析器
+        """
+        self.logger = logging.getLogger('ProfileWatcher')
+        self.parser = parser
+        self._stats = self._snapshot()
+
+    def _snapshot(self) -> Dict[str, Optional[Tuple[int, int]]]:
+        stats: Dict[str, Optional[Tuple[int, int]]] = {}
+        for path in self.parser.layer_paths() or [self.parser.profile_path]:
+            try:
+                stat = os.stat(path)
+                stats[path] = (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                stats[path] = None
+        return stats
+
+    def poll(self) -> Optional[Set[str]]:
+        """
+        检查配置是否变化
+
+        Returns:
+            Optional[Set[str]]: 未变化或重新加载失败时为 None；否则为内容有变化的分类名
+            （层文件变化但合成结果不变时为空集合）
+        """
+        current = self._snapshot()
+        if current == self._stats:
+            return None
+        changed_layers = [path for path in current if current[path] != self._stats.get(path)]
+        self.logger.info(f"检测到配置文件变化: {', '.join(changed_layers)}")
+
+        changed = self.parser.reload()
+        # 重新加载后层列表可能变化（增减了 extends / include）
+        self._stats = self._snapshot()
+        if changed is None:
+            self.logger.error("重新加载配置失败，继续使用原有配置")
+        return changed
@@ -0,0 +1,155 @@
+"""
+服务依赖图与拓扑分波调度
+"""
+import csv
+import io
+import logging
+import re
+from typing import Dict, Iterable, List, Set, Tuple
+
+from utils.command_runner import decode_output, run_command
+
+
+class WmicServiceBackend:
+    """
+    通过一次 WMI 查询 (Win32_DependentService) 读取全部服务依赖关系
+    """
+
+    QUERY_COMMAND = 'wmic path Win32_DependentService get Antecedent,Dependent /format:csv'
+    _NAME_PATTERN = re.compile(r'Name="([^"]+)"')
+
+    def load_dependencies(self) -> List[Tuple[str, str]]:
+        """
+        读取依赖关系
+
+        Returns:
+            List[Tuple[str, str]]: (服务, 其依赖的服务) 列表
+        """
+        result = run_command(self.QUERY_COMMAND)
+        if result.returncode != 0:
+            raise RuntimeError(f"wmic 返回码 {result.returncode}")
+        return self.parse_output(decode_output(result.stdout))
+
+    @classmethod
+    def parse_output(cls, output: str) -> List[Tuple[str, str]]:
+        """解析 wmic CSV 输出"""
+        edges = []
+        rows = csv.DictReader(io.StringIO(output.strip().replace('\r', '')))
+        for row in rows:
+            antecedent = cls._NAME_PATTERN.search(row.get('Antecedent') or '')
+            dependent = cls._NAME_PATTERN.search(row.get('Dependent') or '')
+            if antecedent and dependent:
+                edges.append((dependent.group(1), antecedent.group(1)))
+        return edges
+
+
+class StaticServiceBackend:
+    """
+    固定依赖数据的后端，用于测试或离线调度
+
+    Args:
+        dependencies: 服务 -> 其依赖的服务列表
+    """
+
+    def __init__(self, dependencies: Dict[str, Iterable[str]]):
+        self.dependencies = dependencies
+
+    def load_dependencies(self) -> List[Tuple[str, str]]:
+        return [(service, dep) for service, deps in self.dependencies.items() for dep in deps]
+
+
+class ServiceDependencyGraph:
+    """
+    服务依赖图
+
+    依赖关系只在首次使用时通过后端批量加载一次。服务名不区分大小写。
+    """
+
+    def __init__(self, backend=None):
+        """
+        初始化依赖图
+
+        Args:
+            backend: 提供 load_dependencies() 的后端，默认使用 WMI
+        """
+        self.logger = logging.getLogger('ServiceDependencyGraph')
+        self.backend = backend or WmicServiceBackend()
+        self._dependencies: Dict[str, Set[str]] = {}
+        self._dependents: Dict[str, Set[str]] = {}
+        self._loaded = False
+
+    def _ensure_loaded(self):
+        """按需加载依赖关系"""
+        if self._loaded:
+            return
+        try:
+            edges = self.backend.load_dependencies()
+        except Exception as e:
+            # 依赖信息不可用时退化为无依赖，调度结果等同于全部并行
+            self.logger.warning(f"加载服务依赖关系失败: {e}")
+            edges = []
+        for service, dependency in edges:
+            service, dependency = service.lower(), dependency.lower()
+            self._dependencies.setdefault(service, set()).add(dependency)
+            self._dependents.setdefault(dependency, set()).add(service)
+        self._loaded = True
+
+    def dependencies_of(self, service_name: str) -> Set[str]:
+        """获取服务直接依赖的服务（小写）"""
+        self._ensure_loaded()
+        return set(self._dependencies.get(service_name.lower(), set()))
+
+    def dependents_of(self, service_name: str) -> Set[str]:
+        """获取直接依赖此服务的服务（小写）"""
+        self._ensure_loaded()
+        return set(self._dependents.get(service_name.lower(), set()))
+
+    def stop_waves(self, service_names: Iterable[str]) -> List[List[str]]:
+        """
+        计算停止顺序：依赖方先于被依赖方停止
+
+        仅考虑给定服务之间的依赖（含经由集合外服务的间接依赖），返回的每一波内
+        的服务互不依赖，可以并行停止。
+
+        Args:
+            service_names: 需要处理的服务名
+
+        Returns:
+            List[List[str]]: 分波后的服务名（保持原始大小写与输入顺序）
+        """
+        self._ensure_loaded()
+        # 大小写不同的重复服务名保留首次出现的写法
+        keys: Dict[str, str] = {}
+        for name in service_names:
+            keys.setdefault(name.lower(), name)
+
+        # must_before[a] = 必须在 a 之前停止的服务（a 的依赖方）
+        must_before: Dict[str, Set[str]] = {
+            key: self._reachable(key, self._dependents) & keys.keys() for key in keys
+        }
+
+        waves: List[List[str]] = []
+        remaining = list(keys)
+        done: Set[str] = set()
+        while remaining:
+            wave = [key for key in remaining if must_before[key] <= done]
+            if not wave:
+                # 存在循环依赖：剩余服务放入同一波，由 sc 自行报告错误
+                self.logger.warning(f"检测到服务循环依赖: {', '.join(keys[k] for k in remaining)}")
+                wave = remaining
+            waves.append([keys[key] for key in wave])
+            done.update(wave)
+            remaining = [key for key in remaining if key not in done]
+        return waves
+
+    def _reachable(self, start: str, edges: Dict[str, Set[str]]) -> Set[str]:
+        """沿给定方向求传递闭包（不含起点）"""
+        seen: Set[str] = set()
+        stack = list(edges.get(start, ()))
+        while stack:
+            node = stack.pop()
+            if node in seen or node == start:
+                continue
+            seen.add(node)
+            stack.extend(edges.get(node, ()))
+        return seen
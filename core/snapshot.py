@@ -0,0 +1,258 @@
+"""
+系统状态快照：执行前后的基线、紧凑存储与线性时间对比
+"""
+import json
+import logging
+import os
+import struct
+import time
+import zlib
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+Record = Tuple[str, str]
+
+# 文件格式:
+#   MAGIC | u32 头部长度 | 头部 JSON | 各分区的 zlib 数据块
+# 头部记录元信息与分区索引 (名称、偏移、压缩后大小、记录数、校验和、首末键)，打开快照时只读头部。
+# 分区内记录按键排序，每条为 u32 键长 | u32 值长 | 键 | 值 (UTF-8)。
+MAGIC = b'W10SNAP\x01'
+_LENGTH = struct.Struct('<I')
+_RECORD_HEADER = struct.Struct('<II')
+# 读取分区时每次从文件读取的压缩数据量
+READ_CHUNK = 64 * 1024
+COMPRESS_LEVEL = 6
+
+
+class SnapshotChange(NamedTuple):
+    """两个快照之间的一处差异；新增时 before 为 None，删除时 after 为 None"""
+    section: str
+    key: str
+    before: Optional[str]
+    after: Optional[str]
+
+
+def collect_state(tasks: List[Dict[str, Any]], executors) -> Dict[str, Iterable[Record]]:
+    """
+    通过各执行器的 export_state 批量导出任务相关的系统状态
+
+    Args:
+        tasks: 任务列表（通常为整个配置中的任务）
+        executors: 执行器注册表
+
+    Returns:
+        Dict[str, Iterable[Record]]: 分区名 -> 记录
+    """
+    logger = logging.getLogger('Snapshot')
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    for task in tasks:
+        groups.setdefault(str(task.get('type', '')), []).append(task)
+
+    sections: Dict[str, Iterable[Record]] = {}
+    for task_type, group in groups.items():
+        executor = executors.get(task_type)
+        if executor is None:
+            continue
+        try:
+            sections.update(executor.export_state(group))
+        except Exception as e:
+            logger.error(f"导出 {task_type} 状态失败: {e}")
+    return sections
+
+
+def write_snapshot(path: str, sections: Dict[str, Iterable[Record]],
+                   meta: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    将状态写入快照文件
+
+    Args:
+        path: 输出路径
+        sections: 分区名 -> (键, 值) 记录，无需排序；同一分区内键重复时保留最后一条
+        meta: 附加元信息（主机名、执行 id 等）
+
+    Returns:
+        Dict[str, Any]: 写入的头部
+    """
+    index = []
+    blocks = []
+    offset = 0
+    for name in sorted(sections):
+        records = sorted(dict(sections[name]).items())
+        raw = bytearray()
+        for key, value in records:
+            key_bytes, value_bytes = key.encode('utf-8'), value.encode('utf-8')
+            raw += _RECORD_HEADER.pack(len(key_bytes), len(value_bytes))
+            raw += key_bytes
+            raw += value_bytes
+        block = zlib.compress(bytes(raw), COMPRESS_LEVEL)
+        index.append({
+            'name': name, 'offset': offset, 'size': len(block), 'count': len(records), 'crc': zlib.crc32(raw),
+            'first': records[0][0] if records else None, 'last': records[-1][0] if records else None,
+        })
+        blocks.append(block)
+        offset += len(block)
+
+    header = {'meta': {'created_at': time.time(), **(meta or {})}, 'sections': index}
+    header_bytes = json.dumps(header, ensure_ascii=False).encode('utf-8')
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(_LENGTH.pack(len(header_bytes)))
+        f.write(header_bytes)
+        for block in blocks:
+            f.write(block)
+    os.replace(tmp_path, path)
+    return header
+
+
+class Snapshot:
+    """
+    快照读取器
+
+    打开时只读取头部；分区在遍历时按块流式解压与解析，不会整体载入内存，
+    数十万条记录的注册表子树也只需保留一个读取块解压后的数据。
+    """
+
+    DEFAULT_DIR = os.path.join('logs', 'snapshots')
+
+    def __init__(self, path: str):
+        """
+        打开快照
+
+        Args:
+            path: 快照文件路径
+
+        Raises:
+            ValueError: 文件不是快照或已损坏
+        """
+        self.path = path
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} 不是状态快照文件")
+            raw_length = f.read(_LENGTH.size)
+            if len(raw_length) != _LENGTH.size:
+                raise ValueError(f"快照 {path} 已损坏")
+            header_length, = _LENGTH.unpack(raw_length)
+            header = json.loads(f.read(header_length).decode('utf-8'))
+        self._data_start = len(MAGIC) + _LENGTH.size + header_length
+        self.meta: Dict[str, Any] = header.get('meta', {})
+        self._index: Dict[str, Dict[str, Any]] = {entry['name']: entry for entry in header.get('sections', [])}
+
+    @property
+    def sections(self) -> List[str]:
+        """分区名（已排序）"""
+        return sorted(self._index)
+
+    def count(self, section: str) -> int:
+        """分区中的记录数，不读取数据"""
+        entry = self._index.get(section)
+        return entry['count'] if entry else 0
+
+    def fingerprint(self, section: str) -> Optional[Tuple[int, int]]:
+        """分区内容的 (记录数, CRC32)，分区不存在时为 None"""
+        entry = self._index.get(section)
+        return (entry['count'], entry.get('crc')) if entry else None
+
+    def records(self, section: str) -> Iterator[Record]:
+        """
+        按键的顺序遍历分区中的记录
+
+        Args:
+            section: 分区名，不存在时不产出任何记录
+
+        Returns:
+            Iterator[Record]: (键, 值)
+        """
+        entry = self._index.get(section)
+        if entry is None:
+            return
+        decompressor = zlib.decompressobj()
+        buffer = bytearray()
+        with open(self.path, 'rb') as f:
+            f.seek(self._data_start + entry['offset'])
+            remaining = entry['size']
+            while remaining > 0:
+                chunk = f.read(min(READ_CHUNK, remaining))
+                if not chunk:
+                    raise ValueError(f"快照 {self.path} 的分区 {section} 不完整")
+                remaining -= len(chunk)
+                buffer += decompressor.decompress(chunk)
+                consumed = yield from self._parse(buffer)
+                del buffer[:consumed]
+        buffer += decompressor.flush()
+        consumed = yield from self._parse(buffer)
+        if consumed != len(buffer):
+            raise ValueError(f"快照 {self.path} 的分区 {section} 不完整")
+
+    @staticmethod
+    def _parse(buffer: bytearray):
+        """解析缓冲区中的完整记录，返回已消费的字节数"""
+        data = bytes(buffer)
+        unpack_from = _RECORD_HEADER.unpack_from
+        header_size = _RECORD_HEADER.size
+        position = 0
+        while len(data) - position >= header_size:
+            key_length, value_length = unpack_from(data, position)
+            key_start = position + header_size
+            end = key_start + key_length + value_length
+            if end > len(data):
+                break
+            yield (data[key_start:key_start + key_length].decode('utf-8'),
+                   data[key_start + key_length:end].decode('utf-8'))
+            position = end
+        return position
+
+    def get(self, section: str, key: str) -> Optional[str]:
+        """
+        查找单条记录；利用排序在越过目标键后立即停止，并用首末键跳过不可能命中的分区
+
+        Returns:
+            Optional[str]: 值，不存在时为 None
+        """
+        entry = self._index.get(section)
+        if entry is None or entry['first'] is None or not entry['first'] <= key <= entry['last']:
+            return None
+        for record_key, value in self.records(section):
+            if record_key == key:
+                return value
+            if record_key > key:
+                break
+        return None
+
+
+def diff_snapshots(before: Snapshot, after: Snapshot,
+                   sections: Optional[Iterable[str]] = None) -> Iterator[SnapshotChange]:
+    """
+    对比两个快照，按分区与键的顺序产出差异
+
+    两侧记录均已排序，逐分区归并一次即可完成，时间与记录总数成线性关系，
+    内存占用与快照大小无关。两侧记录数与校验和相同的分区直接跳过，不解压。
+
+    Args:
+        before: 基线快照
+        after: 对比快照
+        sections: 仅对比这些分区，默认对比两侧的全部分区
+
+    Returns:
+        Iterator[SnapshotChange]: 差异
+    """
+    names = sorted(set(sections) if sections is not None else set(before.sections) | set(after.sections))
+    for name in names:
+        fingerprint = before.fingerprint(name)
+        if fingerprint is not None and fingerprint[1] is not None and fingerprint == after.fingerprint(name):
+            continue
+        left, right = before.records(name), after.records(name)
+        a, b = next(left, None), next(right, None)
+        while a is not None or b is not None:
+            if b is None or (a is not None and a[0] < b[0]):
+                yield SnapshotChange(name, a[0], a[1], None)
+                a = next(left, None)
+            elif a is None or b[0] < a[0]:
+                yield SnapshotChange(name, b[0], None, b[1])
+                b = next(right, None)
+            else:
+                if a[1] != b[1]:
+                    yield SnapshotChange(name, a[0], a[1], b[1])
+                a, b = next(left, None), next(right, None)
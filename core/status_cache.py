@@ -0,0 +1,138 @@
+"""
+服务状态缓存与预取
+"""
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, Optional, Tuple
+
+
+class ServiceStatusCache:
+    """
+    服务状态共享缓存
+
+    在用户浏览当前分类时，后台线程预先查询下一分类的服务状态，
+    切换分类时直接命中缓存。任何执行操作之后需调用 invalidate 使缓存失效；
+    窗口关闭时调用 close 停止后台查询。
+    """
+
+    def __init__(self, service_executor, max_workers: int = 4):
+        """
+        初始化缓存
+
+        Args:
+            service_executor: 提供 get_service_status 方法的服务执行器
+            max_workers: 后台查询线程数
+        """
+        self.logger = logging.getLogger('ServiceStatusCache')
+        self.service_executor = service_executor
+        self._lock = threading.Lock()
+        self._cache: Dict[str, Dict[str, str]] = {}
+        self._pending: Dict[str, Future] = {}
+        # 每次失效时递增，用于丢弃失效前发起的查询结果：全部失效与按服务失效分别计数
+        self._generation = 0
+        self._key_generations: Dict[str, int] = {}
+        self._closed = False
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='status-prefetch')
+
+    @staticmethod
+    def _key(service_name: str) -> str:
+        # Windows 服务名不区分大小写
+        return service_name.lower()
+
+    def _stamp(self, key: str) -> Tuple[int, int]:
+        """发起查询时的失效计数，须持有锁"""
+        return self._generation, self._key_generations.get(key, 0)
+
+    def get(self, service_name: str) -> Optional[Dict[str, str]]:
+        """
+        仅从缓存读取服务状态，未命中时返回 None
+        """
+        with self._lock:
+            return self._cache.get(self._key(service_name))
+
+    def get_or_query(self, service_name: str) -> Dict[str, str]:
+        """
+        获取服务状态：优先命中缓存，其次等待正在进行的预取，最后同步查询
+
+        Args:
+            service_name: 服务名称
+
+        Returns:
+            Dict: 与 ServiceExecutor.get_service_status 相同格式的状态
+        """
+        key = self._key(service_name)
+        with self._lock:
+            if key in self._cache:
+                return self._cache[key]
+            future = self._pending.get(key)
+            stamp = self._stamp(key)
+
+        if future is not None:
+            try:
+                return future.result()
+            except Exception:
+                pass
+
+        return self._query(service_name, stamp)
+
+    def prefetch(self, service_names: Iterable[str]):
+        """
+        在后台预取一组服务的状态，已缓存或正在查询的服务会被跳过
+
+        Args:
+            service_names: 服务名称列表
+        """
+        with self._lock:
+            if self._closed:
+                return
+            for name in service_names:
+                if not name:
+                    continue
+                key = self._key(name)
+                if key in self._cache or key in self._pending:
+                    continue
+                self._pending[key] = self._pool.submit(self._query, name, self._stamp(key))
+
+    def invalidate(self, service_names: Optional[Iterable[str]] = None):
+        """
+        使缓存失效
+
+        Args:
+            service_names: 需要失效的服务，为 None 时清空全部缓存
+        """
+        with self._lock:
+            if service_names is None:
+                self._cache.clear()
+                self._pending.clear()
+                self._key_generations.clear()
+                self._generation += 1
+                return
+            for name in service_names:
+                key = self._key(name)
+                self._cache.pop(key, None)
+                self._pending.pop(key, None)
+                self._key_generations[key] = self._key_generations.get(key, 0) + 1
+
+    def close(self):
+        """停止后台查询：取消尚未开始的预取，不等待正在进行的查询"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            pending = list(self._pending.values())
+            self._pending.clear()
+        for future in pending:
+            future.cancel()
+        self._pool.shutdown(wait=False)
+
+    def _query(self, service_name: str, stamp: Tuple[int, int]) -> Dict[str, str]:
+        """执行实际查询并写入缓存"""
+        key = self._key(service_name)
+        status = self.service_executor.get_service_status(service_name)
+        with self._lock:
+            # 查询期间发生过失效，则结果可能已过期，不写入缓存
+            if stamp == self._stamp(key):
+                self._pending.pop(key, None)
+                self._cache[key] = status
+        return status
@@ -0,0 +1,107 @@
+"""
+任务检索索引
+"""
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+
+class TaskIndex:
+    """
+    任务 n-gram 倒排索引
+
+    对任务 id、描述和服务名建立 1~3 字符片段的倒排表。查询时取查询串的
+    片段求交集得到候选集，再对候选做一次子串校验，避免每次按键全表扫描。
+    """
+
+    GRAM_SIZE = 3
+
+    def __init__(self, tasks: Optional[List[Dict[str, Any]]] = None):
+        """
+        初始化索引
+
+        Args:
+            tasks: 任务列表，索引位置即任务在列表中的下标
+        """
+        self._texts: List[str] = []
+        self._grams: Dict[str, Set[int]] = {}
+        if tasks:
+            self.build(tasks)
+
+    @staticmethod
+    def task_text(task: Dict[str, Any]) -> str:
+        """提取任务的可检索文本（小写）"""
+        action = task.get('action', {})
+        parts = [
+            str(task.get('id', '')),
+            str(task.get('description', '')),
+            str(action.get('service_name', '')),
+        ]
+        return '\n'.join(parts).lower()
+
+    def build(self, tasks: List[Dict[str, Any]]):
+        """
+        重建索引
+
+        Args:
+            tasks: 任务列表
+        """
+        self._texts = []
+        self._grams = {}
+        for task in tasks:
+            self._add(self.task_text(task))
+
+    def _add(self, text: str):
+        """将一条文本加入索引"""
+        index = len(self._texts)
+        self._texts.append(text)
+        for gram in self._iter_grams(text):
+            self._grams.setdefault(gram, set()).add(index)
+
+    def _iter_grams(self, text: str) -> Iterable[str]:
+        """枚举文本中长度为 1~GRAM_SIZE 的片段（跨字段的片段不收录）"""
+        seen = set()
+        for field in text.split('\n'):
+            for size in range(1, self.GRAM_SIZE + 1):
+                for i in range(len(field) - size + 1):
+                    gram = field[i:i + size]
+                    if gram not in seen:
+                        seen.add(gram)
+                        yield gram
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def search(self, query: str, candidates: Optional[Iterable[int]] = None) -> List[int]:
+        """
+        检索包含查询串的任务
+
+        Args:
+            query: 查询字符串（不区分大小写）
+            candidates: 可选的候选下标，用于与其他过滤条件组合
+
+        Returns:
+            List[int]: 按原顺序排列的匹配任务下标
+        """
+        query = query.strip().lower()
+        if not query:
+            result = set(range(len(self._texts))) if candidates is None else set(candidates)
+            return sorted(result)
+
+        size = min(len(query), self.GRAM_SIZE)
+        grams = {query[i:i + size] for i in range(len(query) - size + 1)}
+        # 从最稀有的片段开始求交集，候选集尽快缩小
+        postings = sorted((self._grams.get(g, set()) for g in grams), key=len)
+        if not postings or not postings[0]:
+            return []
+
+        result = set(postings[0])
+        for posting in postings[1:]:
+            result &= posting
+            if not result:
+                return []
+        if candidates is not None:
+            result &= set(candidates)
+
+        # 片段命中不代表连续子串命中，长查询需逐条校验
+        if len(query) > self.GRAM_SIZE:
+            result = {i for i in result if query in self._texts[i]}
+        return sorted(result)
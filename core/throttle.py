@@ -0,0 +1,171 @@
+"""
+资源节流：在繁忙的机器上平缓地执行任务
+"""
+import contextlib
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterator, NamedTuple, Optional
+
+from core.cancellation import CancellationToken
+from utils.process_stats import SystemCpuSampler, lower_process_priority, restore_process_priority
+
+
+class ThrottleSettings(NamedTuple):
+    """节流参数，每轮执行可单独指定"""
+    # 每秒允许启动的外部命令数（令牌桶速率）与允许的突发数
+    spawns_per_second: float = 4.0
+    burst: int = 2
+    # 同时停止的服务数上限
+    max_concurrent_stops: int = 2
+    # 整机 CPU 使用率超过该值 (0-1) 时暂缓启动新命令
+    cpu_threshold: float = 0.75
+    # 连续退避时的最长单次等待 (秒)
+    max_backoff: float = 8.0
+    # 是否降低本进程（及子进程）的 CPU 与 I/O 优先级
+    low_priority: bool = True
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ThrottleSettings':
+        """由字典构造，忽略未知字段"""
+        return cls(**{key: value for key, value in data.items() if key in cls._fields})
+
+
+class ResourceThrottle:
+    """
+    资源节流器
+
+    由 TaskExecutor 在每轮执行前交给各执行器，在三个位置生效：
+
+    - run_command 启动子进程前取令牌（令牌桶），平摊 sc / netsh 的启动峰值
+    - 令牌取到后若整机 CPU 繁忙则指数退避，直到负载回落或达到最长等待
+    - ServiceExecutor 停止服务时占用停止名额，限制同时进行的服务停止
+
+    所有等待都通过取消令牌进行，取消或到达截止时间时立即中止。
+    """
+
+    # 两次 CPU 采样的最短间隔 (秒)，间隔内复用上次结果
+    CPU_SAMPLE_INTERVAL = 0.5
+    # 首次退避的等待时间 (秒)
+    INITIAL_BACKOFF = 0.5
+
+    def __init__(self, settings: Optional[ThrottleSettings] = None):
+        """
+        初始化节流器
+
+        Args:
+            settings: 节流参数，默认使用 ThrottleSettings()
+        """
+        self.logger = logging.getLogger('ResourceThrottle')
+        self.settings = settings or ThrottleSettings()
+        self._lock = threading.Lock()
+        self._tokens = float(max(1, self.settings.burst))
+        self._refilled_at = time.monotonic()
+        self._stop_slots = threading.BoundedSemaphore(max(1, self.settings.max_concurrent_stops))
+        self._cpu = SystemCpuSampler()
+        self._cpu_sampled_at = 0.0
+        self._cpu_usage: Optional[float] = None
+        self._priority_lowered = False
+        self._previous_priority = None
+        # 累计统计：限速等待时间、CPU 退避次数与时间
+        self.spawns = 0
+        self.rate_wait = 0.0
+        self.backoffs = 0
+        self.backoff_wait = 0.0
+
+    def enter(self):
+        """开始执行前调用：按设置降低进程优先级，须与 exit 成对调用"""
+        if self.settings.low_priority and not self._priority_lowered:
+            self._previous_priority = lower_process_priority()
+            self._priority_lowered = True
+            self.logger.info("已降低进程 CPU 与 I/O 优先级")
+
+    def exit(self):
+        """执行结束后调用：恢复 enter 之前的进程优先级（常驻进程中后续请求不受影响）"""
+        if not self._priority_lowered:
+            return
+        self._priority_lowered = False
+        previous, self._previous_priority = self._previous_priority, None
+        if restore_process_priority(previous):
+            self.logger.info("已恢复进程 CPU 与 I/O 优先级")
+        else:
+            self.logger.warning("无法恢复进程优先级")
+
+    @staticmethod
+    def _sleep(seconds: float, token: Optional[CancellationToken]):
+        if token is not None:
+            token.sleep(seconds)
+        else:
+            time.sleep(seconds)
+
+    def acquire_spawn(self, token: Optional[CancellationToken] = None):
+        """
+        启动外部命令前调用，必要时等待
+
+        Args:
+            token: 取消令牌
+
+        Raises:
+            OperationCancelled: 等待期间被取消或到达截止时间
+        """
+        rate = self.settings.spawns_per_second
+        if rate > 0:
+            while True:
+                with self._lock:
+                    now = time.monotonic()
+                    self._tokens = min(float(max(1, self.settings.burst)),
+                                       self._tokens + (now - self._refilled_at) * rate)
+                    self._refilled_at = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        self.spawns += 1
+                        break
+                    wait = (1 - self._tokens) / rate
+                    self.rate_wait += wait
+                self._sleep(wait, token)
+        self._back_off_while_busy(token)
+
+    def _system_cpu(self) -> Optional[float]:
+        with self._lock:
+            now = time.monotonic()
+            if now - self._cpu_sampled_at >= self.CPU_SAMPLE_INTERVAL:
+                self._cpu_usage = self._cpu.sample()
+                self._cpu_sampled_at = now
+            return self._cpu_usage
+
+    def _back_off_while_busy(self, token: Optional[CancellationToken]):
+        """整机 CPU 高于阈值时指数退避；单次等待达到上限后放行，避免无限期推迟"""
+        delay = self.INITIAL_BACKOFF
+        while True:
+            usage = self._system_cpu()
+            if usage is None or usage < self.settings.cpu_threshold:
+                return
+            with self._lock:
+                self.backoffs += 1
+                self.backoff_wait += delay
+            self.logger.debug(f"整机 CPU {usage:.0%}，暂缓 {delay:.1f}s")
+            self._sleep(delay, token)
+            if delay >= self.settings.max_backoff:
+                return
+            delay = min(delay * 2, self.settings.max_backoff)
+
+    @contextlib.contextmanager
+    def stop_slot(self, token: Optional[CancellationToken] = None) -> Iterator[None]:
+        """
+        占用一个服务停止名额
+
+        Args:
+            token: 取消令牌，等待名额期间被取消时抛出 OperationCancelled
+        """
+        while not self._stop_slots.acquire(timeout=0.2):
+            if token is not None:
+                token.raise_if_cancelled()
+        try:
+            yield
+        finally:
+            self._stop_slots.release()
+
+    def summary(self) -> str:
+        """本轮节流统计，用于日志"""
+        return (f"启动外部命令 {self.spawns} 次，限速等待 {self.rate_wait:.1f}s，"
+                f"CPU 繁忙退避 {self.backoffs} 次共 {self.backoff_wait:.1f}s")
@@ -0,0 +1,82 @@
+"""
+执行后状态校验
+"""
+import logging
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+
+class TaskVerifier:
+    """
+    执行后校验器
+
+    按任务类型分组，每组调用一次执行器的 read_state 得到批量快照，再逐个任务
+    调用 check_state 与目标状态对比。N 个服务任务只需一次 WMI 查询，而不是
+    N 次 `sc qc`。
+    """
+
+    def __init__(self, executors: Mapping[str, Any]):
+        """
+        初始化校验器
+
+        Args:
+            executors: 任务类型 -> 执行器
+        """
+        self.logger = logging.getLogger('TaskVerifier')
+        self.executors = executors
+
+    def snapshot(self, tasks: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        为每种任务类型读取一次状态快照
+
+        Args:
+            tasks: 任务列表
+
+        Returns:
+            Dict[str, Any]: 任务类型 -> 快照，读取失败或不支持时为 None
+        """
+        groups: Dict[str, List[Dict[str, Any]]] = {}
+        for task in tasks:
+            groups.setdefault(str(task.get('type', '')), []).append(task)
+
+        states: Dict[str, Any] = {}
+        for task_type, group in groups.items():
+            executor = self.executors.get(task_type)
+            if executor is None:
+                states[task_type] = None
+                continue
+            try:
+                states[task_type] = executor.read_state(group)
+            except Exception as e:
+                self.logger.warning(f"读取 {task_type} 状态失败: {e}")
+                states[task_type] = None
+        return states
+
+    def verify(self, tasks: List[Dict[str, Any]],
+               states: Optional[Dict[str, Any]] = None) -> List[Tuple[Dict[str, Any], Optional[List[str]]]]:
+        """
+        校验任务是否处于目标状态
+
+        Args:
+            tasks: 任务列表
+            states: 预先读取的快照，为 None 时调用 snapshot 读取
+
+        Returns:
+            List[Tuple[task, drift]]: drift 为偏差描述列表（空表示一致），
+            None 表示该类型无法校验
+        """
+        if states is None:
+            states = self.snapshot(tasks)
+
+        results = []
+        for task in tasks:
+            task_type = str(task.get('type', ''))
+            state = states.get(task_type)
+            if state is None:
+                results.append((task, None))
+                continue
+            try:
+                drift = self.executors[task_type].check_state(task, state)
+            except Exception as e:
+                drift = [f"校验出错: {e}"]
+            results.append((task, drift))
+        return results
@@ -2,8 +2,18 @@
 执行器基类
 """
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import Dict, Any, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
 import logging
+import time
+from core.cancellation import CancellationToken
+
+
+class BatchResult(NamedTuple):
+    """批量执行中单个任务的结果"""
+    task: Dict[str, Any]
+    success: bool
+    error: Optional[str] = None
+    duration: float = 0.0
 
 
 class BaseExecutor(ABC):
@@ -12,6 +22,14 @@ class BaseExecutor(ABC):
     def __init__(self):
         """初始化执行器"""
         self.logger = logging.getLogger(self.__class__.__name__)
+        # 由 TaskExecutor 在每轮执行前设置，执行器在外部命令和任务之间检查
+        self.cancel_token: Optional[CancellationToken] = None
+        # 同样由 TaskExecutor 设置；节流模式下传给 run_command，None 表示不限流
+        self.throttle = None
+
+    def is_cancelled(self) -> bool:
+        """当前执行是否已被取消"""
+        return self.cancel_token is not None and self.cancel_token.is_cancelled
     
     @abstractmethod
     def execute(self, task: Dict[str, Any]) -> bool:
@@ -39,6 +57,96 @@ class BaseExecutor(ABC):
         """
         pass
     
+    def execute_batch(self, tasks: List[Dict[str, Any]]) -> Iterator[BatchResult]:
+        """
+        批量执行任务，每完成一个任务产出一个结果
+
+        默认逐个调用 execute；可合并执行的子类（如 netsh 脚本、.reg 导入）应重写此方法。
+        取消后停止产出结果，未产出结果的任务由 TaskExecutor 记为跳过。
+        
+        Args:
+            tasks: 同一类型的任务列表
+        
+        Returns:
+            Iterator[BatchResult]: 按完成顺序产出的结果
+        """
+        for task in tasks:
+            if self.is_cancelled():
+                return
+            start = time.perf_counter()
+            try:
+                success = self.execute(task)
+                yield BatchResult(task, success, None, time.perf_counter() - start)
+            except Exception as e:
+                yield BatchResult(task, False, str(e), time.perf_counter() - start)
+    
+    def read_state(self, tasks: List[Dict[str, Any]]) -> Any:
+        """
+        批量读取一组任务目标对象的当前状态，用于执行后的校验
+
+        子类应以尽量少的系统调用（一次批量查询）完成读取。默认不支持校验。
+        
+        Args:
+            tasks: 同一类型的任务列表
+        
+        Returns:
+            Any: 交给 check_state 使用的状态快照，None 表示不支持校验
+        """
+        return None
+    
+    def check_state(self, task: Dict[str, Any], state: Any) -> List[str]:
+        """
+        将任务的目标状态与 read_state 的快照对比
+        
+        Args:
+            task: 任务配置
+            state: read_state 返回的快照
+        
+        Returns:
+            List[str]: 偏差描述，空列表表示与目标一致
+        """
+        return []
+    
+    def change_markers(self, tasks: List[Dict[str, Any]]) -> Tuple[Optional[Dict[str, Any]], Any]:
+        """
+        廉价地获取每个任务目标对象的变化标记，供漂移监控跳过未变化的任务
+
+        标记相同即认为目标未被改动，无需再次读取和对比。
+        
+        Args:
+            tasks: 同一类型的任务列表
+        
+        Returns:
+            Tuple[markers, state]: markers 为任务 id -> 标记，None 表示不支持增量检查；
+            若读取标记时已得到可供 check_state 使用的完整快照，则作为 state 一并返回
+        """
+        return None, None
+    
+    def export_state(self, tasks: List[Dict[str, Any]]) -> Dict[str, Iterable[Tuple[str, str]]]:
+        """
+        批量导出与任务相关的完整系统状态，用于执行前后的状态快照
+
+        Args:
+            tasks: 同一类型的任务列表
+
+        Returns:
+            Dict[str, Iterable[Tuple[str, str]]]: 快照分区名 -> (键, 值) 记录，无需排序；
+            默认不导出任何状态
+        """
+        return {}
+
+    def required_privileges(self, task: Dict[str, Any]) -> Set[str]:
+        """
+        执行或回滚任务所需的权限，供执行前统一预检
+
+        Args:
+            task: 任务配置
+
+        Returns:
+            Set[str]: 权限名（utils.admin_check.ADMIN 或令牌权限名），默认不需要特殊权限
+        """
+        return set()
+
     def validate_task(self, task: Dict[str, Any]) -> bool:
         """
         验证任务配置
@@ -0,0 +1,237 @@
+"""
+网络配置执行器 (netsh)
+"""
+import os
+import tempfile
+import time
+from typing import Dict, Any, Iterator, List, Optional, Set, Tuple
+from executors.base_executor import BaseExecutor, BatchResult
+from utils.admin_check import ADMIN
+from utils.command_runner import run_command
+
+
+class NetworkExecutor(BaseExecutor):
+    """
+    netsh 网络配置执行器
+
+    任务格式::
+
+        {
+            "type": "network",
+            "action": {
+                "command": "interface tcp set global",
+                "settings": {"autotuninglevel": "normal"}
+            },
+            "rollback": {"settings": {"autotuninglevel": "normal"}}
+        }
+
+    多个任务会被合并为一个 netsh 脚本，通过一次 ``netsh -f`` 执行。
+    """
+
+    DEFAULT_COMMAND = "interface tcp set global"
+    SHOW_COMMAND = "netsh interface tcp show global"
+
+    # `netsh int tcp show global` 输出标签 -> `set global` 参数名（英文/中文系统）
+    SHOW_LABELS = {
+        'receive-side scaling state': 'rss',
+        '接收方缩放状态': 'rss',
+        'receive window auto-tuning level': 'autotuninglevel',
+        '接收窗口自动调节级别': 'autotuninglevel',
+        'ecn capability': 'ecncapability',
+        'ecn 功能': 'ecncapability',
+        'rfc 1323 timestamps': 'timestamps',
+        'rfc 1323 时间戳': 'timestamps',
+        'initial rto': 'initialrto',
+        '初始 rto': 'initialrto',
+        'receive segment coalescing state': 'rsc',
+        '接收段合并状态': 'rsc',
+        'non sack rtt resiliency': 'nonsackrttresiliency',
+        'max syn retransmissions': 'maxsynretransmissions',
+        '最大 syn 重新传输次数': 'maxsynretransmissions',
+        'fast open': 'fastopen',
+        'fast open fallback': 'fastopenfallback',
+        'hystart': 'hystart',
+        'pacing profile': 'pacingprofile',
+    }
+
+    # 本地化取值 -> netsh 参数值
+    VALUE_ALIASES = {
+        '常规': 'normal',
+        '实验性': 'experimental',
+        '受限': 'restricted',
+        '高度受限': 'highlyrestricted',
+        '禁用': 'disabled',
+        '已禁用': 'disabled',
+        '启用': 'enabled',
+        '已启用': 'enabled',
+        '默认': 'default',
+    }
+
+    def required_privileges(self, task: Dict[str, Any]) -> Set[str]:
+        """netsh 全局参数的修改需要管理员权限"""
+        return {ADMIN}
+
+    def execute(self, task: Dict[str, Any]) -> bool:
+        """
+        执行单个网络配置任务
+
+        Args:
+            task: 任务配置
+
+        Returns:
+            bool: 执行是否成功
+        """
+        result = next(self._run_batch([task], 'action'))
+        if result.error:
+            self.logger.error(f"执行网络任务失败: {result.error}")
+        return result.success
+
+    def rollback(self, task: Dict[str, Any]) -> bool:
+        """
+        回滚网络配置，rollback.settings 中的值会按 action.command 重新设置
+
+        Args:
+            task: 任务配置
+
+        Returns:
+            bool: 回滚是否成功
+        """
+        result = next(self._run_batch([task], 'rollback'))
+        if result.error:
+            self.logger.error(f"回滚网络任务失败: {result.error}")
+        return result.success
+
+    def execute_batch(self, tasks: List[Dict[str, Any]]) -> Iterator[BatchResult]:
+        """
+        合并执行多个网络任务：生成一个 netsh 脚本，一次进程调用完成
+
+        Args:
+            tasks: 网络任务列表
+
+        Returns:
+            Iterator[BatchResult]: 各任务结果
+        """
+        return self._run_batch(tasks, 'action')
+
+    def _run_batch(self, tasks: List[Dict[str, Any]], section: str) -> Iterator[BatchResult]:
+        """
+        生成并执行 netsh 脚本，之后读回一次当前值逐项校验
+
+        Args:
+            tasks: 任务列表
+            section: 读取设置的字段 ('action' 或 'rollback')
+        """
+        start = time.perf_counter()
+        lines: List[str] = []
+        planned: List[Tuple[Dict[str, Any], Dict[str, str], Optional[str]]] = []
+        for task in tasks:
+            settings, error = self._task_settings(task, section)
+            planned.append((task, settings, error))
+            if not error:
+                command = task.get('action', {}).get('command', self.DEFAULT_COMMAND)
+                lines.append(f"{command} " + " ".join(f"{k}={v}" for k, v in settings.items()))
+
+        batch_error = None
+        current: Dict[str, str] = {}
+        if lines:
+            try:
+                returncode, output = self._run_script(lines)
+                self.logger.info(f"netsh 脚本执行完成: {len(lines)} 条命令")
+                if returncode != 0:
+                    batch_error = f"netsh 返回码 {returncode}: {output.strip()}"
+                current = self.get_current_values()
+            except Exception as e:
+                batch_error = str(e)
+
+        duration = (time.perf_counter() - start) / max(len(tasks), 1)
+        for task, settings, error in planned:
+            if error is None:
+                error = self._check_applied(settings, current, batch_error)
+            yield BatchResult(task, error is None, error, duration)
+
+    def _task_settings(self, task: Dict[str, Any], section: str) -> Tuple[Dict[str, str], Optional[str]]:
+        """读取任务中的 netsh 参数"""
+        settings = task.get(section, {}).get('settings', {})
+        if not settings:
+            return {}, "netsh 设置未指定"
+        return {str(k).lower(): str(v).lower() for k, v in settings.items()}, None
+
+    def _check_applied(self, settings: Dict[str, str], current: Dict[str, str],
+                       batch_error: Optional[str]) -> Optional[str]:
+        """
+        对比读回值判断任务是否生效；无法读回的参数以脚本返回码为准
+        """
+        mismatched = [
+            f"{key}={current[key]} (期望 {value})"
+            for key, value in settings.items()
+            if key in current and current[key] != value
+        ]
+        if mismatched:
+            return "设置未生效: " + ", ".join(mismatched)
+        if batch_error and not all(key in current for key in settings):
+            return batch_error
+        return None
+
+    def _run_script(self, lines: List[str]) -> Tuple[int, str]:
+        """将命令写入临时脚本并通过 netsh -f 执行"""
+        fd, script_path = tempfile.mkstemp(suffix='.netsh', text=True)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write("\n".join(lines) + "\n")
+            result = run_command(f'netsh -f "{script_path}"', self.cancel_token, throttle=self.throttle)
+            return result.returncode, result.stdout.decode('gbk', errors='ignore')
+        finally:
+            os.remove(script_path)
+
+    def export_state(self, tasks: List[Dict[str, Any]]) -> Dict[str, List[Tuple[str, str]]]:
+        """导出全部 TCP 全局参数"""
+        return {'network': list(self.get_current_values().items())}
+
+    def get_current_values(self) -> Dict[str, str]:
+        """
+        通过一次 `netsh int tcp show global` 读取当前全局 TCP 参数
+
+        Returns:
+            Dict[str, str]: set global 参数名 -> 当前值，未识别的标签按原文小写保留
+        """
+        output = run_command(self.SHOW_COMMAND).stdout.decode('gbk', errors='ignore')
+        return self.parse_show_output(output)
+
+    @classmethod
+    def parse_show_output(cls, output: str) -> Dict[str, str]:
+        """
+        解析 `netsh int tcp show global` 的输出
+
+        Args:
+            output: 命令输出文本
+
+        Returns:
+            Dict[str, str]: 参数名 -> 值
+        """
+        values: Dict[str, str] = {}
+        for line in output.splitlines():
+            if ':' not in line:
+                continue
+            label, _, value = line.partition(':')
+            label = label.strip().lower()
+            value = value.strip()
+            if not label or not value:
+                continue
+            value = cls.VALUE_ALIASES.get(value, value.lower())
+            values[cls.SHOW_LABELS.get(label, label)] = value
+        return values
+
+    def read_state(self, tasks: List[Dict[str, Any]]) -> Dict[str, str]:
+        """读取当前全局 TCP 参数（一次 netsh 调用）"""
+        return self.get_current_values()
+
+    def check_state(self, task: Dict[str, Any], state: Dict[str, str]) -> List[str]:
+        """对比 netsh 参数的当前值"""
+        settings, error = self._task_settings(task, 'action')
+        if error:
+            return [error]
+        return [
+            f"{key}: {state[key]} (期望 {value})"
+            for key, value in settings.items()
+            if key in state and state[key] != value
+        ]
@@ -1,10 +1,15 @@
 """
 注册表执行器
 """
+import os
+import tempfile
+import time
 import winreg
-from typing import Dict, Any
-from executors.base_executor import BaseExecutor
-from utils.admin_check import require_admin
+from typing import Dict, Any, Iterator, List, Optional, Set, Tuple
+from core.cancellation import OperationCancelled
+from executors.base_executor import BaseExecutor, BatchResult
+from utils.admin_check import ADMIN
+from utils.command_runner import run_command
 
 
 class RegistryExecutor(BaseExecutor):
@@ -26,8 +31,48 @@ class RegistryExecutor(BaseExecutor):
         'REG_BINARY': winreg.REG_BINARY,
         'REG_EXPAND_SZ': winreg.REG_EXPAND_SZ
     }
+
+    # 注册表类型值 -> 名称，用于状态快照
+    REG_TYPE_NAMES = {
+        winreg.REG_NONE: 'REG_NONE',
+        winreg.REG_SZ: 'REG_SZ',
+        winreg.REG_EXPAND_SZ: 'REG_EXPAND_SZ',
+        winreg.REG_BINARY: 'REG_BINARY',
+        winreg.REG_DWORD: 'REG_DWORD',
+        winreg.REG_MULTI_SZ: 'REG_MULTI_SZ',
+        winreg.REG_QWORD: 'REG_QWORD',
+    }
+
+    # .reg 文件中的根键全名
+    ROOT_NAMES = {
+        'HKLM': 'HKEY_LOCAL_MACHINE',
+        'HKCU': 'HKEY_CURRENT_USER',
+        'HKCR': 'HKEY_CLASSES_ROOT',
+        'HKU': 'HKEY_USERS',
+        'HKCC': 'HKEY_CURRENT_CONFIG'
+    }
+
+    # 一批任务中的注册表值数量达到该阈值时改用 .reg 文件一次导入。
+    # 200 为未经测量的初始估计，尚需在目标机器上运行
+    # benchmarks/bench_registry_import.py 找出交叉点后校准。
+    BULK_IMPORT_THRESHOLD = 200
+
+    def __init__(self, bulk_import_threshold: int = BULK_IMPORT_THRESHOLD):
+        """
+        初始化执行器
+
+        Args:
+            bulk_import_threshold: 切换为批量导入的最小值数量
+        """
+        super().__init__()
+        self.bulk_import_threshold = bulk_import_threshold
     
-    @require_admin
+    def required_privileges(self, task: Dict[str, Any]) -> Set[str]:
+        """当前用户的配置单元 (HKCU) 无需提升，其余根键需要管理员权限"""
+        if str(task.get('action', {}).get('root')) == 'HKCU':
+            return set()
+        return {ADMIN}
+
     def execute(self, task: Dict[str, Any]) -> bool:
         """
         执行注册表修改任务
@@ -76,7 +121,6 @@ class RegistryExecutor(BaseExecutor):
             self.logger.error(f"执行注册表任务失败: {e}")
             return False
     
-    @require_admin
     def rollback(self, task: Dict[str, Any]) -> bool:
         """
         回滚注册表修改
@@ -117,4 +161,255 @@ class RegistryExecutor(BaseExecutor):
             
         except Exception as e:
             self.logger.error(f"回滚注册表任务失败: {e}")
-            return False
\ No newline at end of file
+            return False
+
+    def execute_batch(self, tasks: List[Dict[str, Any]]) -> Iterator[BatchResult]:
+        """
+        批量执行注册表任务
+
+        值数量较少时逐个 SetValueEx；达到阈值后生成单个 .reg 文件通过 `reg import`
+        一次导入，导入失败时回退为逐个写入。
+
+        Args:
+            tasks: 注册表任务列表
+
+        Returns:
+            Iterator[BatchResult]: 各任务结果
+        """
+        value_count = sum(len(task.get('action', {}).get('values', [])) for task in tasks)
+        if value_count < self.bulk_import_threshold:
+            return super().execute_batch(tasks)
+        return self._import_batch(tasks)
+
+    def _import_batch(self, tasks: List[Dict[str, Any]]) -> Iterator[BatchResult]:
+        """通过 .reg 文件一次导入全部任务"""
+        start = time.perf_counter()
+        try:
+            content = self.build_reg_file(tasks)
+            self.import_reg_file(content)
+        except OperationCancelled:
+            raise
+        except Exception as e:
+            self.logger.warning(f"批量导入注册表失败，回退为逐项写入: {e}")
+            yield from super().execute_batch(tasks)
+            return
+
+        self.logger.info(f"批量导入注册表完成: {len(tasks)} 个任务")
+        duration = (time.perf_counter() - start) / max(len(tasks), 1)
+        for task in tasks:
+            yield BatchResult(task, True, None, duration)
+
+    def import_reg_file(self, content: str):
+        """
+        将 .reg 内容写入临时文件并执行 `reg import`
+
+        Args:
+            content: .reg 文件文本
+        """
+        fd, reg_path = tempfile.mkstemp(suffix='.reg')
+        try:
+            # regedit 格式 5.00 要求 UTF-16 LE (带 BOM)
+            with os.fdopen(fd, 'w', encoding='utf-16', newline='') as f:
+                f.write(content)
+            result = run_command(f'reg import "{reg_path}"', self.cancel_token, throttle=self.throttle)
+            if result.returncode != 0:
+                error_msg = result.stderr.decode('gbk', errors='ignore').strip()
+                raise Exception(f"REG 错误: {error_msg}")
+        finally:
+            os.remove(reg_path)
+
+    @classmethod
+    def build_reg_file(cls, tasks: List[Dict[str, Any]]) -> str:
+        """
+        将注册表任务转换为 .reg 文件文本
+
+        Args:
+            tasks: 注册表任务列表
+
+        Returns:
+            str: .reg 文件内容
+        """
+        lines = ["Windows Registry Editor Version 5.00", ""]
+        for task in tasks:
+            action = task.get('action', {})
+            root = cls.ROOT_NAMES.get(str(action.get('root')))
+            path = action.get('path')
+            values = action.get('values', [])
+            if not all([root, path, values]):
+                raise ValueError(f"注册表配置不完整: {task.get('id', 'unknown')}")
+
+            lines.append(f"[{root}\\{path}]")
+            for value_info in values:
+                name = value_info.get('name')
+                name_text = '@' if not name else f'"{cls._escape(name)}"'
+                data = cls._format_value(value_info.get('type', 'REG_DWORD'), value_info.get('value'))
+                lines.append(f"{name_text}={data}")
+            lines.append("")
+        return "\r\n".join(lines) + "\r\n"
+
+    @staticmethod
+    def _escape(text: str) -> str:
+        """转义 .reg 字符串中的反斜杠和引号"""
+        return str(text).replace('\\', '\\\\').replace('"', '\\"')
+
+    @classmethod
+    def _format_value(cls, reg_type: str, value: Any) -> str:
+        """按类型格式化 .reg 中的数据部分"""
+        if reg_type == 'REG_DWORD':
+            return f"dword:{int(value) & 0xFFFFFFFF:08x}"
+        if reg_type == 'REG_SZ':
+            return f'"{cls._escape(value)}"'
+        if reg_type == 'REG_EXPAND_SZ':
+            raw = (str(value) + '\0').encode('utf-16-le')
+            return "hex(2):" + ",".join(f"{b:02x}" for b in raw)
+        if reg_type == 'REG_BINARY':
+            raw = bytes.fromhex(value) if isinstance(value, str) else bytes(value)
+            return "hex:" + ",".join(f"{b:02x}" for b in raw)
+        raise ValueError(f"不支持的注册表类型: {reg_type}")
+
+    def read_state(self, tasks: List[Dict[str, Any]]) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        """
+        批量读取任务涉及的注册表值，每个键只打开一次
+
+        Returns:
+            Dict: (根键, 小写路径) -> {小写值名: 值}，键不存在时为 None
+        """
+        wanted: Dict[Tuple[str, str], Tuple[str, set]] = {}
+        for task in tasks:
+            action = task.get('action', {})
+            key_id = (str(action.get('root')), str(action.get('path', '')).lower())
+            entry = wanted.setdefault(key_id, (str(action.get('path', '')), set()))
+            entry[1].update(str(v.get('name') or '') for v in action.get('values', []))
+
+        state: Dict[Tuple[str, str], Any] = {}
+        for (root, path_lower), (path, names) in wanted.items():
+            root_key = self.ROOT_KEYS.get(root)
+            if root_key is None:
+                state[(root, path_lower)] = None
+                continue
+            try:
+                with winreg.OpenKey(root_key, path, 0, winreg.KEY_READ) as key:
+                    values = {}
+                    for name in names:
+                        try:
+                            values[name.lower()] = winreg.QueryValueEx(key, name)[0]
+                        except FileNotFoundError:
+                            pass
+                    state[(root, path_lower)] = values
+            except FileNotFoundError:
+                state[(root, path_lower)] = None
+        return state
+
+    def check_state(self, task: Dict[str, Any], state: Dict[Tuple[str, str], Any]) -> List[str]:
+        """对比注册表值"""
+        action = task.get('action', {})
+        path = str(action.get('path', ''))
+        values = state.get((str(action.get('root')), path.lower()))
+        if values is None:
+            return [f"注册表键不存在: {action.get('root')}\\{path}"]
+
+        drift = []
+        for value_info in action.get('values', []):
+            name = str(value_info.get('name') or '')
+            expected = value_info.get('value')
+            if name.lower() not in values:
+                drift.append(f"{name or '(默认)'}: 不存在 (期望 {expected})")
+                continue
+            current = values[name.lower()]
+            if value_info.get('type', 'REG_DWORD') == 'REG_DWORD':
+                matched = int(current) == int(expected)
+            elif value_info.get('type') == 'REG_BINARY':
+                matched = bytes(current) == (bytes.fromhex(expected) if isinstance(expected, str) else bytes(expected))
+            else:
+                matched = str(current) == str(expected)
+            if not matched:
+                drift.append(f"{name or '(默认)'}: {current} (期望 {expected})")
+        return drift
+
+    def export_state(self, tasks: List[Dict[str, Any]]) -> Dict[str, List[Tuple[str, str]]]:
+        """
+        导出任务涉及的注册表路径下的整棵子树，每棵子树为一个分区
+
+        嵌套的路径只导出最上层的一棵。记录键为小写的键路径与值名，以 NUL 分隔
+        （键本身记录为 键路径 + NUL，值为空），值为 "类型:数据"。
+        """
+        subtrees: Dict[str, Tuple[str, str]] = {}
+        for task in tasks:
+            action = task.get('action', {})
+            root, path = str(action.get('root')), str(action.get('path', '')).strip('\\')
+            if root in self.ROOT_KEYS and path:
+                subtrees.setdefault(f"{root}\\{path}".lower(), (root, path))
+
+        sections = {}
+        for name in sorted(subtrees):
+            if any(name.startswith(other + '\\') for other in subtrees if other != name):
+                continue
+            root, path = subtrees[name]
+            records: List[Tuple[str, str]] = []
+            self._export_subtree(self.ROOT_KEYS[root], f"{root}\\{path}", path, records)
+            sections[f"registry:{name}"] = records
+        return sections
+
+    def _export_subtree(self, root_key, display_path: str, path: str, records: List[Tuple[str, str]]):
+        """递归导出一个键（深度优先，不存在或无权读取的键被跳过）"""
+        if self.is_cancelled():
+            return
+        try:
+            key = winreg.OpenKey(root_key, path, 0, winreg.KEY_READ)
+        except OSError:
+            return
+        with key:
+            subkey_count, value_count, _ = winreg.QueryInfoKey(key)
+            prefix = display_path.lower() + '\0'
+            records.append((prefix, ''))
+            for index in range(value_count):
+                try:
+                    name, data, reg_type = winreg.EnumValue(key, index)
+                except OSError:
+                    continue
+                records.append((prefix + name.lower(), self._encode_value(reg_type, data)))
+            subkeys = []
+            for index in range(subkey_count):
+                try:
+                    subkeys.append(winreg.EnumKey(key, index))
+                except OSError:
+                    continue
+        for subkey in subkeys:
+            self._export_subtree(root_key, f"{display_path}\\{subkey}", f"{path}\\{subkey}", records)
+
+    @classmethod
+    def _encode_value(cls, reg_type: int, data: Any) -> str:
+        """注册表值 -> 快照中的 "类型:数据" 文本"""
+        type_name = cls.REG_TYPE_NAMES.get(reg_type, f"REG_{reg_type}")
+        if isinstance(data, bytes):
+            text = data.hex()
+        elif isinstance(data, list):
+            text = '\0'.join(str(item) for item in data)
+        else:
+            text = '' if data is None else str(data)
+        return f"{type_name}:{text}"
+
+    def change_markers(self, tasks: List[Dict[str, Any]]) -> Tuple[Dict[str, Optional[int]], None]:
+        """
+        以注册表键的最后写入时间作为变化标记，未变化的键无需读取值
+
+        Returns:
+            Tuple: (任务 id -> 最后写入时间 (键不存在时为 None), None)
+        """
+        stamps: Dict[Tuple[str, str], Optional[int]] = {}
+        markers: Dict[str, Optional[int]] = {}
+        for task in tasks:
+            action = task.get('action', {})
+            root, path = str(action.get('root')), str(action.get('path', ''))
+            key_id = (root, path.lower())
+            if key_id not in stamps:
+                stamps[key_id] = None
+                root_key = self.ROOT_KEYS.get(root)
+                if root_key is not None:
+                    try:
+                        with winreg.OpenKey(root_key, path, 0, winreg.KEY_READ) as key:
+                            stamps[key_id] = winreg.QueryInfoKey(key)[2]
+                    except FileNotFoundError:
+                        pass
+            markers[str(task.get('id'))] = stamps[key_id]
+        return markers, None
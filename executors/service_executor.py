@@ -1,16 +1,60 @@
 """
 服务执行器
 """
-import subprocess
-from typing import Dict, Any
-from executors.base_executor import BaseExecutor
-from utils.admin_check import require_admin
+import csv
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Any, Iterator, List, Optional, Set, Tuple
+from core.cancellation import OperationCancelled
+from core.service_graph import ServiceDependencyGraph
+from executors.base_executor import BaseExecutor, BatchResult
+from utils.admin_check import ADMIN
+from utils.command_runner import decode_output, run_command
 
 
 class ServiceExecutor(BaseExecutor):
     """Windows服务执行器"""
+
+    # 同一波内并行处理的最大服务数
+    MAX_PARALLEL = 8
+    # 等待服务进入 STOPPED 状态的超时时间 (秒)
+    STOP_TIMEOUT = 30
+    STOP_POLL_INTERVAL = 0.5
+    # sc stop 的返回码即 Win32 错误码；服务未启动 (ERROR_SERVICE_NOT_ACTIVE) 视为已停止
+    ERROR_SERVICE_NOT_ACTIVE = 1062
+
+    # 一次查询全部服务的启动类型与运行状态
+    QUERY_ALL_COMMAND = 'wmic service get Name,StartMode,State /format:csv'
+
+    # Win32_Service.StartMode / State -> 与 get_service_status 一致的显示值
+    START_MODE_LABELS = {'auto': '自动', 'manual': '手动', 'disabled': '禁用'}
+    STATE_LABELS = {'running': '正在运行', 'stopped': '已停止'}
+
+    # 任务目标启动类型 -> 期望的显示值
+    TARGET_STARTUP_LABELS = {
+        'disabled': '禁用',
+        'manual': '手动',
+        'demand': '手动',
+        'automatic': '自动',
+        'auto': '自动',
+        'delayed-auto': '自动',
+    }
+
+    def __init__(self, dependency_graph=None):
+        """
+        初始化执行器
+
+        Args:
+            dependency_graph: 服务依赖图，默认按需通过 WMI 加载
+        """
+        super().__init__()
+        self.dependency_graph = dependency_graph or ServiceDependencyGraph()
     
-    @require_admin
+    def required_privileges(self, task: Dict[str, Any]) -> Set[str]:
+        """修改服务配置与启停服务均需要管理员权限"""
+        return {ADMIN}
+
     def execute(self, task: Dict[str, Any]) -> bool:
         """
         执行服务配置任务
@@ -42,11 +86,12 @@ class ServiceExecutor(BaseExecutor):
             self.logger.info(f"服务 {service_name} 配置成功")
             return True
             
+        except OperationCancelled:
+            raise
         except Exception as e:
             self.logger.error(f"执行服务任务失败: {e}")
             return False
     
-    @require_admin
     def rollback(self, task: Dict[str, Any]) -> bool:
         """
         回滚服务配置
@@ -74,10 +119,94 @@ class ServiceExecutor(BaseExecutor):
             self.logger.error(f"回滚服务任务失败: {e}")
             return False
     
+    def execute_batch(self, tasks: List[Dict[str, Any]]) -> Iterator[BatchResult]:
+        """
+        按依赖关系分波并行执行服务任务
+
+        依赖方所在的波次先于被依赖方执行，保证停止被依赖服务时依赖方已停止；
+        同一波内的服务互不依赖，并行处理；同一服务的多个任务依次执行。
+
+        Args:
+            tasks: 服务任务列表
+
+        Returns:
+            Iterator[BatchResult]: 按完成顺序产出的结果
+        """
+        # 服务名不区分大小写，与依赖图一致按小写归并
+        by_service: Dict[str, List[Dict[str, Any]]] = {}
+        unnamed = []
+        for task in tasks:
+            service_name = task.get('action', {}).get('service_name')
+            if service_name:
+                by_service.setdefault(service_name.lower(), []).append(task)
+            else:
+                unnamed.append(task)
+
+        # 缺少服务名的任务直接走单任务路径，由 execute 报告错误
+        yield from super().execute_batch(unnamed)
+
+        waves = self.dependency_graph.stop_waves(by_service.keys())
+        with ThreadPoolExecutor(max_workers=self.MAX_PARALLEL, thread_name_prefix='service-wave') as pool:
+            for wave in waves:
+                if self.is_cancelled():
+                    return
+                self.logger.info(f"并行处理服务: {', '.join(wave)}")
+                # 不同服务并行，同一服务的多个任务在同一线程中按原顺序依次执行
+                futures = [pool.submit(self._execute_service_tasks, by_service[name.lower()])
+                           for name in wave]
+                # 等待整波完成后再进入下一波
+                for future in as_completed(futures):
+                    yield from future.result()
+
+    def _execute_service_tasks(self, tasks: List[Dict[str, Any]]) -> List[BatchResult]:
+        """依次执行同一服务的任务；取消后剩余任务不再执行（视为跳过）"""
+        results = []
+        for task in tasks:
+            result = self._execute_timed(task)
+            if result is None:
+                break
+            results.append(result)
+        return results
+
+    def _execute_timed(self, task: Dict[str, Any]) -> Optional[BatchResult]:
+        """执行单个任务并记录耗时；开始前已取消则返回 None（视为跳过）"""
+        if self.is_cancelled():
+            return None
+        start = time.perf_counter()
+        try:
+            success = self.execute(task)
+            return BatchResult(task, success, None, time.perf_counter() - start)
+        except Exception as e:
+            return BatchResult(task, False, str(e), time.perf_counter() - start)
+
     def _stop_service(self, service_name: str):
-        """停止服务"""
+        """停止服务，并等待其进入 STOPPED 状态以便后续依赖服务可以停止"""
+        if self.throttle is None:
+            self._stop_and_wait(service_name)
+            return
+        # 节流模式下限制同时停止的服务数，名额一直占用到服务真正停止
+        with self.throttle.stop_slot(self.cancel_token):
+            self._stop_and_wait(service_name)
+
+    def _stop_and_wait(self, service_name: str):
         cmd = f'sc stop "{service_name}"'
-        subprocess.run(cmd, shell=True, capture_output=True)
+        result = run_command(cmd, self.cancel_token, throttle=self.throttle)
+        if result.returncode == self.ERROR_SERVICE_NOT_ACTIVE:
+            return
+        if result.returncode != 0:
+            # 依赖服务仍在运行 (1051)、拒绝访问、超时等均为失败
+            raise Exception(f"SC 错误: {self._sc_message(result)}")
+
+        deadline = time.monotonic() + self.STOP_TIMEOUT
+        while time.monotonic() < deadline:
+            query = run_command(f'sc query "{service_name}"', self.cancel_token, throttle=self.throttle)
+            if b"STOPPED" in query.stdout:
+                return
+            if self.cancel_token is not None:
+                self.cancel_token.sleep(self.STOP_POLL_INTERVAL)
+            else:
+                time.sleep(self.STOP_POLL_INTERVAL)
+        self.logger.warning(f"等待服务 {service_name} 停止超时")
     
     def _set_startup_type(self, service_name: str, startup_type: str):
         """设置服务启动类型"""
@@ -92,11 +221,16 @@ class ServiceExecutor(BaseExecutor):
         real_type = mapping.get(startup_type.lower(), startup_type)
         
         cmd = f'sc config "{service_name}" start= {real_type}'
-        result = subprocess.run(cmd, shell=True, capture_output=True)
+        result = run_command(cmd, self.cancel_token, throttle=self.throttle)
         
         if result.returncode != 0:
-            error_msg = result.stderr.decode('gbk', errors='ignore').strip()
-            raise Exception(f"SC 错误: {error_msg}")
+            raise Exception(f"SC 错误: {self._sc_message(result)}")
+
+    @staticmethod
+    def _sc_message(result) -> str:
+        """sc 的错误信息（多数写在标准输出中），附带返回码"""
+        message = decode_output(result.stderr or b'').strip() or decode_output(result.stdout or b'').strip()
+        return f"{message} (返回码 {result.returncode})" if message else f"返回码 {result.returncode}"
 
 
     def get_service_status(self, service_name: str) -> Dict[str, str]:
@@ -110,23 +244,86 @@ class ServiceExecutor(BaseExecutor):
         try:
             # 获取状态
             query_cmd = f'sc query "{service_name}"'
-            result = subprocess.run(query_cmd, shell=True, capture_output=True, text=True)
-            if "STATE" in result.stdout:
-                if "RUNNING" in result.stdout:
+            output = run_command(query_cmd).stdout.decode('gbk', errors='ignore')
+            if "STATE" in output:
+                if "RUNNING" in output:
                     status_info['status'] = '正在运行'
-                elif "STOPPED" in result.stdout:
+                elif "STOPPED" in output:
                     status_info['status'] = '已停止'
 
             # 获取启动类型
             config_cmd = f'sc qc "{service_name}"'
-            result = subprocess.run(config_cmd, shell=True, capture_output=True, text=True)
-            if "START_TYPE" in result.stdout:
-                if "AUTO_START" in result.stdout:
+            output = run_command(config_cmd).stdout.decode('gbk', errors='ignore')
+            if "START_TYPE" in output:
+                if "AUTO_START" in output:
                     status_info['startup'] = '自动'
-                elif "DEMAND_START" in result.stdout:
+                elif "DEMAND_START" in output:
                     status_info['startup'] = '手动'
-                elif "DISABLED" in result.stdout:
+                elif "DISABLED" in output:
                     status_info['startup'] = '禁用'
         except Exception:
             pass
         return status_info
+
+    def query_all_services(self) -> Dict[str, Dict[str, str]]:
+        """
+        一次性查询全部服务的状态，替代逐个 `sc query` / `sc qc`
+
+        Returns:
+            Dict[str, Dict]: 小写服务名 -> 与 get_service_status 相同格式的状态
+        """
+        result = run_command(self.QUERY_ALL_COMMAND, self.cancel_token, throttle=self.throttle)
+        if result.returncode != 0:
+            raise RuntimeError(f"wmic 返回码 {result.returncode}")
+        return self.parse_service_table(decode_output(result.stdout))
+
+    @classmethod
+    def parse_service_table(cls, output: str) -> Dict[str, Dict[str, str]]:
+        """解析 `wmic service get Name,StartMode,State /format:csv` 的输出"""
+        services = {}
+        for row in csv.DictReader(io.StringIO(output.strip())):
+            name = (row.get('Name') or '').strip()
+            if not name:
+                continue
+            services[name.lower()] = {
+                'status': cls.STATE_LABELS.get((row.get('State') or '').strip().lower(), 'UNKNOWN'),
+                'startup': cls.START_MODE_LABELS.get((row.get('StartMode') or '').strip().lower(), 'unknown'),
+            }
+        return services
+
+    def read_state(self, tasks: List[Dict[str, Any]]) -> Dict[str, Dict[str, str]]:
+        """批量读取全部服务状态（一次 WMI 查询）"""
+        return self.query_all_services()
+
+    def check_state(self, task: Dict[str, Any], state: Dict[str, Dict[str, str]]) -> List[str]:
+        """对比服务的启动类型与运行状态"""
+        action = task.get('action', {})
+        service_name = action.get('service_name', '')
+        current = state.get(service_name.lower())
+        if current is None:
+            return [f"服务 {service_name} 不存在"]
+
+        drift = []
+        startup_type = action.get('startup_type')
+        expected = self.TARGET_STARTUP_LABELS.get(str(startup_type).lower()) if startup_type else None
+        if expected and current['startup'] != expected:
+            drift.append(f"启动类型: {current['startup']} (期望 {expected})")
+        if action.get('stop_service') and current['status'] == '正在运行':
+            drift.append("运行状态: 正在运行 (期望 已停止)")
+        return drift
+
+    def export_state(self, tasks: List[Dict[str, Any]]) -> Dict[str, List[Tuple[str, str]]]:
+        """导出全部服务（不限于任务涉及的服务）的启动类型与运行状态"""
+        return {'services': [
+            (name, f"{info['startup']}/{info['status']}") for name, info in self.query_all_services().items()
+        ]}
+
+    def change_markers(self, tasks: List[Dict[str, Any]]) -> Tuple[Dict[str, Any], Dict[str, Dict[str, str]]]:
+        """以服务快照中的状态条目作为变化标记，快照本身可直接用于校验"""
+        table = self.query_all_services()
+        markers = {}
+        for task in tasks:
+            service_name = str(task.get('action', {}).get('service_name', '')).lower()
+            entry = table.get(service_name)
+            markers[str(task.get('id'))] = (entry['status'], entry['startup']) if entry else None
+        return markers, table
@@ -9,6 +9,11 @@ from utils.logger import setup_logger
 
 def main():
     """主函数"""
+    # 打包后的程序由 cli 启动提权辅助进程时，以 "helper serve ..." 参数运行
+    if sys.argv[1:2] == ['helper']:
+        from cli import main as cli_main
+        sys.exit(cli_main())
+
     logger = setup_logger()
     
     # 检查管理员权限
@@ -0,0 +1,63 @@
+"""
+DriftWatcher 增量检查
+"""
+import unittest
+
+from core.drift_watch import DriftWatcher
+from core.executor import TaskExecutor
+from core.executor_registry import ExecutorRegistry
+from executors.base_executor import BaseExecutor
+
+
+class FakeExecutor(BaseExecutor):
+    """以字典模拟系统状态的执行器"""
+
+    def __init__(self, state):
+        super().__init__()
+        self.state = state
+        self.reads = 0
+
+    def execute(self, task):
+        return True
+
+    def rollback(self, task):
+        return True
+
+    def read_state(self, tasks):
+        self.reads += 1
+        return dict(self.state)
+
+    def check_state(self, task, state):
+        target = task['action']['value']
+        current = state.get(task['id'])
+        return [] if current == target else [f"{current} != {target}"]
+
+
+class DriftWatcherTest(unittest.TestCase):
+
+    def setUp(self):
+        self.first = FakeExecutor({'a': 1, 'c': 3})
+        self.second = FakeExecutor({'b': 2})
+        registry = ExecutorRegistry({'first': lambda: self.first, 'second': lambda: self.second}, discover=False)
+        # 类型交错排列，检查时同类型仍只读取一次状态
+        self.tasks = [
+            {'id': 'a', 'type': 'first', 'action': {'value': 1}},
+            {'id': 'b', 'type': 'second', 'action': {'value': 2}},
+            {'id': 'c', 'type': 'first', 'action': {'value': 3}},
+        ]
+        self.watcher = DriftWatcher(TaskExecutor(verify=False, executors=registry), self.tasks)
+
+    def test_no_drift(self):
+        self.assertEqual(self.watcher.find_drift(), [])
+        self.assertEqual(self.first.reads, 1)
+        self.assertEqual(self.second.reads, 1)
+
+    def test_reports_drifted_tasks(self):
+        self.first.state['c'] = 0
+        drifted = self.watcher.find_drift()
+        self.assertEqual([task['id'] for task, _ in drifted], ['c'])
+        self.assertEqual(drifted[0][1], ['0 != 3'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+"""
+辅助进程对请求的校验
+"""
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from multiprocessing import Pipe
+
+from core.elevated_helper import HelperServer, decode_frame, encode_frame
+from core.executor_registry import ExecutorRegistry
+from executors.base_executor import BaseExecutor
+from utils.admin_check import StaticPrivilegeProvider
+
+PROFILE = {
+    'profile': {'name': 'test', 'version': '1.0'},
+    'categories': {
+        'demo': {
+            'description': 'demo',
+            'tasks': [{'id': 'task_a', 'type': 'fake', 'description': 'A', 'action': {}}],
+        }
+    },
+}
+
+
+class FakeExecutor(BaseExecutor):
+
+    def __init__(self):
+        super().__init__()
+        self.executed = []
+
+    def execute(self, task):
+        self.executed.append(task['id'])
+        return True
+
+    def rollback(self, task):
+        return True
+
+
+class HelperServerRequestTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        path = os.path.join(self.tmp, 'profile.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(PROFILE, f)
+        self.fake = FakeExecutor()
+        self.server = HelperServer(
+            b'key', profile_path=path, idle_timeout=None,
+            executors=ExecutorRegistry({'fake': lambda: self.fake}, discover=False),
+            privileges=StaticPrivilegeProvider(),
+        )
+        self.client, server_conn = Pipe()
+        self.thread = threading.Thread(target=self.server._serve_connection, args=(server_conn,), daemon=True)
+        self.thread.start()
+
+    def tearDown(self):
+        self.client.send_bytes(encode_frame({'op': 'shutdown'}))
+        self.assertEqual(self._recv(), {'ok': True})
+        self.thread.join(timeout=5)
+        self.assertFalse(self.thread.is_alive())
+        self.client.close()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _recv(self):
+        self.assertTrue(self.client.poll(5))
+        return decode_frame(self.client.recv_bytes())
+
+    def _request(self, data: bytes):
+        self.client.send_bytes(data)
+        return self._recv()
+
+    def test_malformed_requests_get_error_replies(self):
+        requests = [
+            b'[1]',
+            b'not json',
+            encode_frame({'op': 'reboot'}),
+            encode_frame({'op': 'execute', 'task_ids': 'task_a'}),
+            encode_frame({'op': 'execute', 'task_ids': [1]}),
+            encode_frame({'op': 'execute', 'task_ids': ['task_a'], 'max_retries': None}),
+            encode_frame({'op': 'execute', 'task_ids': ['task_a'], 'verify': 'yes'}),
+            encode_frame({'op': 'execute', 'task_ids': ['task_a'], 'throttle': {'burst': 'x'}}),
+            encode_frame({'op': 'execute', 'task_ids': ['task_a'], 'preset': [1]}),
+            encode_frame({'op': 'rollback', 'task_ids': ['task_a'], 'preset': {'selections': {'demo': 5}}}),
+            encode_frame({'op': 'execute', 'task_ids': ['unknown']}),
+        ]
+        for data in requests:
+            with self.subTest(data=data):
+                self.assertIn('error', self._request(data))
+        self.assertEqual(self.fake.executed, [])
+        # 连接仍然可用
+        self.assertTrue(self._request(encode_frame({'op': 'ping'}))['ok'])
+
+    def test_execute_valid_request(self):
+        self.client.send_bytes(encode_frame({'op': 'execute', 'task_ids': ['task_a'], 'verify': False,
+                                             'profile_hash': self.server.profile_hash}))
+        while True:
+            reply = self._recv()
+            self.assertNotIn('error', reply)
+            if reply.get('done'):
+                break
+        self.assertEqual(self.fake.executed, ['task_a'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+"""
+内存映射日志读取
+"""
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+
+from utils.log_file import MappedLogFile
+
+LINES = [f"2024-01-01 00:00:{i:02d} - Test - {'ERROR' if i % 10 == 0 else 'INFO'} - line {i}" for i in range(50)]
+
+
+class MappedLogFileTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, True)
+        self.content = ('\n'.join(LINES) + '\n').encode('utf-8')
+
+    def check(self, path):
+        with MappedLogFile(path) as log_file:
+            self.assertEqual([line for _, line in log_file.lines_from(0, 3)], LINES[:3])
+            errors, _ = log_file.search(level='ERROR')
+            self.assertEqual([line for _, line in errors], LINES[::10])
+
+    def test_plain_log(self):
+        path = os.path.join(self.tmp, 'win10_optimize_a.log')
+        with open(path, 'wb') as f:
+            f.write(self.content)
+        self.check(path)
+
+    def test_compressed_log(self):
+        path = os.path.join(self.tmp, 'win10_optimize_a.log.gz')
+        with gzip.open(path, 'wb') as f:
+            f.write(self.content)
+        self.check(path)
+
+    def test_corrupt_compressed_log_raises_os_error(self):
+        path = os.path.join(self.tmp, 'win10_optimize_b.log.gz')
+        with open(path, 'wb') as f:
+            f.write(b'not gzip')
+        with self.assertRaises(OSError):
+            MappedLogFile(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
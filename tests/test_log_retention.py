@@ -0,0 +1,63 @@
+"""
+日志保留策略
+"""
+import gzip
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from utils.log_retention import LogRetention
+
+
+class LogRetentionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.log_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.log_dir, True)
+
+    def write_log(self, name, age_days=0.0, content=b'line\n'):
+        path = os.path.join(self.log_dir, name)
+        with open(path, 'wb') as f:
+            f.write(content)
+        mtime = time.time() - age_days * 86400
+        os.utime(path, (mtime, mtime))
+        return path
+
+    def test_compresses_old_logs_registered_by_other_instances(self):
+        LogRetention(self.log_dir).run()
+        old = self.write_log('win10_optimize_old.log', age_days=10)
+        # 两个进程分别登记各自的日志
+        LogRetention(self.log_dir).register(old)
+        current = self.write_log('win10_optimize_current.log')
+        LogRetention(self.log_dir).register(current)
+
+        stats = LogRetention(self.log_dir).run(current=current)
+        self.assertEqual(stats['compressed'], 1)
+        with gzip.open(old + '.gz', 'rb') as f:
+            self.assertEqual(f.read(), b'line\n')
+        self.assertTrue(os.path.exists(current))
+        self.assertFalse(os.path.exists(os.path.join(self.log_dir, LogRetention.JOURNAL_NAME)))
+
+    def test_removes_orphaned_temporary_files(self):
+        orphan = self.write_log('win10_optimize_x.log.gz.tmp')
+        LogRetention(self.log_dir).run()
+        self.assertFalse(os.path.exists(orphan))
+        # 已有清单时同样清理
+        orphan = self.write_log('win10_optimize_y.log.gz.tmp')
+        LogRetention(self.log_dir).run()
+        self.assertFalse(os.path.exists(orphan))
+
+    def test_skips_when_another_process_holds_the_lock(self):
+        self.write_log('win10_optimize_old.log', age_days=10)
+        holder = LogRetention(self.log_dir)
+        with holder._process_lock() as locked:
+            self.assertTrue(locked)
+            stats = LogRetention(self.log_dir).run()
+        self.assertEqual(stats, {'compressed': 0, 'deleted': 0})
+        self.assertEqual(LogRetention(self.log_dir).run()['compressed'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
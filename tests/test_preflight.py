@@ -0,0 +1,75 @@
+"""
+执行前权限预检（注入固定权限来源，可在非 Windows 平台运行）
+"""
+import unittest
+
+from core.events import RunFinished, TaskSkipped, TaskSucceeded
+from core.executor import TaskExecutor
+from core.executor_registry import ExecutorRegistry
+from executors.base_executor import BaseExecutor
+from utils.admin_check import ADMIN, StaticPrivilegeProvider
+
+
+class AdminExecutor(BaseExecutor):
+    """需要管理员权限的执行器，记录被调用的任务"""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    def required_privileges(self, task):
+        return {ADMIN}
+
+    def execute(self, task):
+        self.calls.append(('execute', task['id']))
+        return True
+
+    def rollback(self, task):
+        self.calls.append(('rollback', task['id']))
+        return True
+
+
+class PreflightTest(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = AdminExecutor()
+        self.tasks = [
+            {'id': 'a', 'type': 'admin'},
+            {'id': 'b', 'type': 'admin', 'requires': ['SeBackupPrivilege']},
+        ]
+
+    def executor(self, provider):
+        registry = ExecutorRegistry({'admin': lambda: self.backend}, discover=False)
+        return TaskExecutor(verify=False, executors=registry, privileges=provider)
+
+    def test_report_lists_missing_privileges(self):
+        report = self.executor(StaticPrivilegeProvider(admin=False)).preflight.check(self.tasks)
+        self.assertFalse(report.ok)
+        self.assertEqual(report.missing, {ADMIN: ['a', 'b'], 'SeBackupPrivilege': ['b']})
+
+    def test_execute_skips_everything_when_privileges_are_missing(self):
+        events = list(self.executor(StaticPrivilegeProvider(admin=True)).iter_execute(self.tasks))
+        skipped = [event.task_id for event in events if isinstance(event, TaskSkipped)]
+        self.assertEqual(skipped, ['a', 'b'])
+        finished = events[-1]
+        self.assertIsInstance(finished, RunFinished)
+        self.assertTrue(finished.cancelled)
+        self.assertIn('SeBackupPrivilege', finished.reason)
+        self.assertEqual(self.backend.calls, [])
+
+    def test_execute_runs_with_all_privileges(self):
+        provider = StaticPrivilegeProvider(admin=True, privileges=['SeBackupPrivilege'])
+        events = list(self.executor(provider).iter_execute(self.tasks))
+        self.assertEqual([event.task_id for event in events if isinstance(event, TaskSucceeded)], ['a', 'b'])
+
+    def test_rollback_logs_reason_and_fails_all(self):
+        executor = self.executor(StaticPrivilegeProvider(admin=False))
+        with self.assertLogs('TaskExecutor', level='ERROR') as logs:
+            stats = executor.rollback_tasks(self.tasks)
+        self.assertEqual(stats, {'success': 0, 'failed': 2})
+        self.assertIn('管理员权限', '\n'.join(logs.output))
+        self.assertEqual(self.backend.calls, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
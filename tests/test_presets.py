@@ -0,0 +1,46 @@
+"""
+选择预设的校验
+"""
+import unittest
+
+from core.presets import SelectionPreset
+
+
+class SelectionPresetFromDictTest(unittest.TestCase):
+
+    def test_valid_preset(self):
+        preset = SelectionPreset.from_dict({
+            'version': SelectionPreset.VERSION,
+            'selections': {'services': [{'id': 'disable_diagtrack', 'target': 'Manual'}]},
+            'update_pause_days': 7,
+            'bandwidth_limit': 20,
+        })
+        self.assertEqual(preset.selections['services'][0]['id'], 'disable_diagtrack')
+        self.assertEqual(preset.update_pause_days, 7)
+        self.assertEqual(preset.bandwidth_limit, 20)
+
+    def test_invalid_input_raises_value_error(self):
+        invalid = [
+            [],
+            {'version': '2'},
+            {'version': True},
+            {'version': SelectionPreset.VERSION + 1},
+            {'selections': []},
+            {'selections': {'a': 5}},
+            {'selections': {'a': ['x']}},
+            {'selections': {'a': [{'target': 'disabled'}]}},
+            {'selections': {'a': [{'id': 1}]}},
+            {'selections': {'a': [{'id': 'x', 'target': ['disabled']}]}},
+            {'selections': {'a': [{'id': 'x', 'target': 'disabled & calc'}]}},
+            {'update_pause_days': -1},
+            {'bandwidth_limit': 101},
+            {'tcp_level': 'fast'},
+        ]
+        for data in invalid:
+            with self.subTest(data=data):
+                with self.assertRaises(ValueError):
+                    SelectionPreset.from_dict(data)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+"""
+服务执行器的分波调度与 sc 返回码处理
+"""
+import subprocess
+import threading
+import time
+import unittest
+from unittest import mock
+
+from core.service_graph import ServiceDependencyGraph, StaticServiceBackend
+from executors.service_executor import ServiceExecutor
+
+
+def service_task(task_id, service_name):
+    return {'id': task_id, 'type': 'service', 'action': {'service_name': service_name}}
+
+
+class RecordingServiceExecutor(ServiceExecutor):
+    """不调用 sc，记录每个任务的开始与结束顺序"""
+
+    def __init__(self, dependencies):
+        super().__init__(ServiceDependencyGraph(StaticServiceBackend(dependencies)))
+        self._lock = threading.Lock()
+        self.log = []
+
+    def execute(self, task):
+        with self._lock:
+            self.log.append(('start', task['id']))
+        time.sleep(0.02)
+        with self._lock:
+            self.log.append(('end', task['id']))
+        return True
+
+
+class ExecuteBatchTest(unittest.TestCase):
+
+    def test_waves_and_same_service_order(self):
+        executor = RecordingServiceExecutor({'Dependent': ['Base']})
+        tasks = [
+            service_task('base', 'Base'),
+            service_task('dependent_1', 'Dependent'),
+            service_task('other', 'Other'),
+            service_task('dependent_2', 'dependent'),
+        ]
+        results = list(executor.execute_batch(tasks))
+        self.assertEqual(sorted(result.task['id'] for result in results),
+                         ['base', 'dependent_1', 'dependent_2', 'other'])
+        self.assertTrue(all(result.success for result in results))
+
+        position = {entry: i for i, entry in enumerate(executor.log)}
+        # 依赖方（不论大小写）全部结束后才开始停止被依赖的服务
+        self.assertLess(position[('end', 'dependent_1')], position[('start', 'base')])
+        self.assertLess(position[('end', 'dependent_2')], position[('start', 'base')])
+        # 同一服务的任务按原顺序依次执行，不重叠
+        self.assertLess(position[('end', 'dependent_1')], position[('start', 'dependent_2')])
+
+    def test_task_without_service_name_fails(self):
+        executor = ServiceExecutor(ServiceDependencyGraph(StaticServiceBackend({})))
+        results = list(executor.execute_batch([{'id': 'broken', 'type': 'service', 'action': {}}]))
+        self.assertEqual([(result.task['id'], result.success) for result in results], [('broken', False)])
+
+
+class StopServiceTest(unittest.TestCase):
+
+    def run_stop(self, returncode, stdout=b''):
+        executor = ServiceExecutor(ServiceDependencyGraph(StaticServiceBackend({})))
+        completed = subprocess.CompletedProcess('sc stop', returncode, stdout, b'')
+        with mock.patch('executors.service_executor.run_command', return_value=completed) as run:
+            executor._stop_and_wait('Spooler')
+        return run
+
+    def test_service_not_active_is_benign(self):
+        run = self.run_stop(ServiceExecutor.ERROR_SERVICE_NOT_ACTIVE)
+        self.assertEqual(run.call_count, 1)
+
+    def test_other_errors_raise(self):
+        for code in (5, 1051, 1053):
+            with self.subTest(code=code):
+                with self.assertRaisesRegex(Exception, 'SC 错误'):
+                    self.run_stop(code, b'[SC] ControlService FAILED')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+"""
+服务依赖图的停止顺序
+"""
+import unittest
+
+from core.service_graph import ServiceDependencyGraph, StaticServiceBackend
+
+
+class StopWavesTest(unittest.TestCase):
+
+    def graph(self, dependencies):
+        return ServiceDependencyGraph(StaticServiceBackend(dependencies))
+
+    def test_dependents_stop_first(self):
+        # Dependent -> Middle -> Base：依赖方先停止
+        graph = self.graph({'Dependent': ['Middle'], 'Middle': ['Base']})
+        self.assertEqual(graph.stop_waves(['Base', 'Middle', 'Dependent']),
+                         [['Dependent'], ['Middle'], ['Base']])
+
+    def test_independent_services_share_a_wave(self):
+        graph = self.graph({'A': ['Base'], 'B': ['Base']})
+        self.assertEqual(graph.stop_waves(['Base', 'A', 'B', 'Other']),
+                         [['A', 'B', 'Other'], ['Base']])
+
+    def test_indirect_dependency_through_unselected_service(self):
+        # Top 经由未选中的 Middle 依赖 Base
+        graph = self.graph({'Top': ['Middle'], 'Middle': ['Base']})
+        self.assertEqual(graph.stop_waves(['Base', 'Top']), [['Top'], ['Base']])
+
+    def test_names_are_case_insensitive(self):
+        graph = self.graph({'lanmanworkstation': ['mrxsmb']})
+        self.assertEqual(graph.stop_waves(['MRxSmb', 'LanmanWorkstation', 'mrxsmb']),
+                         [['LanmanWorkstation'], ['MRxSmb']])
+
+    def test_cycle_ends_in_single_wave(self):
+        graph = self.graph({'A': ['B'], 'B': ['A']})
+        self.assertEqual(graph.stop_waves(['A', 'B']), [['A', 'B']])
+
+
+if __name__ == '__main__':
+    unittest.main()
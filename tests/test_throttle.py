@@ -0,0 +1,65 @@
+"""
+节流模式下进程优先级的降低与恢复
+"""
+import unittest
+from unittest import mock
+
+from core.executor import TaskExecutor
+from core.executor_registry import ExecutorRegistry
+from core.throttle import ResourceThrottle, ThrottleSettings
+from executors.base_executor import BaseExecutor
+from utils.admin_check import StaticPrivilegeProvider
+
+
+class NoopExecutor(BaseExecutor):
+
+    def execute(self, task):
+        return True
+
+    def rollback(self, task):
+        return True
+
+
+class PriorityRestoreTest(unittest.TestCase):
+
+    def setUp(self):
+        lower = mock.patch('core.throttle.lower_process_priority', return_value=('previous', 0))
+        restore = mock.patch('core.throttle.restore_process_priority', return_value=True)
+        self.lower = lower.start()
+        self.restore = restore.start()
+        self.addCleanup(lower.stop)
+        self.addCleanup(restore.stop)
+        self.executor = TaskExecutor(
+            verify=False,
+            executors=ExecutorRegistry({'noop': NoopExecutor}, discover=False),
+            privileges=StaticPrivilegeProvider(),
+            throttle=ResourceThrottle(ThrottleSettings(spawns_per_second=0, cpu_threshold=1.0)),
+        )
+        self.tasks = [{'id': 'a', 'type': 'noop'}, {'id': 'b', 'type': 'noop'}]
+
+    def test_execute_restores_priority(self):
+        list(self.executor.iter_execute(self.tasks))
+        self.lower.assert_called_once()
+        self.restore.assert_called_once_with(('previous', 0))
+
+    def test_closing_event_stream_restores_priority(self):
+        events = self.executor.iter_execute(self.tasks)
+        next(events)
+        next(events)
+        events.close()
+        self.restore.assert_called_once_with(('previous', 0))
+
+    def test_rollback_restores_priority(self):
+        self.assertEqual(self.executor.rollback_tasks(self.tasks), {'success': 2, 'failed': 0})
+        self.restore.assert_called_once_with(('previous', 0))
+
+    def test_unthrottled_settings_leave_priority_alone(self):
+        throttle = ResourceThrottle(ThrottleSettings(low_priority=False))
+        throttle.enter()
+        throttle.exit()
+        self.lower.assert_not_called()
+        self.restore.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,8 +5,10 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import logging
 import winreg
-import subprocess
 import os
+from core.executor import TaskExecutor
+from core.host_facts import HostFacts
+from core.presets import TCP_LEVELS, build_tcp_task
 
 
 class NetworkConfigSelector(ttk.Frame):
@@ -15,13 +17,15 @@ class NetworkConfigSelector(ttk.Frame):
     REG_PATH = r"SOFTWARE\Policies\Microsoft\Windows\Psched"
     REG_VALUE_NAME = "NonBestEffortLimit"
 
-    def __init__(self, parent, parser, on_back=None, on_next=None, on_apply=None):
+    def __init__(self, parent, parser, on_back=None, on_next=None, on_apply=None, host_facts=None):
         super().__init__(parent)
         self.logger = logging.getLogger('NetworkConfigSelector')
         self.parser = parser
         self.on_back = on_back
         self.on_next = on_next
         self.on_apply = on_apply
+        self.executor = TaskExecutor()
+        self.host_facts = host_facts or HostFacts()
         
         self.total_ram_gb = self._get_total_ram()
         self._create_ui()
@@ -29,13 +33,8 @@ class NetworkConfigSelector(ttk.Frame):
 
     def _get_total_ram(self):
         """获取系统总内存 (GB)"""
-        try:
-            # 使用 wmic 获取内存字节数
-            output = subprocess.check_output('wmic computersystem get totalphysicalmemory', shell=True).decode()
-            memory_bytes = int(output.split('\n')[1].strip())
-            return memory_bytes / (1024**3)
-        except Exception:
-            return 8.0  # 默认假设 8G
+        ram_gb = self.host_facts.get('ram_gb')
+        return ram_gb if ram_gb is not None else 8.0  # 默认假设 8G
 
     def _create_ui(self):
         """创建专门的设置界面"""
@@ -160,17 +159,15 @@ class NetworkConfigSelector(ttk.Frame):
         except Exception:
             self.bw_current_label.config(text="当前设置: 查询失败")
 
-        # 加载 TCP 级别 (通过 netsh 判定)
+        # 加载 TCP 级别 (通过网络执行器一次读取 netsh 全局参数)
         try:
-            output = subprocess.check_output('netsh int tcp show global', shell=True).decode('gbk')
-            if "normal" in output or "常规" in output:
-                self.tcp_current_label.config(text="当前设置: 级别 1 (normal)")
-            elif "experimental" in output or "实验性" in output:
-                self.tcp_current_label.config(text="当前设置: 级别 2 (experimental)")
-            elif "disabled" in output or "禁用" in output:
-                self.tcp_current_label.config(text="当前设置: 级别 0 (disabled)")
-            else:
-                self.tcp_current_label.config(text="当前设置: 其他/未知")
+            level = self.executor.executors['network'].get_current_values().get('autotuninglevel')
+            level_text = {
+                "normal": "级别 1 (normal)",
+                "experimental": "级别 2 (experimental)",
+                "disabled": "级别 0 (disabled)",
+            }.get(str(level), "其他/未知")
+            self.tcp_current_label.config(text=f"当前设置: {level_text}")
         except Exception:
             self.tcp_current_label.config(text="当前设置: 查询失败")
 
@@ -185,8 +182,9 @@ class NetworkConfigSelector(ttk.Frame):
 
             # 2. 应用 TCP 级别
             tcp_level = self.tcp_level_var.get()
-            tcp_cmd_val = {"0": "disabled", "1": "normal", "2": "experimental"}[tcp_level]
-            subprocess.check_call(f'netsh int tcp set global autotuninglevel={tcp_cmd_val}', shell=True)
+            stats = self.executor.execute_tasks([build_tcp_task(TCP_LEVELS[tcp_level])])
+            if stats['failed']:
+                raise RuntimeError("TCP 吞吐量级别设置失败，详情请查看日志")
 
             # 3. 回调通知主窗口保存
             if self.on_apply:
@@ -0,0 +1,205 @@
+"""
+历史日志查看器UI
+"""
+import tkinter as tk
+from tkinter import ttk, messagebox
+import glob
+import logging
+import os
+from typing import List, Optional, Tuple
+from utils.log_file import MappedLogFile
+
+
+class LogViewer(tk.Toplevel):
+    """
+    历史日志查看窗口
+
+    文本框中只保留当前一页的行，滚动条位置按字节偏移换算，拖动到任意位置
+    只需 rfind 找到行首即可渲染，无需读取之前的内容。
+    """
+
+    # 每页渲染的行数
+    PAGE_LINES = 40
+    # 鼠标滚轮每格滚动的行数
+    WHEEL_LINES = 3
+    LEVEL_OPTIONS = ("全部级别", "INFO", "WARNING", "ERROR")
+
+    def __init__(self, parent, log_dir: str = "logs"):
+        """
+        初始化日志查看器
+
+        Args:
+            parent: 父窗口
+            log_dir: 日志目录
+        """
+        super().__init__(parent)
+        self.logger = logging.getLogger('LogViewer')
+        self.title("历史日志")
+        self.geometry("900x600")
+        self.log_dir = log_dir
+        self.log_file: Optional[MappedLogFile] = None
+        # 当前页首行的字节偏移
+        self._top = 0
+        # 过滤模式下各页的检索起点，以及下一页的起点
+        self._filter_starts: List[int] = []
+        self._filter_next: Optional[int] = None
+
+        self._create_ui()
+        self._load_file_list()
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+
+    def _create_ui(self):
+        """创建UI组件"""
+        toolbar = ttk.Frame(self, padding=5)
+        toolbar.pack(fill=tk.X)
+
+        ttk.Label(toolbar, text="日志文件:").pack(side=tk.LEFT)
+        self.file_var = tk.StringVar()
+        self.file_combo = ttk.Combobox(toolbar, textvariable=self.file_var, state='readonly', width=40)
+        self.file_combo.pack(side=tk.LEFT, padx=5)
+        self.file_combo.bind('<<ComboboxSelected>>', lambda e: self._open_selected())
+
+        self.level_var = tk.StringVar(value=self.LEVEL_OPTIONS[0])
+        level_combo = ttk.Combobox(toolbar, textvariable=self.level_var, values=self.LEVEL_OPTIONS,
+                                   state='readonly', width=10)
+        level_combo.pack(side=tk.LEFT, padx=5)
+        level_combo.bind('<<ComboboxSelected>>', lambda e: self._apply_filter())
+
+        self.search_var = tk.StringVar()
+        search_entry = ttk.Entry(toolbar, textvariable=self.search_var, width=20)
+        search_entry.pack(side=tk.LEFT, padx=5)
+        search_entry.bind('<Return>', lambda e: self._apply_filter())
+        ttk.Button(toolbar, text="搜索", command=self._apply_filter).pack(side=tk.LEFT)
+
+        text_frame = ttk.Frame(self)
+        text_frame.pack(fill=tk.BOTH, expand=True, padx=5)
+        self.text = tk.Text(text_frame, wrap=tk.NONE, font=('Consolas', 9), state='disabled')
+        self.scrollbar = ttk.Scrollbar(text_frame, orient=tk.VERTICAL, command=self._on_scroll)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.text.tag_config("ERROR", foreground="red")
+        self.text.tag_config("WARNING", foreground="#cc6600")
+        self.text.bind('<MouseWheel>', self._on_wheel)
+
+        nav_frame = ttk.Frame(self, padding=5)
+        nav_frame.pack(fill=tk.X)
+        ttk.Button(nav_frame, text="首页", command=lambda: self._on_scroll('moveto', 0)).pack(side=tk.LEFT)
+        ttk.Button(nav_frame, text="上一页", command=lambda: self._on_scroll('scroll', -1, 'pages')).pack(side=tk.LEFT, padx=5)
+        ttk.Button(nav_frame, text="下一页", command=lambda: self._on_scroll('scroll', 1, 'pages')).pack(side=tk.LEFT)
+        ttk.Button(nav_frame, text="末页", command=lambda: self._on_scroll('moveto', 1)).pack(side=tk.LEFT, padx=5)
+        self.status_label = ttk.Label(nav_frame, text="")
+        self.status_label.pack(side=tk.RIGHT)
+
+    def _load_file_list(self):
+        """列出日志目录中的日志文件（含保留策略压缩的 .log.gz，最新的在前）"""
+        files = glob.glob(os.path.join(self.log_dir, "*.log")) + glob.glob(os.path.join(self.log_dir, "*.log.gz"))
+        files.sort(key=os.path.getmtime, reverse=True)
+        self.file_combo['values'] = [os.path.basename(f) for f in files]
+        if files:
+            self.file_combo.current(0)
+            self._open_selected()
+        else:
+            self.status_label.config(text="没有日志文件")
+
+    def _open_selected(self):
+        """映射选中的日志文件并显示第一页"""
+        if self.log_file is not None:
+            self.log_file.close()
+            self.log_file = None
+        path = os.path.join(self.log_dir, self.file_var.get())
+        try:
+            self.log_file = MappedLogFile(path)
+        except OSError as e:
+            messagebox.showerror("错误", f"无法打开日志文件: {e}", parent=self)
+            return
+        self._top = 0
+        self._apply_filter()
+
+    @property
+    def _filtering(self) -> bool:
+        return bool(self.search_var.get()) or self.level_var.get() != self.LEVEL_OPTIONS[0]
+
+    def _apply_filter(self):
+        """过滤条件变化后从文件开头重新检索"""
+        self._filter_starts = [0]
+        self._render()
+
+    def _on_scroll(self, action, amount=None, unit=None):
+        """滚动条、翻页按钮与滚轮的统一入口"""
+        log_file = self.log_file
+        if log_file is None:
+            return
+        if self._filtering:
+            # 过滤结果只能逐页前后翻动
+            if action == 'moveto':
+                self._filter_starts = self._filter_starts[:1]
+            elif int(amount) > 0 and self._filter_next is not None:
+                self._filter_starts.append(self._filter_next)
+            elif int(amount) < 0 and len(self._filter_starts) > 1:
+                self._filter_starts.pop()
+            self._render()
+            return
+
+        if action == 'moveto':
+            fraction = float(amount)
+            if fraction >= 1:
+                lines = log_file.lines_before(log_file.size, self.PAGE_LINES)
+                self._top = lines[0][0] if lines else 0
+            else:
+                self._top = log_file.line_start(int(max(fraction, 0) * log_file.size))
+        else:
+            count = int(amount) * (self.PAGE_LINES if unit == 'pages' else 1)
+            if count > 0:
+                lines = log_file.lines_from(self._top, count + self.PAGE_LINES)
+                # 已到末尾时保持最后一页完整显示
+                index = min(count, max(len(lines) - self.PAGE_LINES, 0))
+                if lines:
+                    self._top = lines[index][0]
+            elif count < 0:
+                lines = log_file.lines_before(self._top, -count)
+                if lines:
+                    self._top = lines[0][0]
+        self._render()
+
+    def _on_wheel(self, event):
+        self._on_scroll('scroll', -self.WHEEL_LINES if event.delta > 0 else self.WHEEL_LINES, 'units')
+        return "break"
+
+    def _render(self):
+        """只渲染当前一页"""
+        log_file = self.log_file
+        if log_file is None:
+            return
+        if self._filtering:
+            level = self.level_var.get()
+            start = self._filter_starts[-1]
+            lines, self._filter_next = log_file.search(
+                self.search_var.get(), None if level == self.LEVEL_OPTIONS[0] else level,
+                start, self.PAGE_LINES
+            )
+            end = self._filter_next if self._filter_next is not None else log_file.size
+            self.status_label.config(text=f"匹配结果第 {len(self._filter_starts)} 页")
+        else:
+            lines = log_file.lines_from(self._top, self.PAGE_LINES)
+            start = self._top
+            end = log_file.size if len(lines) < self.PAGE_LINES else lines[-1][0]
+            line_number = log_file.line_number(self._top)
+            position = f"第 {line_number + 1} 行" if line_number is not None else f"{self._top * 100 // max(log_file.size, 1)}%"
+            self.status_label.config(text=f"{position} / 约 {log_file.estimated_line_count()} 行")
+
+        self._show_lines(lines)
+        size = max(log_file.size, 1)
+        self.scrollbar.set(start / size, end / size)
+
+    def _show_lines(self, lines: List[Tuple[int, str]]):
+        self.text.config(state='normal')
+        self.text.delete('1.0', tk.END)
+        for _, line in lines:
+            tag = next((level for level in ("ERROR", "WARNING") if f" - {level} - " in line), None)
+            self.text.insert(tk.END, line + "\n", tag)
+        self.text.config(state='disabled')
+
+    def _on_close(self):
+        if self.log_file is not None:
+            self.log_file.close()
+        self.destroy()
@@ -2,24 +2,40 @@
 主窗口UI
 """
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 import logging
 from core.profile_parser import ProfileParser
+from core.profile_watcher import ProfileWatcher
+from core.presets import SelectionPreset
 from core.system_checker import SystemChecker
+from core.host_facts import HostFacts
+from core.status_cache import ServiceStatusCache
+from executors.service_executor import ServiceExecutor
 from ui.task_selector import TaskSelector
 from ui.update_pause_selector import UpdatePauseSelector
 from ui.bandwidth_selector import NetworkConfigSelector
+from ui.log_viewer import LogViewer
+from ui.stall_watchdog import StallWatchdog
 
 
 class MainWindow:
 
     """主窗口类"""
+
+    # 检查配置文件变化的间隔 (毫秒)
+    PROFILE_POLL_MS = 1000
+    # 事件循环阻塞超过该时长 (秒) 时记录主线程调用栈
+    STALL_THRESHOLD = 0.2
+    STALL_METRICS_PATH = 'logs/ui_stalls.json'
     
     def __init__(self):
         """初始化主窗口"""
         self.logger = logging.getLogger('MainWindow')
         self.root = tk.Tk()
         self.root.title("Win10 优化工具")
+        # 启动阶段（加载配置、首个分类的服务状态）也在监测范围内
+        self.stall_watchdog = StallWatchdog(self.root, threshold=self.STALL_THRESHOLD)
+        self.stall_watchdog.start()
         
         # 设置窗口大小并居中
         window_width = 700
@@ -39,6 +55,10 @@ class MainWindow:
         self.parser = ProfileParser()
         self.task_selector = None
         self.selected_tasks_cache = {}  # 用于在界面切换时保持状态
+        # 服务状态缓存在各步骤的 TaskSelector 之间共享
+        self.status_cache = ServiceStatusCache(ServiceExecutor())
+        # 主机事实按需采集一次，供任务条件与网络推荐共用
+        self.host_facts = HostFacts()
         
         # 创建UI
         self._create_ui()
@@ -82,6 +102,24 @@ class MainWindow:
             command=self.root.quit
         ).pack(side=tk.RIGHT, padx=5)
 
+        ttk.Button(
+            button_frame,
+            text="导出预设",
+            command=self._export_preset
+        ).pack(side=tk.RIGHT, padx=5)
+
+        ttk.Button(
+            button_frame,
+            text="导入预设",
+            command=self._import_preset
+        ).pack(side=tk.RIGHT, padx=5)
+
+        ttk.Button(
+            button_frame,
+            text="查看日志",
+            command=lambda: LogViewer(self.root)
+        ).pack(side=tk.RIGHT, padx=5)
+
     
     def _load_profile(self):
         """加载配置文件"""
@@ -111,6 +149,21 @@ class MainWindow:
         
         # 默认显示任务选择器（第一步）
         self._show_task_selector()
+
+        # 编辑配置文件后无需重启即可生效
+        self.profile_watcher = ProfileWatcher(self.parser)
+        self.root.after(self.PROFILE_POLL_MS, self._poll_profile)
+
+    def _poll_profile(self):
+        """配置变化时重新加载，按任务 id 保留已有选择并刷新当前界面"""
+        changed = self.profile_watcher.poll()
+        if changed:
+            TaskSelector.remap_selections(self.selected_tasks_cache, self.parser, changed)
+            if self.task_selector is not None and self.task_selector.winfo_exists():
+                self.task_selector.refresh_categories(changed)
+            profile_info = self.parser.get_profile_info()
+            self.info_label.config(text=f"{profile_info.get('name', '')} v{profile_info.get('version', '')}")
+        self.root.after(self.PROFILE_POLL_MS, self._poll_profile)
     
     def _clear_content(self):
         """清空内容区"""
@@ -125,7 +178,9 @@ class MainWindow:
             self.content_frame, 
             self.parser, 
             initial_selections=self.selected_tasks_cache,
-            initial_index=index
+            initial_index=index,
+            status_cache=self.status_cache,
+            host_facts=self.host_facts
         )
         self.task_selector.pack(fill=tk.BOTH, expand=True)
         # 注入下一步的路由逻辑：当所有分类完成时，跳转到更新暂停界面
@@ -138,6 +193,8 @@ class MainWindow:
             self.task_selector._save_selection()
             # 显式复制选择内容，防止引用丢失或被后续实例误删
             self.selected_tasks_cache.update(self.task_selector.selected_tasks.copy())
+            # 用户配置更新与网络策略期间，后台预取总结界面所需的服务状态
+            self.task_selector._prefetch_next()
             
         self._clear_content()
         update_selector = UpdatePauseSelector(
@@ -157,7 +214,8 @@ class MainWindow:
             self.parser,
             on_back=self._show_update_pause_selector,
             on_next=self._show_summary_from_update,
-            on_apply=self._save_bandwidth_policy
+            on_apply=self._save_bandwidth_policy,
+            host_facts=self.host_facts
         )
         bandwidth_selector.pack(fill=tk.BOTH, expand=True)
 
@@ -168,7 +226,8 @@ class MainWindow:
             'index': 0,
             'target': f"{days} 天",
             'is_registry': True,
-            'description': f"Windows 更新最大暂停天数 -> {days}"
+            'description': f"Windows 更新最大暂停天数 -> {days}",
+            'value': days
         }
         # 使用 update 确保不覆盖已有的服务选择
         self.selected_tasks_cache["更新策略"] = [update_task]
@@ -182,7 +241,9 @@ class MainWindow:
             'index': 0,
             'target': f"{limit}%",
             'is_registry': True,
-            'description': f"系统保留带宽限制 -> {limit}%"
+            'description': f"系统保留带宽限制 -> {limit}%",
+            'setting': 'bandwidth_limit',
+            'value': limit
         })
         
         # 2. TCP 吞吐量任务
@@ -192,7 +253,9 @@ class MainWindow:
                 'index': 1,
                 'target': level_name,
                 'is_registry': True,
-                'description': f"入站 TCP 吞吐量级别 -> {level_name}"
+                'description': f"入站 TCP 吞吐量级别 -> {level_name}",
+                'setting': 'tcp_level',
+                'value': tcp_level
             })
             
         self.selected_tasks_cache["网络配置"] = tasks
@@ -208,7 +271,9 @@ class MainWindow:
             self.content_frame, 
             self.parser, 
             initial_selections=self.selected_tasks_cache,
-            initial_index=len(categories)
+            initial_index=len(categories),
+            status_cache=self.status_cache,
+            host_facts=self.host_facts
         )
         self.task_selector.pack(fill=tk.BOTH, expand=True)
         
@@ -224,6 +289,53 @@ class MainWindow:
         self.task_selector.prev_btn.config(command=self._show_bandwidth_selector)
 
 
+    def _export_preset(self):
+        """将当前向导中的选择保存为预设文件"""
+        if self.task_selector is not None and self.task_selector.winfo_exists() \
+                and not self.task_selector._executing:
+            self.task_selector._save_selection()
+            self.selected_tasks_cache.update(self.task_selector.selected_tasks)
+        if not any(self.selected_tasks_cache.values()):
+            messagebox.showinfo("提示", "尚未选择任何优化任务")
+            return
+        path = filedialog.asksaveasfilename(
+            title="导出预设", defaultextension=".json",
+            initialdir="presets", filetypes=[("预设文件", "*.json")]
+        )
+        if not path:
+            return
+        try:
+            SelectionPreset.from_wizard(self.selected_tasks_cache, self.parser).save(path)
+            self.logger.info(f"已导出预设: {path}")
+        except OSError as e:
+            messagebox.showerror("错误", f"导出预设失败: {e}")
+
+    def _import_preset(self):
+        """载入预设文件并直接进入总结界面，跳过逐步选择与状态查询"""
+        path = filedialog.askopenfilename(
+            title="导入预设", initialdir="presets", filetypes=[("预设文件", "*.json")]
+        )
+        if not path:
+            return
+        try:
+            preset = SelectionPreset.load(path)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("错误", f"导入预设失败: {e}")
+            return
+        self.logger.info(f"已导入预设: {path}")
+        self.selected_tasks_cache.clear()
+        self.selected_tasks_cache.update(preset.to_wizard(self.parser))
+        self._show_summary_from_update()
+
     def run(self):
         """运行主窗口"""
-        self.root.mainloop()
+        try:
+            self.root.mainloop()
+        finally:
+            self.status_cache.close()
+            self.stall_watchdog.stop()
+            if self.stall_watchdog.stalls:
+                try:
+                    self.stall_watchdog.write(self.STALL_METRICS_PATH)
+                except OSError as e:
+                    self.logger.warning(f"写入界面卡顿统计失败: {e}")
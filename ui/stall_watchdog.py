@@ -0,0 +1,167 @@
+"""
+界面卡顿监测：Tk 事件循环阻塞时记录主线程调用栈
+"""
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from typing import Any, Dict, List, Optional
+
+# 定位卡顿位置时优先取界面代码中的栈帧
+_UI_DIR = os.path.dirname(os.path.abspath(__file__))
+_PROJECT_DIR = os.path.dirname(_UI_DIR)
+
+
+class StallWatchdog:
+    """
+    界面卡顿监测
+
+    主线程通过 ``after()`` 定时心跳，后台线程检查心跳是否逾期：逾期超过阈值
+    说明事件循环被阻塞（wmic、netsh 等同步调用），此时通过 ``sys._current_frames``
+    采集主线程的调用栈。事件循环恢复后的第一次心跳记录本次卡顿的时长、位置与
+    调用栈，并按位置累计次数与耗时，便于逐个找出并约束阻塞调用。
+    """
+
+    def __init__(self, root, threshold: float = 0.2, interval_ms: int = 100, max_samples: int = 3):
+        """
+        初始化监测
+
+        Args:
+            root: Tk 根窗口
+            threshold: 心跳逾期超过该时长 (秒) 视为卡顿
+            interval_ms: 心跳间隔 (毫秒)
+            max_samples: 每次卡顿最多采集的调用栈数
+        """
+        self.logger = logging.getLogger('StallWatchdog')
+        self.root = root
+        self.threshold = threshold
+        self.interval = interval_ms / 1000
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._after_id = None
+        self._main_ident = threading.main_thread().ident
+        self._expected = 0.0
+        # 进行中的卡顿：采集到的调用栈，由后台线程写入、主线程取走
+        self._samples: Optional[List[List[traceback.FrameSummary]]] = None
+        # 统计：心跳次数、最大心跳延迟、卡顿次数与总时长，以及各位置的累计
+        self.beats = 0
+        self.max_latency = 0.0
+        self.stalls = 0
+        self.stall_seconds = 0.0
+        self.sites: Dict[str, Dict[str, float]] = {}
+
+    def start(self):
+        """开始监测，须在主线程（Tk 线程）中调用"""
+        if self._thread is not None:
+            return
+        self._main_ident = threading.get_ident()
+        self._stop.clear()
+        self._expected = time.monotonic() + self.interval
+        self._after_id = self.root.after(int(self.interval * 1000), self._beat)
+        self._thread = threading.Thread(target=self._watch, name='StallWatchdog', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止监测并记录汇总"""
+        self._stop.set()
+        if self._after_id is not None:
+            try:
+                self.root.after_cancel(self._after_id)
+            except Exception:
+                pass
+            self._after_id = None
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+        if self.stalls:
+            self.logger.info(f"界面卡顿 {self.stalls} 次，共 {self.stall_seconds:.2f}s，"
+                             f"最大心跳延迟 {self.max_latency * 1000:.0f} ms")
+
+    def _beat(self):
+        """主线程心跳：计算延迟，结束进行中的卡顿并登记"""
+        now = time.monotonic()
+        latency = max(0.0, now - self._expected)
+        self.beats += 1
+        self.max_latency = max(self.max_latency, latency)
+        with self._lock:
+            samples, self._samples = self._samples, None
+            self._expected = now + self.interval
+        if latency >= self.threshold:
+            self._record(latency, samples or [])
+        if not self._stop.is_set():
+            self._after_id = self.root.after(int(self.interval * 1000), self._beat)
+
+    def _watch(self):
+        """后台线程：心跳逾期超过阈值时采集主线程调用栈"""
+        poll = min(self.threshold / 2, 0.05)
+        while not self._stop.wait(poll):
+            with self._lock:
+                overdue = time.monotonic() - self._expected
+                if overdue < self.threshold:
+                    continue
+                if self._samples is None:
+                    self._samples = []
+                # 卡顿开始时与之后每隔一个阈值各采一次，看出阻塞是否停在同一处
+                if len(self._samples) >= self.max_samples or overdue < self.threshold * (len(self._samples) + 1):
+                    continue
+                frame = sys._current_frames().get(self._main_ident)
+                if frame is not None:
+                    self._samples.append(traceback.extract_stack(frame))
+
+    @staticmethod
+    def _site(stack: List[traceback.FrameSummary]) -> str:
+        """调用栈中最内层的界面代码帧，没有时依次取最内层的项目代码帧、非标准库帧"""
+        project = external = None
+        for frame in reversed(stack):
+            filename = os.path.abspath(frame.filename)
+            if filename == os.path.abspath(__file__):
+                continue
+            if filename.startswith(_UI_DIR + os.sep):
+                return f"{os.path.relpath(filename, _PROJECT_DIR)}:{frame.lineno} {frame.name}"
+            if project is None and filename.startswith(_PROJECT_DIR + os.sep):
+                project = f"{os.path.relpath(filename, _PROJECT_DIR)}:{frame.lineno} {frame.name}"
+            if external is None and not filename.startswith((sys.prefix, sys.base_prefix)):
+                external = f"{filename}:{frame.lineno} {frame.name}"
+        return project or external or 'unknown'
+
+    def _record(self, duration: float, samples: List[List[traceback.FrameSummary]]):
+        """登记一次卡顿"""
+        site = self._site(samples[0]) if samples else 'unknown'
+        self.stalls += 1
+        self.stall_seconds += duration
+        entry = self.sites.setdefault(site, {'count': 0, 'total': 0.0, 'max': 0.0})
+        entry['count'] += 1
+        entry['total'] += duration
+        entry['max'] = max(entry['max'], duration)
+
+        stacks = []
+        for index, stack in enumerate(samples, 1):
+            stacks.append(f"--- 主线程调用栈 #{index} ---\n{''.join(traceback.format_list(stack))}")
+        self.logger.warning(f"界面卡顿 {duration * 1000:.0f} ms，位置 {site}"
+                            + (f"\n{''.join(stacks)}" if stacks else "（未采集到调用栈）"))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """导出统计，各位置按累计卡顿时长降序"""
+        return {
+            'beats': self.beats,
+            'threshold_seconds': self.threshold,
+            'max_latency_seconds': self.max_latency,
+            'stalls': self.stalls,
+            'stall_seconds': self.stall_seconds,
+            'sites': dict(sorted(self.sites.items(), key=lambda item: -item[1]['total'])),
+        }
+
+    def write(self, path: str):
+        """写入 JSON 统计文件（先写临时文件再替换）"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
@@ -4,14 +4,39 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext
 import logging
-from typing import List, Dict, Any
-from core.executor import TaskExecutor
+import queue
+import threading
+from typing import List, Dict, Any, Optional
+from core.cancellation import CancellationToken
+from core.executor import TaskExecutor, RunResult
+from core.history import RunHistory
+from core.host_facts import HostFacts
+from core.planner import TaskPlanner
+from core.events import PhaseStarted, TaskStarted, TaskSucceeded, TaskFailed, TaskRetried, TaskSkipped, TaskVerified
+from core.status_cache import ServiceStatusCache
+from core.task_index import TaskIndex
 
 
 class TaskSelector(ttk.Frame):
     """任务选择器组件"""
+
+    # 执行期间轮询事件队列的间隔 (毫秒)
+    EVENT_POLL_MS = 50
+
+    # 列表尚未显示、无法测量高度时滚动窗口的行数
+    DEFAULT_WINDOW_ROWS = 20
+    # 滚轮每格滚动的行数
+    WHEEL_ROWS = 3
+
+    # 状态过滤选项 -> (task_states 列下标, 匹配值)
+    STATE_FILTERS = {
+        "全部状态": None,
+        "正在运行": (0, "正在运行"),
+        "已停止": (0, "已停止"),
+        "已禁用": (1, "禁用"),
+    }
     
-    def __init__(self, parent, parser, initial_selections=None, initial_index=0):
+    def __init__(self, parent, parser, initial_selections=None, initial_index=0, status_cache=None, host_facts=None):
         """
         初始化任务选择器
         
@@ -20,11 +45,18 @@ class TaskSelector(ttk.Frame):
             parser: 配置解析器
             initial_selections: 初始选择的任务
             initial_index: 初始显示的分类索引
+            status_cache: 共享的服务状态缓存，为 None 时创建私有缓存
+            host_facts: 共享的主机事实，用于判断任务的 when 条件
         """
         super().__init__(parent)
         self.logger = logging.getLogger('TaskSelector')
         self.parser = parser
         self.executor = TaskExecutor()
+        # 未传入共享缓存时使用私有缓存，组件销毁时一并关闭
+        self._owns_status_cache = status_cache is None
+        self.status_cache = status_cache or ServiceStatusCache(self.executor.executors['service'])
+        self.history = RunHistory()
+        self.host_facts = host_facts or HostFacts()
         
         self.current_category_index = initial_index
         self.categories = parser.get_categories()
@@ -32,11 +64,27 @@ class TaskSelector(ttk.Frame):
         self.selected_tasks: Dict[str, List[Dict[str, Any]]] = initial_selections.copy() if initial_selections else {}
         self.task_vars = []
         self.task_target_vars = []
+        self.task_states = []
+        self._row_pool = []
+        # 滚动窗口：当前匹配项、窗口首行在匹配项中的位置与行高 (像素)
+        self._matches: List[int] = []
+        self._offset = 0
+        self._row_height: Optional[int] = None
+        self._virtual = False
+        self._index_cache: Dict[str, TaskIndex] = {}
+        self._shown_tasks: List[Dict[str, Any]] = []
         self.on_finish = None  # 完成所有分类后的回调钩子
+        self._executing = False  # 已切换到执行日志视图
         
         self._create_ui()
         self._load_category()
     
+    def destroy(self):
+        """销毁组件，关闭私有的状态缓存"""
+        if self._owns_status_cache:
+            self.status_cache.close()
+        super().destroy()
+
     def _create_ui(self):
         """创建UI组件"""
         # 分类标题
@@ -55,6 +103,22 @@ class TaskSelector(ttk.Frame):
         )
 
         self.desc_label.pack(pady=5)
+
+        # 检索栏：关键字 + 状态过滤，每次输入即时刷新列表
+        self.filter_frame = ttk.Frame(self)
+        ttk.Label(self.filter_frame, text="搜索:").pack(side=tk.LEFT)
+        self.search_var = tk.StringVar()
+        ttk.Entry(self.filter_frame, textvariable=self.search_var, width=30).pack(side=tk.LEFT, padx=5)
+        self.state_filter_var = tk.StringVar(value="全部状态")
+        ttk.Combobox(
+            self.filter_frame,
+            textvariable=self.state_filter_var,
+            values=list(self.STATE_FILTERS.keys()),
+            state='readonly',
+            width=10
+        ).pack(side=tk.LEFT, padx=5)
+        self.search_var.trace_add("write", lambda *args: self._apply_filter())
+        self.state_filter_var.trace_add("write", lambda *args: self._apply_filter())
         
         # 主显示区域 (用于显示列表或日志)
         self.display_container = ttk.Frame(self)
@@ -77,6 +141,8 @@ class TaskSelector(ttk.Frame):
 
         self.canvas.create_window((0, 0), window=self.scrollable_frame, anchor="nw")
         self.canvas.configure(yscrollcommand=self.scrollbar.set)
+        self.canvas.bind('<Configure>', lambda e: self._on_list_resize())
+        self.canvas.bind('<MouseWheel>', self._on_wheel)
 
         self.canvas.pack(side="left", fill="both", expand=True)
         self.scrollbar.pack(side="right", fill="y")
@@ -124,6 +190,15 @@ class TaskSelector(ttk.Frame):
         # 初始状态不显示
         self.exec_btn.pack_forget()
 
+        self.cancel_btn = ttk.Button(
+            self.button_frame,
+            text="取消执行",
+            command=self._cancel_run
+        )
+        self.cancel_token = None
+        self._previous_result: Optional[RunResult] = None
+        self._rollback_stats: Optional[Dict[str, int]] = None
+
     def _append_log(self, message: str, level: str = "INFO"):
 
         """向日志区域添加文本"""
@@ -163,64 +238,267 @@ class TaskSelector(ttk.Frame):
             widget.destroy()
         
         tasks = self.parser.get_category_tasks(category)
+        self._shown_tasks = tasks
         self.task_vars = []
         self.task_target_vars = []
-        service_executor = self.executor.executors.get('service')
-
-        header_frame = ttk.Frame(self.scrollable_frame)
+        self.task_states = []
+        self._row_pool = []
+        self._set_virtual_scroll(True)
+        if category not in self._index_cache:
+            self._index_cache[category] = TaskIndex(tasks)
+        self.task_index = self._index_cache[category]
+
+        self.header_frame = header_frame = ttk.Frame(self.scrollable_frame)
         header_frame.pack(fill=tk.X, padx=10, pady=5)
         ttk.Label(header_frame, text="任务名称", width=45, font=('Arial', 9, 'bold')).pack(side=tk.LEFT)
         ttk.Label(header_frame, text="当前状态", width=12, font=('Arial', 9, 'bold')).pack(side=tk.LEFT)
         ttk.Label(header_frame, text="目标设置", font=('Arial', 9, 'bold')).pack(side=tk.LEFT)
 
+        saved = {t['index']: t for t in self.selected_tasks.get(category, [])}
         for i, task in enumerate(tasks):
-            task_id = task.get('id')
-            description = task.get('description', task_id)
             status_val, startup_val, status_color = "未知", "未知", "#666666"
             
-            if task.get('type') == 'service' and service_executor:
+            if task.get('type') == 'service':
                 service_name = task.get('action', {}).get('service_name')
                 if service_name:
-                    status = service_executor.get_service_status(service_name) # type: ignore
+                    status = self.status_cache.get_or_query(service_name)
                     status_val, startup_val = status['status'], status['startup']
                     if status_val == "正在运行": status_color = "#28a745"
                     elif status_val == "已停止": status_color = "#6c757d"
                     if startup_val == "禁用": status_color = "#dc3545"
-            
-            row_frame = ttk.Frame(self.scrollable_frame)
-            row_frame.pack(fill=tk.X, padx=10, pady=2)
+            self.task_states.append((status_val, startup_val, status_color))
             
             var = tk.BooleanVar()
             if category in self.selected_tasks:
-                var.set(i in [t['index'] for t in self.selected_tasks[category]])
+                var.set(i in saved)
             else:
                 var.set(status_val == "正在运行" or startup_val != "禁用")
             self.task_vars.append(var)
-            ttk.Checkbutton(row_frame, variable=var).pack(side=tk.LEFT)
-            ttk.Label(row_frame, text=description, width=42).pack(side=tk.LEFT, padx=5)
-            tk.Label(row_frame, text=f"{status_val} ({startup_val})", fg=status_color, width=12, anchor="w").pack(side=tk.LEFT, padx=5)
-
 
-            target_var = tk.StringVar(value="disabled")
-            if category in self.selected_tasks:
-                for t in self.selected_tasks[category]:
-                    if t['index'] == i: target_var.set(t.get('target', 'disabled')); break
+            target_var = tk.StringVar(value=saved[i].get('target', 'disabled') if i in saved else "disabled")
             self.task_target_vars.append(target_var)
-            
-            for val in ["禁用", "手动", "自动"]:
-                v = {"禁用": "disabled", "手动": "manual", "自动": "automatic"}[val]
-                ttk.Radiobutton(row_frame, text=val, variable=target_var, value=v).pack(side=tk.LEFT, padx=2)
+
+        self._show_filter_bar()
+        self._apply_filter()
+
+        # 用户浏览当前分类时，后台预取下一步需要的服务状态
+        self._prefetch_next()
+
+    @staticmethod
+    def _service_names(tasks: List[Dict[str, Any]]) -> List[str]:
+        """提取任务列表中的服务名称"""
+        names = []
+        for task in tasks:
+            if task.get('type') == 'service':
+                service_name = task.get('action', {}).get('service_name')
+                if service_name:
+                    names.append(service_name)
+        return names
+
+    def _prefetch_next(self):
+        """预取下一分类（或总结界面）所需的服务状态"""
+        next_index = self.current_category_index + 1
+        if next_index < len(self.categories):
+            tasks = self.parser.get_category_tasks(self.categories[next_index])
+        else:
+            # 下一步是总结界面：预取所有已选任务的状态
+            tasks = []
+            for category, items in self.selected_tasks.items():
+                category_tasks = self.parser.get_category_tasks(category)
+                tasks.extend(category_tasks[item['index']] for item in items if item['index'] < len(category_tasks))
+        self.status_cache.prefetch(self._service_names(tasks))
+
+    def _show_filter_bar(self):
+        """显示检索栏"""
+        self.filter_frame.pack(fill=tk.X, padx=10, before=self.display_container)
+
+    def _apply_filter(self):
+        """根据检索词与状态过滤任务，并刷新可见行"""
+        if self.current_category_index >= len(self.categories):
+            return
+        wanted = self.STATE_FILTERS.get(self.state_filter_var.get())
+        candidates = None
+        if wanted:
+            column, value = wanted
+            candidates = [i for i, state in enumerate(self.task_states) if state[column] == value]
+        matches = self.task_index.search(self.search_var.get(), candidates)
+        self._render_rows(matches)
+
+    def _render_rows(self, indices: List[int]):
+        """显示新的匹配结果，滚动窗口回到顶部"""
+        self._matches = indices
+        self._offset = 0
+        self._render_window()
+
+    def _window_size(self) -> int:
+        """画布高度可容纳的任务行数"""
+        if self._row_height is None and self._row_pool:
+            frame = self._row_pool[0]['frame']
+            frame.update_idletasks()
+            # 加上 pack 时上下各 2 像素的间距
+            self._row_height = frame.winfo_reqheight() + 4
+        if self._row_height is None or self.canvas.winfo_height() <= 1:
+            return self.DEFAULT_WINDOW_ROWS
+        # 扣除表头及其上下 5 像素的间距
+        height = self.canvas.winfo_height() - self.header_frame.winfo_reqheight() - 10
+        return max(1, height // self._row_height)
+
+    def _render_window(self):
+        """
+        虚拟化渲染：行控件只覆盖画布可见的行数，绑定到匹配项中从 _offset 开始的一段
+
+        行控件在同一分类内复用，滚动与过滤时只重新绑定变量和文本，不重建控件；
+        滚动条按全部匹配项的位置显示，拖动时移动窗口。
+        """
+        tasks = self._shown_tasks
+        if not self._row_pool:
+            self._row_pool.append(self._create_row())
+        size = self._window_size()
+        total = len(self._matches)
+        self._offset = max(0, min(self._offset, total - size))
+        visible = self._matches[self._offset:self._offset + size]
+
+        while len(self._row_pool) < len(visible):
+            self._row_pool.append(self._create_row())
+
+        for row, i in zip(self._row_pool, visible):
+            task = tasks[i]
+            status_val, startup_val, status_color = self.task_states[i]
+            row['check'].config(variable=self.task_vars[i])
+            row['desc'].config(text=task.get('description', task.get('id')))
+            row['status'].config(text=f"{status_val} ({startup_val})", fg=status_color)
+            for radio in row['radios']:
+                radio.config(variable=self.task_target_vars[i])
+            row['frame'].pack(fill=tk.X, padx=10, pady=2)
+        for row in self._row_pool[len(visible):]:
+            row['frame'].pack_forget()
+
+        if total:
+            self.scrollbar.set(self._offset / total, (self._offset + len(visible)) / total)
+        else:
+            self.scrollbar.set(0, 1)
+        self.canvas.yview_moveto(0)
+
+    def _set_virtual_scroll(self, enabled: bool):
+        """任务列表由滚动窗口驱动滚动条；总结界面恢复画布自身的滚动"""
+        self._virtual = enabled
+        if enabled:
+            self.canvas.configure(yscrollcommand='')
+            self.scrollbar.config(command=self._on_scroll)
+            self.canvas.yview_moveto(0)
+        else:
+            self.canvas.configure(yscrollcommand=self.scrollbar.set)
+            self.scrollbar.config(command=self.canvas.yview)
+
+    def _on_scroll(self, action, amount=None, unit=None):
+        """滚动条与滚轮的统一入口，移动滚动窗口"""
+        size = self._window_size()
+        total = len(self._matches)
+        if action == 'moveto':
+            offset = int(float(amount) * total)
+        else:
+            step = size if unit == 'pages' else 1
+            offset = self._offset + int(amount) * step
+        offset = max(0, min(offset, total - size))
+        if offset != self._offset:
+            self._offset = offset
+            self._render_window()
+
+    def _on_wheel(self, event):
+        if not self._virtual:
+            return None
+        self._on_scroll('scroll', -self.WHEEL_ROWS if event.delta > 0 else self.WHEEL_ROWS, 'units')
+        return "break"
+
+    def _on_list_resize(self):
+        """画布尺寸变化后按新的可见行数重新绑定"""
+        if self._virtual and self.current_category_index < len(self.categories):
+            self._render_window()
+
+    def _create_row(self) -> Dict[str, Any]:
+        """创建一个可复用的任务行控件"""
+        row_frame = ttk.Frame(self.scrollable_frame)
+        check = ttk.Checkbutton(row_frame)
+        check.pack(side=tk.LEFT)
+        desc = ttk.Label(row_frame, text="", width=42)
+        desc.pack(side=tk.LEFT, padx=5)
+        status = tk.Label(row_frame, text="", width=12, anchor="w")
+        status.pack(side=tk.LEFT, padx=5)
+        radios = []
+        for val in ["禁用", "手动", "自动"]:
+            v = {"禁用": "disabled", "手动": "manual", "自动": "automatic"}[val]
+            radio = ttk.Radiobutton(row_frame, text=val, value=v)
+            radio.pack(side=tk.LEFT, padx=2)
+            radios.append(radio)
+        # 行控件覆盖了画布，滚轮事件需在行上绑定
+        for widget in (row_frame, check, desc, status, *radios):
+            widget.bind('<MouseWheel>', self._on_wheel)
+        return {'frame': row_frame, 'check': check, 'desc': desc, 'status': status, 'radios': radios}
 
     def _save_selection(self):
         """保存当前选择"""
         if self.current_category_index < len(self.categories):
             category = self.categories[self.current_category_index]
+            # 使用界面上显示的任务列表，热重载后解析器中的任务可能已变化
+            tasks = self._shown_tasks
             selected = []
             for i, var in enumerate(self.task_vars):
                 if var.get():
-                    selected.append({'index': i, 'target': self.task_target_vars[i].get()})
+                    selected.append({'index': i, 'id': tasks[i].get('id'), 'target': self.task_target_vars[i].get()})
             self.selected_tasks[category] = selected
     
+    @staticmethod
+    def remap_selections(selections: Dict[str, List[Dict[str, Any]]], parser, categories) -> None:
+        """
+        配置重新加载后按任务 id 重新定位已保存的选择（原地修改）
+
+        Args:
+            selections: 分类 -> 已选择项
+            parser: 已重新加载的配置解析器
+            categories: 需要重新定位的分类
+        """
+        for category in categories:
+            items = selections.get(category)
+            if not items or category in ["更新策略", "网络配置"]:
+                continue
+            tasks = parser.get_category_tasks(category)
+            positions = {task.get('id'): i for i, task in enumerate(tasks)}
+            remapped = []
+            for item in items:
+                index = positions.get(item.get('id')) if item.get('id') else item['index']
+                if index is not None and index < len(tasks):
+                    remapped.append({**item, 'index': index})
+            selections[category] = remapped
+
+    def refresh_categories(self, changed):
+        """
+        配置热重载后刷新界面：只重建变化分类的检索索引，保留用户的选择
+
+        Args:
+            changed: 内容有变化的分类名
+        """
+        if self._executing:
+            return
+        current = self.categories[self.current_category_index] if self.current_category_index < len(self.categories) else None
+        if current is not None:
+            self._save_selection()
+        for category in changed:
+            self._index_cache.pop(category, None)
+        self.remap_selections(self.selected_tasks, self.parser, changed)
+
+        self.categories = self.parser.get_categories()
+        if current in self.categories:
+            self.current_category_index = self.categories.index(current)
+            if current in changed:
+                self._load_category()
+        elif current is None:
+            self.current_category_index = len(self.categories)
+            self._show_summary()
+        else:
+            # 当前分类被删除，停留在原位置的下一个分类
+            self.current_category_index = min(self.current_category_index, len(self.categories))
+            self._load_category()
+
     def _prev_category(self):
         self._save_selection(); self.current_category_index -= 1; self._load_category()
     
@@ -239,6 +517,7 @@ class TaskSelector(ttk.Frame):
     def _show_summary(self):
         """显示总结"""
         # 按钮状态管理
+        self.filter_frame.pack_forget()
         self.skip_btn.pack_forget()
         self.next_btn.pack_forget()
         
@@ -253,6 +532,7 @@ class TaskSelector(ttk.Frame):
             self.exec_btn.pack_forget()
             self.desc_label.config(text="未选择任何优化任务，请返回上一步选择。")
         
+        self._set_virtual_scroll(False)
         for widget in self.scrollable_frame.winfo_children(): widget.destroy()
 
 
@@ -273,7 +553,11 @@ class TaskSelector(ttk.Frame):
                 for item in items:
                     idx, target = item['index'], item['target']
                     desc = tasks[idx].get('description', '')
-                    ttk.Label(self.scrollable_frame, text=f"  - {desc} -> 设为: {target_map.get(target, target)}").pack(fill=tk.X, padx=20, pady=1)
+                    # 仅展示已预取的当前状态，不在总结界面触发同步查询
+                    service_name = tasks[idx].get('action', {}).get('service_name')
+                    status = self.status_cache.get(service_name) if service_name else None
+                    current = f" (当前: {status['status']}/{status['startup']})" if status else ""
+                    ttk.Label(self.scrollable_frame, text=f"  - {desc}{current} -> 设为: {target_map.get(target, target)}").pack(fill=tk.X, padx=20, pady=1)
 
     def _execute_optimization(self):
         """执行优化并显示详细日志"""
@@ -283,8 +567,15 @@ class TaskSelector(ttk.Frame):
         self.logger.info(f"开始构建任务列表。当前已选择分类: {list(self.selected_tasks.keys())}")
         
         # 预处理：将更新策略和网络配置以外的任务加入列表
+        # 特殊项在设置界面中已经应用；从预设导入的项带有 'task'，需要在此一并执行
+        applied_items = []
         for category, items in self.selected_tasks.items():
             if category in ["更新策略", "网络配置"]:
+                for item in items:
+                    if 'task' in item:
+                        all_tasks.append(item['task'])
+                    else:
+                        applied_items.append(item)
                 continue 
 
             
@@ -304,19 +595,22 @@ class TaskSelector(ttk.Frame):
                 else:
                     self.logger.error(f"索引越界: 分类 {category}, 索引 {idx}, 任务总数 {len(tasks)}")
         
+        # 排除不适用于本机的任务；不同分类中重复或冲突的目标只保留一个任务
+        plan = TaskPlanner(self.host_facts).plan(all_tasks)
+        all_tasks = plan.tasks
+
         # 检查是否选择了任何优化任务
-        update_items = self.selected_tasks.get("更新策略", [])
-        network_items = self.selected_tasks.get("网络配置", [])
-        if not all_tasks and not update_items and not network_items:
+        if not all_tasks and not applied_items:
             messagebox.showinfo("提示", "未选择任何优化任务")
             return
             
-        confirm_msg = f"即将执行 {len(all_tasks) + len(update_items) + len(network_items)} 个优化任务\n是否继续?"
+        confirm_msg = f"即将执行 {len(all_tasks) + len(applied_items)} 个优化任务\n是否继续?"
 
         if not messagebox.askyesno("确认", confirm_msg):
             return
         
         # 切换到日志视图
+        self._executing = True
         self.list_container.pack_forget()
         self.log_area.pack(fill=tk.BOTH, expand=True)
         self.category_label.config(text="正在执行优化...")
@@ -328,70 +622,209 @@ class TaskSelector(ttk.Frame):
         self.next_btn.config(state='disabled')
         self.exec_btn.config(state='disabled')
 
-        # 执行任务并记录日志
-        success_count = 0
-        failed_count = 0
-        
-        # 获取特殊任务项
-        update_items = self.selected_tasks.get("更新策略", [])
-        network_items = self.selected_tasks.get("网络配置", [])
-        total_count = len(all_tasks) + len(update_items) + len(network_items)
+        total_count = len(all_tasks) + len(applied_items)
         
         self._append_log(f"开始执行优化流程，共 {total_count} 个任务...", "INFO")
         
         # 1. 显示已应用的特殊策略状态
-        for item in update_items + network_items:
+        self.success_count = 0
+        self.failed_count = 0
+        self.drift_count = 0
+        for item in applied_items:
             self._append_log(f"成功: {item.get('description', '')} (已应用)", "SUCCESS")
-            success_count += 1
+            self.success_count += 1
+
+        # 报告被排除和被合并掉的任务
+        for task, reason in plan.excluded:
+            self._append_log(f"跳过: {task.get('description', task.get('id', ''))} ({reason})", "INFO")
+        for record in plan.coalesced:
+            kind = "冲突" if record.conflict else "重复"
+            self._append_log(
+                f"{kind}目标 {record.target}: 采用 {record.kept}，忽略 {', '.join(record.dropped)}",
+                "ERROR" if record.conflict else "INFO"
+            )
 
+        # 清理已执行的任务列表
+        self.selected_tasks.clear()
 
+        # 2. 在后台线程执行其他任务
+        self._start_run(all_tasks)
 
-        # 2. 执行其他任务
-        for task in all_tasks:
-            task_id = task.get('id', 'unknown')
-            desc = task.get('description', task_id)
-            target = task.get('action', {}).get('startup_type', 'disabled')
-            target_map = {"disabled": "禁用", "manual": "手动", "automatic": "自动"}
-            
-            self._append_log(f"正在处理: {desc} (目标: {target_map.get(target, target)})")
-            
-            task_type = str(task.get('type', ''))
-            executor = self.executor.executors.get(task_type)
-            
-            if not executor:
-                self._append_log(f"错误: 未找到类型为 {task_type} 的执行器", "ERROR")
-                failed_count += 1
-                continue
-                
+    def _start_run(self, tasks: List[Dict[str, Any]], previous: Optional[RunResult] = None):
+        """
+        在后台线程中执行任务，事件经队列交回 Tk 线程渲染
+        
+        Args:
+            tasks: 待执行的任务
+            previous: 续跑时上一轮的结果，结束后并入本轮，使回滚覆盖两轮已生效的任务
+        """
+        self.cancel_token = CancellationToken()
+        self.run_result = RunResult(tasks)
+        self._previous_result = previous
+        self._run_targets = {task.get('id', 'unknown'): task.get('action', {}).get('startup_type', 'disabled') for task in tasks}
+
+        self.exec_btn.config(state='disabled')
+        self.cancel_btn.config(state='normal')
+        self.cancel_btn.pack(side=tk.RIGHT, padx=5)
+
+        self._start_worker('task-run', lambda: self.executor.iter_execute(tasks, self.cancel_token), self._finish_run)
+
+    def _start_worker(self, name: str, produce, on_finish):
+        """
+        在后台线程中遍历 produce() 的结果，经队列交回 Tk 线程处理
+
+        Args:
+            name: 线程名
+            produce: 返回可迭代对象的函数（执行事件，或回滚统计）
+            on_finish: 全部处理完后在 Tk 线程中调用
+        """
+        self._event_queue = queue.Queue()
+        self._on_worker_finish = on_finish
+
+        def worker():
             try:
-                if executor.execute(task):
-                    self._append_log(f"成功: {desc} 已配置完成", "SUCCESS")
-                    success_count += 1
-                else:
-                    # 尝试从 logger 中获取最后一条错误信息，或者此处由执行器抛出异常处理
-                    self._append_log(f"失败: {desc} 执行器返回失败。请检查是否被安全软件拦截或权限不足。", "ERROR")
-                    failed_count += 1
+                for item in produce():
+                    self._event_queue.put(item)
             except Exception as e:
-                # 捕获具体的异常并显示在 UI 日志中
-                err_msg = str(e)
-                if "拒绝访问" in err_msg or "Access is denied" in err_msg:
-                    err_msg = "拒绝访问（请检查管理员权限或杀毒软件拦截）"
-                self._append_log(f"异常: {desc} - {err_msg}", "ERROR")
-                failed_count += 1
+                self._event_queue.put(e)
+            self._event_queue.put(None)
+
+        threading.Thread(target=worker, name=name, daemon=True).start()
+        self.after(self.EVENT_POLL_MS, self._poll_events)
+
+    def _cancel_run(self):
+        """请求取消当前执行：未开始的任务将被跳过，正在运行的命令会被终止"""
+        if self.cancel_token is not None:
+            self.cancel_token.cancel("用户取消")
+            self.cancel_btn.config(state='disabled')
+            self._append_log("正在取消执行，等待当前任务结束...", "ERROR")
+
+    def _poll_events(self):
+        """从队列中取出执行事件并更新日志"""
+        while True:
+            try:
+                event = self._event_queue.get_nowait()
+            except queue.Empty:
+                self.after(self.EVENT_POLL_MS, self._poll_events)
+                return
+            if event is None:
+                self._on_worker_finish()
+                return
+            if isinstance(event, Exception):
+                self._append_log(f"执行过程出错: {event}", "ERROR")
+                continue
+            if isinstance(event, dict):
+                # 回滚统计
+                self._rollback_stats = event
+                continue
+            self.run_result.observe(event)
+            self.history.observe(event)
+            self._render_event(event)
 
+    def _render_event(self, event):
+        """将单个执行事件渲染到日志区域"""
+        target_map = {"disabled": "禁用", "manual": "手动", "automatic": "自动"}
+        if isinstance(event, TaskStarted):
+            target = self._run_targets.get(event.task_id, 'disabled')
+            self._append_log(f"正在处理: {event.description} (目标: {target_map.get(target, target)})")
+        elif isinstance(event, TaskSucceeded):
+            self._append_log(f"成功: {event.description} 已配置完成 ({event.duration:.1f}s)", "SUCCESS")
+            self.success_count += 1
+        elif isinstance(event, TaskRetried):
+            self._append_log(f"重试: {event.description} 第 {event.attempt} 次执行失败，正在重试", "INFO")
+        elif isinstance(event, TaskSkipped):
+            self._append_log(f"跳过: {event.description} ({event.reason})", "INFO")
+        elif isinstance(event, PhaseStarted) and event.phase == 'verify':
+            self._append_log(f"正在校验 {event.count} 个任务的实际状态...", "INFO")
+        elif isinstance(event, TaskVerified) and not event.in_sync:
+            self.drift_count += 1
+            self._append_log(f"偏差: {event.description} - {'; '.join(event.drift)}", "ERROR")
+        elif isinstance(event, TaskFailed):
+            self.failed_count += 1
+            if not event.error:
+                self._append_log(f"失败: {event.description} 执行器返回失败。请检查是否被安全软件拦截或权限不足。", "ERROR")
+                return
+            # 将具体的异常显示在 UI 日志中
+            err_msg = event.error
+            if "拒绝访问" in err_msg or "Access is denied" in err_msg:
+                err_msg = "拒绝访问（请检查管理员权限或杀毒软件拦截）"
+            self._append_log(f"异常: {event.description} - {err_msg}", "ERROR")
+
+    def _finish_run(self):
+        """执行结束后的收尾：提示结果，被取消时提供回滚与继续执行"""
+        # 执行后服务状态已改变，缓存全部失效
+        self.status_cache.invalidate()
+        self.cancel_btn.pack_forget()
 
         self._append_log("-" * 40)
-        self._append_log(f"优化完成！成功: {success_count}, 失败: {failed_count}", "INFO")
+        result = self.run_result
+        if self._previous_result is not None:
+            result.carry_over(self._previous_result)
+            self._previous_result = None
+        if result.cancelled:
+            self._append_log(
+                f"优化已中止 ({result.reason})！成功: {self.success_count}, 失败: {self.failed_count}, 跳过: {len(result.skipped)}",
+                "ERROR"
+            )
+            self.category_label.config(text="优化已中止")
+            if result.rollback_candidates() and messagebox.askyesno(
+                "已取消",
+                f"执行已中止，{len(result.rollback_candidates())} 个任务可能已生效。\n是否回滚这些任务？",
+                parent=self.winfo_toplevel()
+            ):
+                self._rollback_partial()
+                return
+            # 保留未完成的任务，允许继续执行
+            if result.pending_tasks():
+                self.exec_btn.config(text="继续执行", state='normal', command=self._resume_run)
+            self.prev_btn.config(state='normal')
+            return
+
+        self._append_log(f"优化完成！成功: {self.success_count}, 失败: {self.failed_count}, 状态偏差: {self.drift_count}", "INFO")
         
         self.category_label.config(text="优化执行完毕")
-        messagebox.showinfo("完成", f"优化任务已执行完毕\n成功: {success_count}\n失败: {failed_count}", parent=self.winfo_toplevel())
-        
-        # 清理已执行的任务列表
-        self.selected_tasks.clear()
+        messagebox.showinfo(
+            "完成",
+            f"优化任务已执行完毕\n成功: {self.success_count}\n失败: {self.failed_count}\n状态偏差: {self.drift_count}",
+            parent=self.winfo_toplevel()
+        )
         
         # 允许点击“上一步”返回查看状态，但不允许再次“执行”以防重复操作
+        self.prev_btn.config(state='normal')
+        self.exec_btn.config(text="执行完毕", state='disabled')
+
+    def _resume_run(self):
+        """继续执行上次被中止时未完成的任务"""
+        pending = self.run_result.pending_tasks()
+        self._append_log(f"继续执行剩余 {len(pending)} 个任务...", "INFO")
+        self.failed_count -= len(self.run_result.failed)
+        self.prev_btn.config(state='disabled')
+        self.category_label.config(text="正在执行优化...")
+        self._start_run(pending, previous=self.run_result)
 
+    def _rollback_partial(self):
+        """在后台线程中回滚被中止的执行（含续跑前各轮）中可能已生效的任务"""
+        tasks = self.run_result.rollback_candidates()
+        self._append_log(f"正在回滚 {len(tasks)} 个任务...", "INFO")
+        self.category_label.config(text="正在回滚...")
+        self.prev_btn.config(state='disabled')
+        self.exec_btn.config(state='disabled')
+        self._rollback_stats = None
 
+        def produce():
+            yield self.executor.rollback_tasks(tasks)
 
+        self._start_worker('task-rollback', produce, self._finish_rollback)
+
+    def _finish_rollback(self):
+        """回滚结束后的收尾"""
+        self.status_cache.invalidate()
+        stats = self._rollback_stats
+        if stats is None:
+            self._append_log("回滚未完成，请查看日志", "ERROR")
+            self.category_label.config(text="回滚失败")
+        else:
+            self._append_log(f"回滚完成！成功: {stats['success']}, 失败: {stats['failed']}", "INFO")
+            self.category_label.config(text="已回滚" if not stats['failed'] else "部分回滚失败")
         self.prev_btn.config(state='normal')
         self.exec_btn.config(text="执行完毕", state='disabled')
@@ -2,29 +2,151 @@
 管理员权限检查模块
 """
 import ctypes
+import sys
+import threading
+from typing import FrozenSet, Iterable, Optional
+
+# 管理员身份（提升后的令牌），其余权限名使用 Windows 令牌中的名称，如 SeBackupPrivilege
+ADMIN = 'admin'
+
+_TOKEN_QUERY = 0x0008
+_TOKEN_PRIVILEGES_CLASS = 3
+
+
+class PrivilegeProvider:
+    """
+    当前进程的权限来源
+
+    进程令牌在运行期间不会改变，因此管理员身份与令牌中的权限列表各只查询一次，
+    之后的调用直接返回记住的结果。测试或非 Windows 平台可改用 StaticPrivilegeProvider。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._admin: Optional[bool] = None
+        self._privileges: Optional[FrozenSet[str]] = None
+
+    def is_admin(self) -> bool:
+        """是否以管理员身份运行"""
+        with self._lock:
+            if self._admin is None:
+                self._admin = self._query_admin()
+            return self._admin
+
+    def privileges(self) -> FrozenSet[str]:
+        """进程令牌中持有的权限名（无论是否已启用）"""
+        with self._lock:
+            if self._privileges is None:
+                self._privileges = self._query_privileges()
+            return self._privileges
+
+    def has(self, name: str) -> bool:
+        """
+        是否具备指定权限
+
+        Args:
+            name: ADMIN 或令牌权限名（如 SeBackupPrivilege）
+
+        Returns:
+            bool: 是否具备
+        """
+        if name == ADMIN:
+            return self.is_admin()
+        return name in self.privileges()
+
+    @staticmethod
+    def _query_admin() -> bool:
+        try:
+            return ctypes.windll.shell32.IsUserAnAdmin() != 0
+        except Exception:
+            return False
+
+    @staticmethod
+    def _query_privileges() -> FrozenSet[str]:
+        if sys.platform != 'win32':
+            return frozenset()
+        from ctypes import wintypes
+
+        class LUID(ctypes.Structure):
+            _fields_ = [('LowPart', wintypes.DWORD), ('HighPart', wintypes.LONG)]
+
+        class LUID_AND_ATTRIBUTES(ctypes.Structure):
+            _fields_ = [('Luid', LUID), ('Attributes', wintypes.DWORD)]
+
+        advapi32 = ctypes.windll.advapi32
+        token = wintypes.HANDLE()
+        if not advapi32.OpenProcessToken(ctypes.windll.kernel32.GetCurrentProcess(), _TOKEN_QUERY,
+                                         ctypes.byref(token)):
+            return frozenset()
+        try:
+            size = wintypes.DWORD()
+            advapi32.GetTokenInformation(token, _TOKEN_PRIVILEGES_CLASS, None, 0, ctypes.byref(size))
+            buffer = ctypes.create_string_buffer(size.value)
+            if not advapi32.GetTokenInformation(token, _TOKEN_PRIVILEGES_CLASS, buffer, size,
+                                                ctypes.byref(size)):
+                return frozenset()
+            count = wintypes.DWORD.from_buffer(buffer).value
+            entries = (LUID_AND_ATTRIBUTES * count).from_buffer(buffer, ctypes.sizeof(wintypes.DWORD))
+            names = set()
+            for entry in entries:
+                length = wintypes.DWORD(64)
+                name = ctypes.create_unicode_buffer(length.value)
+                if advapi32.LookupPrivilegeNameW(None, ctypes.byref(entry.Luid), name, ctypes.byref(length)):
+                    names.add(name.value)
+            return frozenset(names)
+        finally:
+            ctypes.windll.kernel32.CloseHandle(token)
+
+
+class StaticPrivilegeProvider(PrivilegeProvider):
+    """固定权限集合，用于测试与预演"""
+
+    def __init__(self, admin: bool = True, privileges: Iterable[str] = ()):
+        """
+        初始化
+
+        Args:
+            admin: 是否视为管理员
+            privileges: 视为持有的令牌权限名
+        """
+        super().__init__()
+        self._admin = admin
+        self._privileges = frozenset(privileges)
+
+
+_default_provider: Optional[PrivilegeProvider] = None
+_default_lock = threading.Lock()
+
+
+def default_provider() -> PrivilegeProvider:
+    """本进程共享的权限来源（首次调用时创建）"""
+    global _default_provider
+    with _default_lock:
+        if _default_provider is None:
+            _default_provider = PrivilegeProvider()
+        return _default_provider
 
 
 def check_admin_privileges() -> bool:
 
     """
-    检查是否具有管理员权限
-    
+    检查是否具有管理员权限（每个进程只查询一次）
+
     Returns:
         bool: True表示有管理员权限
     """
-    try:
-        return ctypes.windll.shell32.IsUserAnAdmin() != 0
-    except Exception:
-        return False
+    return default_provider().is_admin()
 
 
 def require_admin(func):
     """
     装饰器：要求管理员权限
-    
+
+    经 TaskExecutor 执行的任务已在开始前统一做过权限预检，此装饰器用于直接调用的场景。
+
     Args:
         func: 被装饰的函数
-    
+
     Returns:
         wrapper: 包装函数
     """
@@ -32,4 +154,4 @@ def require_admin(func):
         if not check_admin_privileges():
             raise PermissionError("此操作需要管理员权限")
         return func(*args, **kwargs)
-    return wrapper
\ No newline at end of file
+    return wrapper
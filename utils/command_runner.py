@@ -0,0 +1,84 @@
+"""
+外部命令执行模块
+"""
+import os
+import signal
+import subprocess
+import sys
+from typing import Optional
+
+from core.cancellation import CancellationToken, OperationCancelled
+
+# 单条命令默认超时 (秒)
+DEFAULT_TIMEOUT = 60
+# 等待子进程期间检查取消令牌的间隔 (秒)
+POLL_INTERVAL = 0.2
+
+
+def run_command(cmd: str, token: Optional[CancellationToken] = None,
+                timeout: Optional[float] = DEFAULT_TIMEOUT, throttle=None) -> subprocess.CompletedProcess:
+    """
+    执行 shell 命令，支持超时与取消
+
+    Args:
+        cmd: 命令行
+        token: 取消令牌，取消或到达截止时间后终止子进程
+        timeout: 超时时间 (秒)，None 表示不限
+        throttle: 资源节流器 (core.throttle.ResourceThrottle)，启动子进程前按其限速等待
+
+    Returns:
+        subprocess.CompletedProcess: stdout/stderr 为 bytes
+
+    Raises:
+        OperationCancelled: 执行期间被取消
+        subprocess.TimeoutExpired: 命令超时
+    """
+    if token is not None:
+        token.raise_if_cancelled()
+    if throttle is not None:
+        throttle.acquire_spawn(token)
+
+    # 非 Windows 平台放入独立进程组，取消时可整组终止
+    proc = subprocess.Popen(
+        cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        start_new_session=(sys.platform != 'win32')
+    )
+    waited = 0.0
+    while True:
+        wait = POLL_INTERVAL if token is not None else timeout
+        if timeout is not None:
+            wait = min(wait, timeout - waited)
+        try:
+            stdout, stderr = proc.communicate(timeout=wait)
+            return subprocess.CompletedProcess(cmd, proc.returncode, stdout, stderr)
+        except subprocess.TimeoutExpired:
+            waited += wait
+            if token is not None and token.is_cancelled:
+                _terminate(proc)
+                raise OperationCancelled(token.reason)
+            if timeout is not None and waited >= timeout:
+                _terminate(proc)
+                raise subprocess.TimeoutExpired(cmd, timeout)
+
+
+def _terminate(proc: subprocess.Popen):
+    """终止子进程及其子进程树 (shell=True 时命令运行在 cmd.exe 的子进程中)"""
+    try:
+        if sys.platform == 'win32':
+            subprocess.run(f'taskkill /T /F /PID {proc.pid}', shell=True, capture_output=True)
+        else:
+            os.killpg(proc.pid, signal.SIGKILL)
+        proc.communicate(timeout=5)
+    except Exception:
+        pass
+
+
+def decode_output(data: bytes) -> str:
+    """
+    解码命令输出
+
+    wmic 等工具在重定向时可能输出 UTF-16，其余命令使用本地代码页 (中文系统为 GBK)。
+    """
+    if data.startswith(b'\xff\xfe') or (len(data) > 1 and data[1:2] == b'\x00'):
+        return data.decode('utf-16-le', errors='ignore').lstrip('\ufeff').replace('\r', '')
+    return data.decode('gbk', errors='ignore').replace('\r', '')
@@ -0,0 +1,216 @@
+"""
+内存映射日志文件读取模块
+"""
+import gzip
+import mmap
+import os
+import shutil
+import tempfile
+from array import array
+from bisect import bisect_right
+from typing import List, Optional, Tuple
+
+
+class MappedLogFile:
+    """
+    以 mmap 方式打开日志文件，按需分页读取
+
+    文件内容不会整体读入内存：翻页、级别过滤和子串检索都直接在映射缓冲区上
+    用 find/rfind 定位。行号索引（每行起始偏移）只在需要时按块向后扩展，
+    打开大文件时无需先扫描全文。
+
+    日志保留策略压缩的 .gz 文件先流式解压到临时文件再映射，之后的读取方式相同。
+    """
+
+    # 每次扩展行号索引时扫描的字节数
+    INDEX_CHUNK = 4 * 1024 * 1024
+    # 解压 .gz 日志时的读写块大小
+    COPY_CHUNK = 1024 * 1024
+    # 日志格式中级别字段的分隔形式，见 utils.logger.setup_logger
+    LEVEL_PATTERN = ' - {} - '
+    LEVELS = ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL')
+
+    def __init__(self, path: str, encoding: str = 'utf-8'):
+        """
+        打开日志文件
+
+        Args:
+            path: 文件路径
+            encoding: 文件编码
+        """
+        self.path = path
+        self.encoding = encoding
+        self._file = self._open(path)
+        self.size = os.fstat(self._file.fileno()).st_size
+        # 空文件无法映射
+        self._buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b''
+        self._offsets = array('Q', [0])
+        self._scanned = 0
+
+    @classmethod
+    def _open(cls, path: str):
+        """打开日志；gzip 文件解压到关闭即删除的临时文件"""
+        if not path.lower().endswith('.gz'):
+            return open(path, 'rb')
+        target = tempfile.TemporaryFile()
+        try:
+            with gzip.open(path, 'rb') as src:
+                shutil.copyfileobj(src, target, cls.COPY_CHUNK)
+            target.flush()
+        except (OSError, EOFError) as e:
+            target.close()
+            raise OSError(f"解压失败: {e}")
+        return target
+
+    def close(self):
+        """关闭映射与文件"""
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @property
+    def fully_indexed(self) -> bool:
+        """行号索引是否已覆盖全文"""
+        return self._scanned >= self.size
+
+    def _extend_index(self, limit: int):
+        """将行号索引扩展到至少覆盖 limit 字节"""
+        buffer = self._buffer
+        while self._scanned < min(limit, self.size):
+            end = min(self._scanned + self.INDEX_CHUNK, self.size)
+            pos = self._scanned
+            while True:
+                newline = buffer.find(b'\n', pos, end)
+                if newline < 0:
+                    break
+                if newline + 1 < self.size:
+                    self._offsets.append(newline + 1)
+                pos = newline + 1
+            self._scanned = end
+
+    def estimated_line_count(self) -> int:
+        """按已索引部分的平均行长估算总行数，全文索引后为精确值"""
+        if self.fully_indexed:
+            return len(self._offsets)
+        if not self._scanned:
+            self._extend_index(self.INDEX_CHUNK)
+        return max(1, int(len(self._offsets) * self.size / max(self._scanned, 1)))
+
+    def line_number(self, offset: int) -> Optional[int]:
+        """
+        获取某行起始偏移对应的行号（从 0 开始）
+
+        索引只会向后扩展一个块，偏移超出已索引范围较远时返回 None，避免为显示行号扫描全文。
+
+        Args:
+            offset: 行起始偏移
+
+        Returns:
+            Optional[int]: 行号
+        """
+        if offset >= self._scanned:
+            if offset - self._scanned > self.INDEX_CHUNK:
+                return None
+            self._extend_index(offset + 1)
+        return bisect_right(self._offsets, offset) - 1
+
+    def line_offset(self, line_number: int) -> Optional[int]:
+        """
+        获取第 line_number 行的起始偏移，必要时扩展索引
+
+        Returns:
+            Optional[int]: 超出文件行数时为 None
+        """
+        while len(self._offsets) <= line_number and not self.fully_indexed:
+            self._extend_index(self._scanned + self.INDEX_CHUNK)
+        if line_number < len(self._offsets):
+            return self._offsets[line_number]
+        return None
+
+    def line_start(self, position: int) -> int:
+        """获取 position 所在行的起始偏移"""
+        position = max(0, min(position, self.size))
+        return self._buffer.rfind(b'\n', 0, position) + 1
+
+    def _line_end(self, offset: int) -> int:
+        newline = self._buffer.find(b'\n', offset)
+        return self.size if newline < 0 else newline
+
+    def _decode(self, start: int, end: int) -> str:
+        return self._buffer[start:end].rstrip(b'\r').decode(self.encoding, errors='replace')
+
+    def lines_from(self, offset: int, count: int) -> List[Tuple[int, str]]:
+        """
+        从 offset 所在行开始向后读取若干行
+
+        Returns:
+            List[Tuple[int, str]]: (行起始偏移, 行文本)
+        """
+        lines = []
+        pos = self.line_start(offset)
+        while pos < self.size and len(lines) < count:
+            end = self._line_end(pos)
+            lines.append((pos, self._decode(pos, end)))
+            pos = end + 1
+        return lines
+
+    def lines_before(self, offset: int, count: int) -> List[Tuple[int, str]]:
+        """
+        读取 offset 所在行之前的若干行（按文件顺序返回）
+
+        Returns:
+            List[Tuple[int, str]]: (行起始偏移, 行文本)
+        """
+        lines = []
+        end = self.line_start(offset) - 1
+        while end >= 0 and len(lines) < count:
+            start = self._buffer.rfind(b'\n', 0, end) + 1
+            lines.append((start, self._decode(start, end)))
+            end = start - 1
+        lines.reverse()
+        return lines
+
+    def search(self, text: str = '', level: Optional[str] = None, start: int = 0,
+               limit: int = 200) -> Tuple[List[Tuple[int, str]], Optional[int]]:
+        """
+        在映射缓冲区上检索匹配的行（区分大小写）
+
+        直接用 find 跳到下一个匹配位置，不逐行解码；同时指定级别和文本时以文本定位、
+        再检查所在行的级别。
+
+        Args:
+            text: 子串，为空表示不按文本过滤
+            level: 日志级别，如 'ERROR'，None 表示不按级别过滤
+            start: 起始偏移
+            limit: 最多返回的行数
+
+        Returns:
+            Tuple[lines, next_offset]: 匹配的 (行起始偏移, 行文本)，以及继续检索的偏移
+            (已到文件末尾时为 None)
+        """
+        level_token = self.LEVEL_PATTERN.format(level).encode(self.encoding) if level else None
+        needle = text.encode(self.encoding) if text else level_token
+        if needle is None:
+            lines = self.lines_from(start, limit)
+            next_offset = self._line_end(lines[-1][0]) + 1 if lines else None
+            return lines, (next_offset if next_offset is not None and next_offset < self.size else None)
+
+        buffer = self._buffer
+        lines = []
+        pos = start
+        while len(lines) < limit:
+            hit = buffer.find(needle, pos)
+            if hit < 0:
+                return lines, None
+            line_start = self.line_start(hit)
+            line_end = self._line_end(hit)
+            if level_token is None or needle == level_token or buffer.find(level_token, line_start, line_end) >= 0:
+                lines.append((line_start, self._decode(line_start, line_end)))
+            pos = line_end + 1
+        return lines, (pos if pos < self.size else None)
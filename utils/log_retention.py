@@ -0,0 +1,289 @@
+"""
+日志保留与压缩模块
+"""
+import contextlib
+import gzip
+import json
+import logging
+import os
+import shutil
+import sys
+import threading
+import time
+from typing import Any, Dict, Iterator, Optional
+
+from utils.process_stats import lower_current_thread_priority
+
+
+class LogRetention:
+    """
+    日志保留策略
+
+    超过 compress_after_days 天的 .log 压缩为 .log.gz，之后按总大小和文件数上限
+    从最旧的文件开始删除。已知文件记录在日志目录下的清单中，只有首次运行（没有
+    清单）时扫描目录，之后新日志由 setup_logger 登记，每次只需检查清单中的条目。
+
+    GUI 与多个 CLI 进程可能同时运行：登记只向登记文件追加一行，无需加锁，由下次
+    run 合并进清单；run 持有日志目录下锁文件的排他锁（进程退出时由系统释放），
+    已被其他进程持有时本次跳过。持锁期间遗留的 .gz.tmp 必然来自中途退出的压缩，
+    直接删除。
+    """
+
+    MANIFEST_NAME = 'retention.json'
+    JOURNAL_NAME = 'retention.new'
+    LOCK_NAME = 'retention.lock'
+    # 压缩中途退出时遗留的临时文件
+    TMP_SUFFIX = '.gz.tmp'
+    # 压缩时的读写块大小
+    COPY_CHUNK = 1024 * 1024
+
+    def __init__(self, log_dir: str = "logs", compress_after_days: float = 7,
+                 max_total_mb: float = 200, max_files: int = 100):
+        """
+        初始化保留策略
+
+        Args:
+            log_dir: 日志目录
+            compress_after_days: 超过此天数的日志被压缩
+            max_total_mb: 日志总大小上限 (MB)
+            max_files: 日志文件数上限
+        """
+        self.logger = logging.getLogger('LogRetention')
+        self.log_dir = log_dir
+        self.compress_after_days = compress_after_days
+        self.max_total_mb = max_total_mb
+        self.max_files = max_files
+        self.manifest_path = os.path.join(log_dir, self.MANIFEST_NAME)
+        self.journal_path = os.path.join(log_dir, self.JOURNAL_NAME)
+        self._lock = threading.Lock()
+
+    def _load_manifest(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f).get('files', {})
+        except (OSError, ValueError):
+            return None
+
+    def _save_manifest(self, files: Dict[str, Dict[str, Any]]):
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': 1, 'files': files}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _scan(self) -> Dict[str, Dict[str, Any]]:
+        """首次运行时扫描目录建立清单"""
+        files = {}
+        for entry in os.scandir(self.log_dir):
+            if entry.is_file() and entry.name.startswith('win10_optimize_') and \
+                    (entry.name.endswith('.log') or entry.name.endswith('.log.gz')):
+                stat = entry.stat()
+                files[entry.name] = {'size': stat.st_size, 'mtime': stat.st_mtime}
+        return files
+
+    def _remove_orphans(self) -> int:
+        """删除中途退出的压缩遗留的临时文件，须持有进程锁"""
+        removed = 0
+        for entry in os.scandir(self.log_dir):
+            if entry.name.endswith(self.TMP_SUFFIX) and entry.is_file():
+                try:
+                    os.remove(entry.path)
+                    removed += 1
+                except OSError as e:
+                    self.logger.warning(f"删除临时文件 {entry.name} 失败: {e}")
+        return removed
+
+    def register(self, path: str):
+        """
+        将新建的日志文件登记到登记文件，下次 run 时合并进清单
+
+        Args:
+            path: 日志文件路径
+        """
+        line = json.dumps({'name': os.path.basename(path), 'mtime': time.time()}, ensure_ascii=False)
+        try:
+            # 追加单行，多个进程同时登记也不会互相覆盖
+            with open(self.journal_path, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+        except OSError as e:
+            self.logger.warning(f"登记日志文件失败: {e}")
+
+    def _take_journal(self, files: Dict[str, Dict[str, Any]]) -> Optional[str]:
+        """
+        把登记文件中的条目合并进清单
+
+        登记文件先改名再读取，之后的登记写入新文件；清单保存后才删除改名后的文件，
+        中途退出时下次 run 会再次合并。
+
+        Returns:
+            Optional[str]: 清单保存后应删除的文件
+        """
+        merging = self.journal_path + '.merging'
+        if not os.path.exists(merging):
+            try:
+                os.replace(self.journal_path, merging)
+            except OSError:
+                # 没有新登记，或其他进程正在写入（下次再合并）
+                return None
+        try:
+            with open(merging, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        files.setdefault(str(entry['name']), {'size': 0, 'mtime': float(entry['mtime'])})
+                    except (ValueError, KeyError, TypeError):
+                        continue
+        except OSError as e:
+            self.logger.warning(f"读取登记文件失败: {e}")
+            return None
+        return merging
+
+    @contextlib.contextmanager
+    def _process_lock(self) -> Iterator[bool]:
+        """跨进程的排他锁，产出是否取得；已被其他进程持有时不等待"""
+        with open(os.path.join(self.log_dir, self.LOCK_NAME), 'a+b') as f:
+            locked = _try_lock_file(f)
+            try:
+                yield locked
+            finally:
+                if locked:
+                    _unlock_file(f)
+
+    def run(self, current: Optional[str] = None) -> Dict[str, int]:
+        """
+        执行一次保留策略
+
+        Args:
+            current: 当前正在写入的日志文件，不会被压缩或删除
+
+        Returns:
+            Dict[str, int]: 统计信息 (compressed, deleted)
+        """
+        with self._lock, self._process_lock() as locked:
+            if not locked:
+                self.logger.info("其他进程正在清理日志，本次跳过")
+                return {'compressed': 0, 'deleted': 0}
+            self._remove_orphans()
+            files = self._load_manifest()
+            if files is None:
+                files = self._scan()
+            merged = self._take_journal(files)
+            current_name = os.path.basename(current) if current else None
+            stats = {'compressed': 0, 'deleted': 0}
+            cutoff = time.time() - self.compress_after_days * 86400
+
+            for name in list(files):
+                path = os.path.join(self.log_dir, name)
+                if name.endswith('.gz'):
+                    if not os.path.exists(path):
+                        del files[name]
+                    continue
+                # 未压缩的日志可能仍在增长，重新读取大小与修改时间
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    del files[name]
+                    continue
+                files[name] = {'size': stat.st_size, 'mtime': stat.st_mtime}
+                if name != current_name and stat.st_mtime < cutoff:
+                    compressed = self._compress(path)
+                    if compressed is not None:
+                        del files[name]
+                        files[os.path.basename(compressed)] = {
+                            'size': os.path.getsize(compressed), 'mtime': stat.st_mtime
+                        }
+                        stats['compressed'] += 1
+
+            # 从最旧的开始删除，直到满足总大小与数量上限
+            limit_bytes = self.max_total_mb * 1024 * 1024
+            total = sum(info['size'] for info in files.values())
+            for name in sorted(files, key=lambda n: files[n]['mtime']):
+                if total <= limit_bytes and len(files) <= self.max_files:
+                    break
+                if name == current_name:
+                    continue
+                try:
+                    os.remove(os.path.join(self.log_dir, name))
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    self.logger.warning(f"删除日志 {name} 失败: {e}")
+                    continue
+                total -= files.pop(name)['size']
+                stats['deleted'] += 1
+
+            self._save_manifest(files)
+            if merged is not None:
+                try:
+                    os.remove(merged)
+                except OSError:
+                    pass
+            return stats
+
+    def _compress(self, path: str) -> Optional[str]:
+        """将日志压缩为 .gz 并删除原文件，失败时返回 None"""
+        target = path + '.gz'
+        tmp_path = target + '.tmp'
+        try:
+            with open(path, 'rb') as src, gzip.open(tmp_path, 'wb') as dst:
+                shutil.copyfileobj(src, dst, self.COPY_CHUNK)
+            stat = os.stat(path)
+            os.replace(tmp_path, target)
+            os.utime(target, (stat.st_atime, stat.st_mtime))
+            os.remove(path)
+            return target
+        except OSError as e:
+            self.logger.warning(f"压缩日志 {path} 失败: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return None
+
+    def start_background(self, current: Optional[str] = None) -> threading.Thread:
+        """
+        在低优先级后台线程中执行一次保留策略
+
+        Args:
+            current: 当前正在写入的日志文件
+
+        Returns:
+            threading.Thread: 后台线程
+        """
+        def worker():
+            lower_current_thread_priority()
+            try:
+                stats = self.run(current)
+                if stats['compressed'] or stats['deleted']:
+                    self.logger.info(f"日志清理完成: 压缩 {stats['compressed']} 个, 删除 {stats['deleted']} 个")
+            except Exception as e:
+                self.logger.warning(f"日志清理失败: {e}")
+
+        thread = threading.Thread(target=worker, name='log-retention', daemon=True)
+        thread.start()
+        return thread
+
+
+def _try_lock_file(f) -> bool:
+    """对已打开的锁文件加非阻塞排他锁"""
+    try:
+        if sys.platform == 'win32':
+            import msvcrt
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except OSError:
+        return False
+
+
+def _unlock_file(f):
+    try:
+        if sys.platform == 'win32':
+            import msvcrt
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    except OSError:
+        pass
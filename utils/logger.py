@@ -4,15 +4,17 @@
 import logging
 import os
 from datetime import datetime
+from utils.log_retention import LogRetention
 
 
-def setup_logger(log_dir: str = "logs"):
+def setup_logger(log_dir: str = "logs", retention: bool = True):
 
     """
     设置日志记录器
     
     Args:
         log_dir: 日志目录
+        retention: 是否在后台压缩、清理旧日志
     
     Returns:
         logger: 日志记录器实例
@@ -39,5 +41,10 @@ def setup_logger(log_dir: str = "logs"):
     
     logger = logging.getLogger('Win10Optimizer')
     logger.info("日志系统初始化完成")
+
+    if retention:
+        log_retention = LogRetention(log_dir)
+        log_retention.register(log_file)
+        log_retention.start_background(current=log_file)
     
     return logger
\ No newline at end of file
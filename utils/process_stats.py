@@ -0,0 +1,201 @@
+"""
+进程资源统计与调度模块
+"""
+import ctypes
+import os
+import sys
+import threading
+from typing import Optional, Tuple
+
+
+class _ProcessMemoryCounters(ctypes.Structure):
+    """PROCESS_MEMORY_COUNTERS 结构体"""
+    _fields_ = [
+        ('cb', ctypes.c_ulong),
+        ('PageFaultCount', ctypes.c_ulong),
+        ('PeakWorkingSetSize', ctypes.c_size_t),
+        ('WorkingSetSize', ctypes.c_size_t),
+        ('QuotaPeakPagedPoolUsage', ctypes.c_size_t),
+        ('QuotaPagedPoolUsage', ctypes.c_size_t),
+        ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+        ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+        ('PagefileUsage', ctypes.c_size_t),
+        ('PeakPagefileUsage', ctypes.c_size_t),
+    ]
+
+
+def current_rss_mb() -> float:
+    """
+    获取当前进程的常驻内存 (工作集)
+
+    Returns:
+        float: 内存占用 (MB)，无法获取时返回 0
+    """
+    try:
+        if sys.platform == 'win32':
+            counters = _ProcessMemoryCounters()
+            counters.cb = ctypes.sizeof(counters)
+            handle = ctypes.windll.kernel32.GetCurrentProcess()
+            if ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+                return counters.WorkingSetSize / (1024 ** 2)
+            return 0.0
+        with open('/proc/self/statm', 'r') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / (1024 ** 2)
+    except Exception:
+        return 0.0
+
+
+def lower_current_thread_priority():
+    """
+    降低当前线程的调度优先级，供后台维护线程使用
+
+    Windows 上设置为 THREAD_PRIORITY_LOWEST；Linux 上线程拥有独立的 nice 值，
+    调整当前线程 id 即可。其他平台不做处理。
+    """
+    try:
+        if sys.platform == 'win32':
+            kernel32 = ctypes.windll.kernel32
+            kernel32.SetThreadPriority(kernel32.GetCurrentThread(), -2)
+        elif sys.platform.startswith('linux'):
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 10)
+    except Exception:
+        pass
+
+
+# SetPriorityClass 参数
+_BELOW_NORMAL_PRIORITY_CLASS = 0x00004000
+# NtSetInformationProcess 的 ProcessIoPriority 信息类与 IoPriorityLow
+_PROCESS_IO_PRIORITY = 33
+_IO_PRIORITY_LOW = 1
+_IO_PRIORITY_NORMAL = 2
+
+
+def lower_process_priority() -> Optional[Tuple[int, int]]:
+    """
+    降低整个进程的 CPU 与 I/O 优先级，之后创建的子进程（sc、netsh 等）随之继承
+
+    Windows 上设置为 BELOW_NORMAL_PRIORITY_CLASS 并将 I/O 优先级设为 Low；
+    Linux 上调高主线程的 nice 值（之后创建的线程与子进程继承，未显式设置
+    ionice 时 I/O 优先级也由 nice 值推导）。其他平台不做处理。
+
+    Returns:
+        Optional[Tuple[int, int]]: 调整前的优先级，交给 restore_process_priority 恢复；
+        未做调整时为 None
+    """
+    try:
+        if sys.platform == 'win32':
+            kernel32 = ctypes.windll.kernel32
+            handle = kernel32.GetCurrentProcess()
+            priority_class = kernel32.GetPriorityClass(handle)
+            io_priority = ctypes.c_ulong()
+            status = ctypes.windll.ntdll.NtQueryInformationProcess(
+                handle, _PROCESS_IO_PRIORITY, ctypes.byref(io_priority), ctypes.sizeof(io_priority), None
+            )
+            if status != 0:
+                io_priority.value = _IO_PRIORITY_NORMAL
+            previous = (priority_class, io_priority.value)
+            kernel32.SetPriorityClass(handle, _BELOW_NORMAL_PRIORITY_CLASS)
+            _set_io_priority(handle, _IO_PRIORITY_LOW)
+            return previous
+        elif sys.platform.startswith('linux'):
+            previous = os.getpriority(os.PRIO_PROCESS, os.getpid())
+            os.setpriority(os.PRIO_PROCESS, os.getpid(), max(previous, 10))
+            return previous, 0
+    except Exception:
+        pass
+    return None
+
+
+def restore_process_priority(previous: Optional[Tuple[int, int]]) -> bool:
+    """
+    恢复 lower_process_priority 调整前的优先级
+
+    Linux 上调低 nice 值需要 CAP_SYS_NICE（或 RLIMIT_NICE 允许），普通用户无法恢复。
+
+    Args:
+        previous: lower_process_priority 的返回值
+
+    Returns:
+        bool: 是否已恢复
+    """
+    if previous is None:
+        return True
+    try:
+        if sys.platform == 'win32':
+            kernel32 = ctypes.windll.kernel32
+            handle = kernel32.GetCurrentProcess()
+            priority_class, io_priority = previous
+            ok = bool(priority_class) and bool(kernel32.SetPriorityClass(handle, priority_class))
+            _set_io_priority(handle, io_priority)
+            return ok
+        elif sys.platform.startswith('linux'):
+            os.setpriority(os.PRIO_PROCESS, os.getpid(), previous[0])
+            return True
+    except Exception:
+        pass
+    return False
+
+
+def _set_io_priority(handle, io_priority: int):
+    value = ctypes.c_ulong(io_priority)
+    ctypes.windll.ntdll.NtSetInformationProcess(
+        handle, _PROCESS_IO_PRIORITY, ctypes.byref(value), ctypes.sizeof(value)
+    )
+
+
+class _FileTime(ctypes.Structure):
+    """FILETIME 结构体"""
+    _fields_ = [('dwLowDateTime', ctypes.c_ulong), ('dwHighDateTime', ctypes.c_ulong)]
+
+    @property
+    def value(self) -> int:
+        return (self.dwHighDateTime << 32) | self.dwLowDateTime
+
+
+class SystemCpuSampler:
+    """
+    整机 CPU 使用率采样
+
+    每次 sample() 返回自上次采样以来的平均使用率。Windows 使用 GetSystemTimes，
+    Linux 读取 /proc/stat 首行；只需两次读取计数器，不启动子进程。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._previous = self._read_times()
+
+    @staticmethod
+    def _read_times():
+        """返回 (空闲时间, 总时间)，无法获取时返回 None"""
+        try:
+            if sys.platform == 'win32':
+                idle, kernel, user = _FileTime(), _FileTime(), _FileTime()
+                if not ctypes.windll.kernel32.GetSystemTimes(
+                        ctypes.byref(idle), ctypes.byref(kernel), ctypes.byref(user)):
+                    return None
+                # 内核时间已包含空闲时间
+                return idle.value, kernel.value + user.value
+            with open('/proc/stat', 'r') as f:
+                fields = [int(value) for value in f.readline().split()[1:]]
+            # idle + iowait
+            return fields[3] + fields[4], sum(fields)
+        except Exception:
+            return None
+
+    def sample(self) -> Optional[float]:
+        """
+        采样整机 CPU 使用率
+
+        Returns:
+            Optional[float]: 自上次采样以来的使用率 (0-1)，无法获取或间隔过短时返回 None
+        """
+        current = self._read_times()
+        with self._lock:
+            previous, self._previous = self._previous, current
+        if current is None or previous is None:
+            return None
+        total = current[1] - previous[1]
+        if total <= 0:
+            return None
+        return max(0.0, min(1.0, 1.0 - (current[0] - previous[0]) / total))